@@ -1,6 +1,7 @@
 import test from 'node:test';
 import assert from 'node:assert/strict';
-import { stepLobbyState } from '../src/state/engine.js';
+import { readFileSync } from 'node:fs';
+import { initLobbyState, stepLobbyState } from '../src/state/engine.js';
 import { LobbyConfig, LobbyInputEvent, LobbyState } from '../src/state/types.js';
 
 function baseConfig(): LobbyConfig {
@@ -78,3 +79,31 @@ test('coins do not spawn on player tiles', () => {
   const occupied = new Set([`${next.players.a.x},${next.players.a.y}`, `${next.players.b.x},${next.players.b.y}`]);
   assert.equal(occupied.has(`${coin.x},${coin.y}`), false);
 });
+
+test('replays the recorded match fixture tick for tick', () => {
+  const lines = readFileSync(new URL('./fixtures/engine-recording.jsonl', import.meta.url), 'utf8')
+    .split('\n')
+    .filter((line) => line.trim());
+  const config: LobbyConfig = JSON.parse(lines[0]).config;
+  const recorded: Array<LobbyState & { inputs: Array<[string, LobbyInputEvent['direction']]> }> = lines
+    .slice(1)
+    .map((line) => JSON.parse(line));
+
+  let state = initLobbyState(config, Object.keys(recorded[0].players));
+  state.updated_at = config.started_at;
+  const { inputs: _initInputs, ...initial } = recorded[0];
+  assert.deepEqual(state, initial);
+
+  for (const { inputs, ...expected } of recorded.slice(1)) {
+    const events: LobbyInputEvent[] = inputs.map(([agent_id, direction]) => ({
+      type: 'INPUT',
+      lobby_id: config.lobby_id,
+      agent_id,
+      direction,
+      timestamp: expected.updated_at
+    }));
+    state = stepLobbyState(state, config, events, new Date(expected.updated_at));
+    assert.deepEqual(state, expected, `tick ${expected.tick}`);
+  }
+  assert.equal(state.status, 'FINISHED');
+});
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+import argparse
+import atexit
+import json
+import os
+import platform
+import signal
+import sys
+import threading
+import time
+
+from harness.credentials import CredentialCache
+from harness.httpclient import HttpPool
+from harness.latency import LatencyHistogram
+from harness.pow import solve_pow
+
+API_URL = os.getenv("API_URL", "http://localhost:3001").rstrip("/")
+# Mode whose lobbies the state/input/join workloads fill; use one reserved for benchmarking.
+E2E_GAME_MODE_ID = os.getenv("E2E_GAME_MODE_ID", "").strip()
+HTTP_TIMEOUT_SEC = float(os.getenv("E2E_HTTP_TIMEOUT_SEC", "30"))
+# Reuse registered agents (labels BL001.., BJ001..) across benchmark runs; same format as the e2e
+# harness cache. Empty disables.
+BENCH_CRED_CACHE_FILE = os.getenv("BENCH_CRED_CACHE_FILE", "").strip()
+PAYOUT_ADDRESS = os.getenv("E2E_AGENT_PAYOUT_ADDRESS", "0x00482Eebe76c6F818c308cFFD8b7eAa19B2E504d")
+
+_http_pool = HttpPool(max_per_host=256, timeout=HTTP_TIMEOUT_SEC)
+# Opened in main(): PoW pool workers re-import this script, and must not load or flush the cache.
+_cred_cache = None
+
+
+def log(msg: str):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def http_json(method: str, path: str, body=None, headers=None):
+    url = f"{API_URL}{path}"
+    request_headers = {"content-type": "application/json"}
+    if headers:
+        request_headers.update(headers)
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    status, raw = _http_pool.request(method, url, body=data, headers=request_headers, timeout=HTTP_TIMEOUT_SEC)
+    payload = raw.decode("utf-8")
+    if status >= 400:
+        raise RuntimeError(f"HTTP {status} {url}: {payload}")
+    return status, json.loads(payload) if payload else None
+
+
+def register_agent(label: str):
+    if _cred_cache:
+        cached = _cred_cache.lookup(label, PAYOUT_ADDRESS)
+        if cached:
+            return cached["api_key"]
+    _, challenge = http_json("POST", "/agents/challenge", body={})
+    solution, _attempts = solve_pow(challenge["nonce"], int(challenge["difficulty"]))
+    _, verify = http_json(
+        "POST",
+        "/agents/verify",
+        body={
+            "challenge_id": challenge["challenge_id"],
+            "solution": solution,
+            "payout_address": PAYOUT_ADDRESS,
+            "runtime_identity": label[:10],
+            "name": f"Bench {label}",
+            "version": "v1",
+        },
+    )
+    if _cred_cache:
+        _cred_cache.store(label, PAYOUT_ADDRESS, verify["api_key"], str(verify["agent_id"]))
+    return verify["api_key"]
+
+
+def leave_lobby(api_key: str, lobby_id: str):
+    try:
+        http_json("POST", "/lobbies/leave", body={"lobby_id": lobby_id}, headers={"x-api-key": api_key})
+    except RuntimeError as exc:
+        if "HTTP 404" not in str(exc):
+            raise
+
+
+def release_memberships(memberships):
+    """Take bench agents out of their lobbies; [(api_key, lobby_id)]. Returns how many could not leave."""
+    if _cred_cache:
+        _released, failed = _cred_cache.release(memberships, leave_lobby)
+        return failed
+    failed = 0
+    for api_key, lobby_id in memberships:
+        try:
+            leave_lobby(api_key, lobby_id)
+        except Exception:
+            failed += 1
+    return failed
+
+
+def run_load(call, duration_sec: float, concurrency: int, requests: int = 0):
+    """
+    Closed-loop load: `concurrency` threads call `call(i)` back to back until `duration_sec` passes
+    (or `requests` calls are made, when > 0). Returns the result row for one workload.
+    """
+    hist = LatencyHistogram()
+    lock = threading.Lock()
+    counter = [0]
+    deadline = time.time() + duration_sec
+
+    def worker():
+        local = LatencyHistogram()
+        while True:
+            with lock:
+                i = counter[0]
+                if (requests and i >= requests) or (not requests and time.time() >= deadline):
+                    break
+                counter[0] += 1
+            started = time.perf_counter()
+            ok = True
+            try:
+                call(i)
+            except Exception:
+                ok = False
+            local.record(time.perf_counter() - started, ok)
+        with lock:
+            hist.merge(local)
+
+    started = time.time()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result_row(hist, time.time() - started, concurrency)
+
+
+def result_row(hist, wall_sec: float, concurrency: int) -> dict:
+    return {
+        "requests": hist.count,
+        "errors": hist.errors,
+        "concurrency": concurrency,
+        "wall_sec": round(wall_sec, 3),
+        "rps": round(hist.count / wall_sec, 2) if wall_sec > 0 else 0.0,
+        "mean_ms": round(hist.total_us / hist.count / 1000, 3) if hist.count else 0.0,
+        "p50_ms": hist.percentile(50) / 1000,
+        "p95_ms": hist.percentile(95) / 1000,
+        "p99_ms": hist.percentile(99) / 1000,
+        "max_ms": hist.max_us / 1000,
+    }
+
+
+class BenchContext:
+    """
+    Shared setup for the workloads that need agents or a running lobby (created on first use).
+    Every join is tracked so release() can take the agents back out once a workload is done.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self._game_mode = None
+        self._lobby = None
+        self._joined = {}
+        self._joined_lock = threading.Lock()
+
+    def game_mode(self):
+        """(game_mode_id, max_players) for E2E_GAME_MODE_ID, which must be an active mode from /games."""
+        if self._game_mode is None:
+            if not E2E_GAME_MODE_ID:
+                raise RuntimeError(
+                    "Set E2E_GAME_MODE_ID to an active game mode reserved for benchmarking "
+                    "(the state/input/join workloads fill its lobbies with bench agents)."
+                )
+            _status, games = http_json("GET", "/games")
+            selected = next((g for g in games or [] if str(g.get("id")) == E2E_GAME_MODE_ID), None)
+            if selected is None:
+                raise RuntimeError(f"E2E_GAME_MODE_ID {E2E_GAME_MODE_ID} is not an active mode at /games.")
+            self._game_mode = (str(selected["id"]), int(selected.get("max_players") or 1))
+        return self._game_mode
+
+    def join(self, api_key: str):
+        _status, joined = http_json(
+            "POST", "/lobbies/join", body={"game_mode_id": self.game_mode()[0]}, headers={"x-api-key": api_key}
+        )
+        with self._joined_lock:
+            self._joined[api_key] = joined["lobby_id"]
+        if _cred_cache:
+            _cred_cache.note_lobby(api_key, joined["lobby_id"])
+        return joined
+
+    def release(self):
+        """Leave every lobby our agents joined; the next workload that needs one starts afresh."""
+        with self._joined_lock:
+            memberships = list(self._joined.items())
+            self._joined.clear()
+        self._lobby = None
+        if not memberships:
+            return
+        failed = release_memberships(memberships)
+        log(f"Released {len(memberships) - failed} bench agents from their lobbies" + (f", {failed} failed" if failed else ""))
+
+    def register_many(self, prefix: str, count: int):
+        keys = []
+        started = time.time()
+        for idx in range(count):
+            keys.append(register_agent(f"{prefix}{idx + 1:03d}"))
+        log(f"Registered {count} agents ({prefix}*) in {time.time() - started:.1f}s")
+        return keys
+
+    def active_lobby(self):
+        """(lobby_id, [api_key, ...]) for a lobby filled with our own agents."""
+        if self._lobby is None:
+            _game_mode_id, max_players = self.game_mode()
+            keys = self.register_many("BL", max_players)
+            joined = None
+            by_lobby = {}
+            for api_key in keys:
+                joined = self.join(api_key)
+                by_lobby.setdefault(joined["lobby_id"], []).append(api_key)
+            lobby_id = joined["lobby_id"]
+            deadline = time.time() + 15
+            while time.time() < deadline:
+                try:
+                    _status, state = http_json("GET", f"/lobbies/{lobby_id}/state")
+                except RuntimeError:
+                    state = None
+                if state and state.get("status") == "ACTIVE":
+                    break
+                time.sleep(0.2)
+            else:
+                raise RuntimeError(f"Bench lobby {lobby_id} did not become ACTIVE (another client may share the mode)")
+            self._lobby = (lobby_id, by_lobby[lobby_id])
+            log(f"Bench lobby {lobby_id} active with {len(self._lobby[1])} of our agents")
+        return self._lobby
+
+
+def bench_stats(ctx, args):
+    return run_load(lambda _i: http_json("GET", "/stats"), args.duration, args.concurrency)
+
+
+def bench_lobbies(ctx, args):
+    return run_load(lambda _i: http_json("GET", "/lobbies"), args.duration, args.concurrency)
+
+
+def bench_state(ctx, args):
+    lobby_id, _keys = ctx.active_lobby()
+    return run_load(lambda _i: http_json("GET", f"/lobbies/{lobby_id}/state"), args.duration, args.concurrency)
+
+
+def bench_input(ctx, args):
+    lobby_id, keys = ctx.active_lobby()
+    directions = ("left", "right", "up", "down")
+
+    def call(i):
+        http_json(
+            "POST",
+            f"/lobbies/{lobby_id}/input",
+            body={"direction": directions[(i // len(keys)) % len(directions)]},
+            headers={"x-api-key": keys[i % len(keys)]},
+        )
+
+    return run_load(call, args.duration, args.concurrency)
+
+
+def bench_join(ctx, args):
+    # Registration (PoW) happens up front; only the /lobbies/join burst is timed.
+    ctx.game_mode()
+    keys = ctx.register_many("BJ", args.join_agents)
+    return run_load(
+        lambda i: ctx.join(keys[i]),
+        duration_sec=0,
+        concurrency=min(args.concurrency, len(keys)),
+        requests=len(keys),
+    )
+
+
+# Run order for "all": read-only first, then the workloads that create lobbies.
+WORKLOADS = {
+    "stats": bench_stats,
+    "lobbies": bench_lobbies,
+    "state": bench_state,
+    "input": bench_input,
+    "join": bench_join,
+}
+
+# (metric, direction): +1 means higher is worse.
+_COMPARED = (("rps", -1), ("p50_ms", 1), ("p99_ms", 1), ("errors", 1))
+
+
+def compare(current: dict, baseline: dict, threshold_pct: float, min_delta_ms: float):
+    """[(workload, metric, base, cur, change_pct, regressed)] for workloads present in both runs."""
+    rows = []
+    for name, cur in current.get("workloads", {}).items():
+        base = baseline.get("workloads", {}).get(name)
+        if not base:
+            continue
+        for metric, worse in _COMPARED:
+            b = float(base.get(metric, 0) or 0)
+            c = float(cur.get(metric, 0) or 0)
+            change = ((c - b) / b * 100.0) if b else (0.0 if c == b else float("inf"))
+            regressed = change * worse > threshold_pct
+            if metric.endswith("_ms") and abs(c - b) < min_delta_ms:
+                regressed = False
+            if metric == "errors":
+                regressed = c > b
+            rows.append((name, metric, b, c, change, regressed))
+    return rows
+
+
+def main():
+    global _cred_cache
+    parser = argparse.ArgumentParser(description="Benchmark the Qlympics API hot endpoints")
+    parser.add_argument("workloads", nargs="*", default=["all"], help=f"any of {', '.join(WORKLOADS)} (default: all)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per timed workload")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--join-agents", type=int, default=20, help="agents in the join storm")
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    names = list(WORKLOADS) if "all" in args.workloads else args.workloads
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        raise RuntimeError(f"Unknown workloads {unknown} (expected any of {list(WORKLOADS)})")
+
+    # Let SIGTERM unwind like Ctrl-C so the running workload's agents still leave their lobby.
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: sys.exit(143))
+    http_json("GET", "/health")
+    if BENCH_CRED_CACHE_FILE:
+        _cred_cache = CredentialCache(BENCH_CRED_CACHE_FILE, API_URL)
+        atexit.register(_cred_cache.flush)
+    if _cred_cache:
+        stale = list(_cred_cache.joined_lobbies().items())
+        if stale:
+            failed = release_memberships(stale)
+            log(f"Credential cache: {len(stale) - failed} agents left lobbies from an earlier run, {failed} dropped")
+    ctx = BenchContext(args)
+    results = {
+        "api_url": API_URL,
+        "started_at": int(time.time()),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "params": {"duration": args.duration, "concurrency": args.concurrency, "join_agents": args.join_agents},
+        "workloads": {},
+    }
+    for name in names:
+        log(f"Running {name}...")
+        try:
+            row = WORKLOADS[name](ctx, args)
+        finally:
+            ctx.release()
+        results["workloads"][name] = row
+        log(
+            f"{name:>8}: n={row['requests']} err={row['errors']} rps={row['rps']:.1f} "
+            f"p50={row['p50_ms']:.2f}ms p95={row['p95_ms']:.2f}ms p99={row['p99_ms']:.2f}ms max={row['max_ms']:.2f}ms"
+        )
+
+    payload = json.dumps(results, indent=1, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+        log(f"Results written to {args.out}")
+    else:
+        print(payload)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if baseline.get("params") != results["params"]:
+            log(f"Note: baseline params {baseline.get('params')} differ from this run's {results['params']}")
+        rows = compare(results, baseline, args.threshold, args.min_delta_ms)
+        regressions = [row for row in rows if row[5]]
+        log(f"Against baseline {args.baseline} (threshold {args.threshold:g}%):")
+        for name, metric, b, c, change, regressed in rows:
+            log(f"  {name:>8} {metric:<7} {b:10.2f} -> {c:10.2f} ({change:+.1f}%){'  REGRESSION' if regressed else ''}")
+        if regressions:
+            raise RuntimeError(f"{len(regressions)} regression(s) against {args.baseline}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print("Benchmark failed:", exc)
+        sys.exit(1)
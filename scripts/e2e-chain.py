@@ -1,16 +1,36 @@
 #!/usr/bin/env python3
-import hashlib
 import json
 import os
 import shutil
-import socket
 import subprocess
 import sys
 import time
 import urllib.request
 import calendar
+import http.client
 import re
 import math
+import asyncio
+import atexit
+import threading
+import queue
+
+from harness.assign import SOLVERS as ASSIGN_SOLVERS, assign_coins
+from harness.asynchttp import AsyncHttpClient
+from harness.credentials import CredentialCache, CredentialPool
+from harness.effects import EffectStats, InputEffectTracker
+from harness.httpclient import HttpPool
+from harness.latency import LatencyHistogram, LatencyRecorder, route_template
+from harness.openloop import RAMPS, OpenLoopStats, ramp_rate, run_open_loop
+from harness.planner import CooperativePlanner
+from harness.pow import solve_pow
+from harness.records import LobbyRecord
+from harness.redisclient import RedisClient
+from harness.shard import WorkerProcess, merge_reports, split_evenly, write_report
+from harness.sqlsession import NodePgSession, PsqlSession
+from harness.stateview import LobbyView
+from harness.ticks import InputScheduler
+from harness.wsstate import LobbyStateFeed
 
 API_URL = os.getenv("API_URL", "http://localhost:3001").rstrip("/")
 QUAI_RPC_URL = os.getenv("QUAI_RPC_URL", "https://orchard.rpc.quai.network/cyprus1")
@@ -20,7 +40,6 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "qlympics")
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_FORCE_DOCKER = os.getenv("REDIS_FORCE_DOCKER", "") == "1"
-POW_MAX_ITERS = int(os.getenv("POW_MAX_ITERS", "500000"))
 TREASURY_PRIVATE_KEY = os.getenv("QUAI_TREASURY_PRIVATE_KEY", "")
 AGENT_PAYOUT_ADDRESS = os.getenv("E2E_AGENT_PAYOUT_ADDRESS", "0x00482Eebe76c6F818c308cFFD8b7eAa19B2E504d")
 AGENT2_PAYOUT_ADDRESS = os.getenv("E2E_AGENT2_PAYOUT_ADDRESS", "0x0068d788E534DE2aC81b523Ed3C8F735269E6629")
@@ -39,6 +58,14 @@ FINISH_WAIT_SEC = float(os.getenv("E2E_FINISH_WAIT_SEC", "20"))
 TICK_STALL_SEC = float(os.getenv("E2E_TICK_STALL_SEC", "3"))
 STATE_REFRESH_SEC = float(os.getenv("E2E_STATE_REFRESH_SEC", "0.4"))
 HTTP_TIMEOUT_SEC = float(os.getenv("E2E_HTTP_TIMEOUT_SEC", "180"))
+# Keep-alive connection reuse for http_json; E2E_HTTP_KEEPALIVE=0 falls back to one urlopen per call.
+HTTP_KEEPALIVE = os.getenv("E2E_HTTP_KEEPALIVE", "1") == "1"
+HTTP_POOL_SIZE = int(os.getenv("E2E_HTTP_POOL_SIZE", "32"))
+# Receipt/balance polling: one JSON-RPC batch per poll, interval doubling from MIN to MAX.
+RPC_POLL_MIN_SEC = float(os.getenv("E2E_RPC_POLL_MIN_SEC", "1"))
+RPC_POLL_MAX_SEC = float(os.getenv("E2E_RPC_POLL_MAX_SEC", "8"))
+# Retries (on the same backoff) for a batch POST that failed in transit or with a 5xx/408/429.
+RPC_RETRIES = int(os.getenv("E2E_RPC_RETRIES", "3"))
 DEMO_UI = os.getenv("E2E_DEMO_UI", "") == "1"
 GAME_DURATION_SEC = int(os.getenv("E2E_GAME_DURATION_SEC", "10"))
 GAME_COINS_PER_MATCH = int(os.getenv("E2E_GAME_COINS_PER_MATCH", "0"))  # 0 => derived
@@ -46,19 +73,49 @@ JOIN_DELAY_SEC = float(os.getenv("E2E_JOIN_DELAY_SEC", "0"))
 WEB_URL = os.getenv("E2E_WEB_URL", "http://localhost:5173").rstrip("/")
 DEMO_FINISH_GRACE_SEC = float(os.getenv("E2E_DEMO_FINISH_GRACE_SEC", "60"))
 SCENARIO = os.getenv("E2E_SCENARIO", "").strip().lower()  # "", "scale"
+# Scale scenario across N worker processes (lobbies split between them); the coordinator merges their
+# metrics. WORKER_INDEX/WORKER_COUNT are set by the coordinator on its children.
+E2E_SCALE_WORKERS = int(os.getenv("E2E_SCALE_WORKERS", "1"))
+E2E_SCALE_WORKER_INDEX = int(os.getenv("E2E_SCALE_WORKER_INDEX", "-1"))
+E2E_SCALE_WORKER_COUNT = int(os.getenv("E2E_SCALE_WORKER_COUNT", "1"))
 E2E_USE_EXISTING_STACK = os.getenv("E2E_USE_EXISTING_STACK", "0") == "1"
 E2E_STATE_SOURCE = os.getenv("E2E_STATE_SOURCE", "api" if E2E_USE_EXISTING_STACK else "auto").strip().lower()
+# Used when E2E_STATE_SOURCE=ws: one game-server WebSocket per lobby instead of polling.
+E2E_GAME_WS_URL = os.getenv("E2E_GAME_WS_URL", "ws://localhost:3003").rstrip("/")
+E2E_WS_SNAPSHOT_WAIT_SEC = float(os.getenv("E2E_WS_SNAPSHOT_WAIT_SEC", "0.5"))
+# Align drive loops to the lobby's tick schedule (learned from state.tick/updated_at/tick_rate)
+# instead of fixed sleeps. Lead 0 => derived from measured input latency.
+E2E_TICK_SYNC = os.getenv("E2E_TICK_SYNC", "0") == "1"
+E2E_TICK_LEAD_MS = float(os.getenv("E2E_TICK_LEAD_MS", "0"))
+E2E_TICK_SETTLE_MS = float(os.getenv("E2E_TICK_SETTLE_MS", "10"))
 E2E_USE_DB_HELPERS = os.getenv("E2E_USE_DB_HELPERS", "0" if E2E_USE_EXISTING_STACK else "1") == "1"
+# Keep one psql / node-pg helper process for all queries instead of spawning one per query.
+E2E_SQL_PERSISTENT = os.getenv("E2E_SQL_PERSISTENT", "1") == "1"
 E2E_REQUIRE_PAYOUT = os.getenv("E2E_REQUIRE_PAYOUT", "0" if E2E_USE_EXISTING_STACK else "1") == "1"
 E2E_GAME_MODE_ID = os.getenv("E2E_GAME_MODE_ID", "").strip()
 E2E_GAME_MODE = os.getenv("E2E_GAME_MODE", "Coin Runner").strip()
 E2E_AUTO_FILL_LOBBY = os.getenv("E2E_AUTO_FILL_LOBBY", "1") == "1"
+# With DB helpers, reuse an ACTIVE game mode with the same settings (and no WAITING lobby) instead of inserting one per run.
+E2E_REUSE_GAME_MODES = os.getenv("E2E_REUSE_GAME_MODES", "1") == "1"
+# API-only runs reuse the /games listing for this long when resolving modes.
+E2E_GAME_MODE_CACHE_TTL_SEC = float(os.getenv("E2E_GAME_MODE_CACHE_TTL_SEC", "300"))
+# Reuse registered agents across runs (keyed by API_URL, label, payout address). Empty disables.
+E2E_CRED_CACHE_FILE = os.getenv("E2E_CRED_CACHE_FILE", "").strip()
+E2E_CRED_CACHE_VALIDATE_WORKERS = int(os.getenv("E2E_CRED_CACHE_VALIDATE_WORKERS", "16"))
+# Per-route latency histograms are always printed at the end of a run; set a path to also dump them as JSON.
+E2E_METRICS_JSON = os.getenv("E2E_METRICS_JSON", "").strip()
+# How long a parsed GET /lobbies listing is reused by lobby lookups that have no watch code.
+E2E_LOBBY_LIST_TTL_SEC = float(os.getenv("E2E_LOBBY_LIST_TTL_SEC", "1.0"))
 UUID_RE = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
 
 def log(msg: str):
     print(msg, flush=True)
 
 
+_http_pool = HttpPool(max_per_host=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT_SEC)
+_latency = LatencyRecorder()
+
+
 def http_json(method: str, path: str, body=None, headers=None):
     url = f"{API_URL}{path}"
     data = None
@@ -67,40 +124,134 @@ def http_json(method: str, path: str, body=None, headers=None):
         request_headers.update(headers)
     if body is not None:
         data = json.dumps(body).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers=request_headers, method=method)
-    try:
-        with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_SEC) as resp:
-            payload = resp.read().decode("utf-8")
-            return resp.status, json.loads(payload)
-    except urllib.error.HTTPError as exc:
-        payload = exc.read().decode("utf-8")
-        raise RuntimeError(f"HTTP {exc.code} {url}: {payload}") from exc
+    with _latency.timed("http", f"{method} {route_template(path)}"):
+        if HTTP_KEEPALIVE:
+            status, raw = _http_pool.request(method, url, body=data, headers=request_headers, timeout=HTTP_TIMEOUT_SEC)
+            payload = raw.decode("utf-8")
+            if status >= 400:
+                raise RuntimeError(f"HTTP {status} {url}: {payload}")
+            return status, json.loads(payload)
+        req = urllib.request.Request(url, data=data, headers=request_headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_SEC) as resp:
+                payload = resp.read().decode("utf-8")
+                return resp.status, json.loads(payload)
+        except urllib.error.HTTPError as exc:
+            payload = exc.read().decode("utf-8")
+            raise RuntimeError(f"HTTP {exc.code} {url}: {payload}") from exc
+
+
+_rpc_stats = {"posts": 0, "calls": 0}
+_rpc_batch_supported = True
+
+
+def rpc_post(body):
+    """POST a JSON-RPC body; every failure (transport, HTTP status, non-JSON reply) is a RuntimeError."""
+    data = json.dumps(body).encode("utf-8")
+    _rpc_stats["posts"] += 1
+    _rpc_stats["calls"] += len(body) if isinstance(body, list) else 1
+    if isinstance(body, list):
+        name = "batch " + ",".join(sorted({call["method"] for call in body}))
+    else:
+        name = body["method"]
+    with _latency.timed("rpc", name):
+        try:
+            if HTTP_KEEPALIVE:
+                status, raw = _http_pool.request(
+                    "POST", QUAI_RPC_URL, body=data, headers={"content-type": "application/json"}, timeout=10
+                )
+                if status >= 400:
+                    raise RuntimeError(f"HTTP {status} {QUAI_RPC_URL}: {raw.decode('utf-8', 'replace')}")
+                return json.loads(raw.decode("utf-8"))
+            req = urllib.request.Request(
+                QUAI_RPC_URL,
+                data=data,
+                headers={"content-type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            raise RuntimeError(f"HTTP {exc.code} {QUAI_RPC_URL}: {exc.read().decode('utf-8', 'replace')}") from exc
+        except json.JSONDecodeError as exc:
+            raise RuntimeError(f"RPC reply from {QUAI_RPC_URL} is not JSON: {exc}") from exc
+        except (OSError, http.client.HTTPException) as exc:
+            raise RuntimeError(f"RPC request to {QUAI_RPC_URL} failed: {exc}") from exc
+
+
+def rpc_transient(exc) -> bool:
+    """True for failures worth retrying: transport errors, bad JSON, HTTP 5xx/408/429."""
+    m = re.match(r"HTTP (\d+) ", str(exc))
+    if not m:
+        return True
+    code = int(m.group(1))
+    return code >= 500 or code in (408, 429)
 
 
 def rpc_json(method: str, params):
-    data = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode("utf-8")
-    req = urllib.request.Request(
-        QUAI_RPC_URL,
-        data=data,
-        headers={"content-type": "application/json"},
-        method="POST",
-    )
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        payload = json.loads(resp.read().decode("utf-8"))
-        if "error" in payload:
-            raise RuntimeError(payload["error"])
-        return payload.get("result")
+    payload = rpc_post({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+    if "error" in payload:
+        raise RuntimeError(payload["error"])
+    return payload.get("result")
 
 
-def solve_pow(nonce: str, difficulty: int):
-    target = "0" * difficulty
-    for i in range(POW_MAX_ITERS):
-        solution = f"sol-{i}"
-        digest = hashlib.sha256(f"{nonce}:{solution}".encode("utf-8")).hexdigest()
-        if digest.startswith(target):
-            return solution, i + 1
-    raise RuntimeError(f"Failed to solve PoW in {POW_MAX_ITERS} iterations. Increase POW_MAX_ITERS or reduce difficulty.")
+def rpc_batch(calls):
+    """
+    Send [(method, params), ...] as one JSON-RPC batch POST. Returns results in call order; a call
+    that errored comes back as a RuntimeError instance. Transient failures are retried on the
+    rpc_backoff schedule (E2E_RPC_RETRIES times) and then reported for every call. Only a node that
+    answers the list with a single object, or names batches in its error, is remembered as not
+    supporting them and served one call at a time.
+    """
+    global _rpc_batch_supported
+    calls = list(calls)
+    if not calls:
+        return []
+    if _rpc_batch_supported and len(calls) > 1:
+        body = [
+            {"jsonrpc": "2.0", "id": idx, "method": method, "params": params}
+            for idx, (method, params) in enumerate(calls)
+        ]
+        payload = None
+        backoff = rpc_backoff()
+        for attempt in range(RPC_RETRIES + 1):
+            try:
+                payload = rpc_post(body)
+                break
+            except RuntimeError as exc:
+                if not rpc_transient(exc):
+                    if "batch" in str(exc).lower():
+                        payload = {"error": str(exc)}
+                    break
+                if attempt == RPC_RETRIES:
+                    return [exc for _ in calls]
+                time.sleep(next(backoff))
+        if isinstance(payload, list):
+            by_id = {item.get("id"): item for item in payload if isinstance(item, dict)}
+            results = []
+            for idx in range(len(calls)):
+                item = by_id.get(idx)
+                if item is None:
+                    results.append(RuntimeError(f"JSON-RPC batch reply missing id {idx}"))
+                elif "error" in item:
+                    results.append(RuntimeError(item["error"]))
+                else:
+                    results.append(item.get("result"))
+            return results
+        if isinstance(payload, dict):
+            _rpc_batch_supported = False
+            log(
+                "RPC node does not accept JSON-RPC batches; falling back to one request per call. "
+                f"({payload.get('error')})"
+            )
 
+    results = []
+    for method, params in calls:
+        try:
+            results.append(rpc_json(method, params))
+        except RuntimeError as exc:
+            results.append(exc)
+    return results
 
 
 def runtime_identity_from_label(label: str) -> str:
@@ -110,7 +261,100 @@ def runtime_identity_from_label(label: str) -> str:
     return normalized[:10]
 
 
+_cred_cache = None
+
+
+def load_credential_cache():
+    global _cred_cache
+    if not E2E_CRED_CACHE_FILE:
+        return
+    _cred_cache = CredentialCache(E2E_CRED_CACHE_FILE, API_URL)
+
+    def fetch_me(api_key: str):
+        try:
+            _status, me = http_json("GET", "/agents/me", headers={"x-api-key": api_key})
+        except RuntimeError as exc:
+            if "HTTP 401" in str(exc):
+                return None
+            raise
+        return me
+
+    started = time.time()
+    kept, dropped = _cred_cache.validate(fetch_me, workers=E2E_CRED_CACHE_VALIDATE_WORKERS)
+    log(
+        f"Credential cache {E2E_CRED_CACHE_FILE}: {kept} valid, {dropped} dropped "
+        f"(validated in {time.time() - started:.2f}s)"
+    )
+    atexit.register(_cred_cache.flush)
+    release_cached_memberships()
+
+
+def release_cached_memberships():
+    """
+    /lobbies/join hands an agent back any lobby it is still JOINED in, whatever the game mode, so
+    cached agents left in WAITING/ACTIVE lobbies by an interrupted run must leave them first.
+    DB helpers find those memberships directly; API-only runs check the lobbies the cache
+    recorded at join time (one that is no longer listed cannot be checked and its agent is dropped).
+    """
+    memberships = []
+    if E2E_USE_DB_HELPERS:
+        agents = _cred_cache.agents()
+        ids = [agent_id for agent_id in agents if UUID_RE.fullmatch(agent_id)]
+        if ids:
+            array = ", ".join(f"'{agent_id}'" for agent_id in ids)
+            output = run_sql(
+                "SELECT lp.agent_id, lp.lobby_id FROM lobby_players lp JOIN lobbies l ON l.id = lp.lobby_id "
+                "WHERE lp.status = 'JOINED' AND l.status IN ('WAITING', 'ACTIVE') "
+                f"AND lp.agent_id = ANY(ARRAY[{array}]::uuid[]);"
+            )
+            for line in output.splitlines():
+                parts = line.strip().split("|")
+                if len(parts) == 2 and parts[0] in agents:
+                    memberships.append((agents[parts[0]], parts[1]))
+    else:
+        recorded = _cred_cache.joined_lobbies()
+        if not recorded:
+            return
+        listing = lobby_listing(max_age_sec=0)
+        unknown = []
+        finished = set()
+        for api_key, lobby_id in recorded.items():
+            status = str((listing.get(lobby_id) or {}).get("status", "")).upper()
+            if status in ("WAITING", "ACTIVE"):
+                memberships.append((api_key, lobby_id))
+            elif status:
+                finished.add(lobby_id)
+            else:
+                unknown.append(api_key)
+        _cred_cache.forget_lobbies(finished)
+        _cred_cache.drop(unknown)
+        if unknown:
+            log(f"Credential cache: dropped {len(unknown)} agents joined to lobbies no longer listed")
+
+    def leave(api_key: str, lobby_id: str):
+        try:
+            http_json("POST", "/lobbies/leave", body={"lobby_id": lobby_id}, headers={"x-api-key": api_key})
+        except RuntimeError as exc:
+            if "HTTP 404" not in str(exc):
+                raise
+
+    released, lost = _cred_cache.release(memberships, leave, workers=E2E_CRED_CACHE_VALIDATE_WORKERS)
+    if memberships:
+        log(f"Credential cache: {released} agents left stale lobbies, {lost} dropped")
+
+
+def note_lobby_finished(lobby_id: str):
+    if _cred_cache:
+        _cred_cache.forget_lobbies([lobby_id])
+
+
 def register_agent(payout_address: str, label: str):
+    if _cred_cache:
+        cached = _cred_cache.lookup(label, payout_address)
+        if cached:
+            log(f"Reusing cached credentials for {label} (agent {cached['agent_id']})")
+            return cached["api_key"]
+
     log(f"Requesting PoW challenge for {label}...")
     _, challenge = http_json("POST", "/agents/challenge", body={})
     challenge_id = challenge["challenge_id"]
@@ -134,6 +378,8 @@ def register_agent(payout_address: str, label: str):
             "version": "v1",
         },
     )
+    if _cred_cache:
+        _cred_cache.store(label, payout_address, verify["api_key"], str(verify["agent_id"]))
     return verify["api_key"]
 
 
@@ -192,18 +438,71 @@ const sql = process.argv[1];
     return result.stdout.strip()
 
 
+_sql_session = None
+_sql_stats = {"backend": "", "queries": 0, "total_sec": 0.0}
+
+
+def get_sql_session():
+    """Same backend preference as run_sql's one-shot path, but as a long-lived process (None if none fits)."""
+    global _sql_session
+    if _sql_session is None:
+        db_url = os.getenv("DATABASE_URL", "").strip()
+        if db_url and can_use_node_pg():
+            env = dict(os.environ)
+            env["DATABASE_URL"] = db_url
+            _sql_session = NodePgSession(env=env)
+        elif can_use_psql():
+            _sql_session = PsqlSession(["psql", db_url, "-tA"])
+        elif has_local_docker_postgres():
+            _sql_session = PsqlSession([
+                "docker",
+                "compose",
+                "exec",
+                "-T",
+                "-e",
+                f"PGPASSWORD={POSTGRES_PASSWORD}",
+                "postgres",
+                "psql",
+                "-U",
+                POSTGRES_USER,
+                "-d",
+                POSTGRES_DB,
+                "-tA",
+            ])
+    return _sql_session
+
+
 def run_sql(sql: str):
     if not E2E_USE_DB_HELPERS:
         raise RuntimeError("DB helpers are disabled (E2E_USE_DB_HELPERS=0)")
-
+    started = time.time()
+    verb = (sql.split(None, 1) or ["?"])[0].upper()
+    try:
+        with _latency.timed("sql", verb):
+            if E2E_SQL_PERSISTENT:
+                session = get_sql_session()
+                if session is None:
+                    raise RuntimeError("No DB helper available: set DATABASE_URL+psql or run local docker compose postgres")
+                _sql_stats["backend"] = f"{session.name}-session"
+                return session.query(sql)
+            return run_sql_once(sql)
+    finally:
+        _sql_stats["queries"] += 1
+        _sql_stats["total_sec"] += time.time() - started
+
+
+def run_sql_once(sql: str):
     if bool(os.getenv("DATABASE_URL", "").strip()) and can_use_node_pg():
+        _sql_stats["backend"] = "node-pg-spawn"
         return run_sql_via_node_pg(sql)
 
     if can_use_psql():
+        _sql_stats["backend"] = "psql-spawn"
         db_url = os.getenv("DATABASE_URL", "").strip()
         return run_cmd(["psql", db_url, "-tA", "-v", "ON_ERROR_STOP=1", "-c", sql])
 
     if has_local_docker_postgres():
+        _sql_stats["backend"] = "docker-psql-spawn"
         return run_cmd([
             "docker",
             "compose",
@@ -238,18 +537,27 @@ def extract_first_uuid(text: str) -> str:
     return ""
 
 
+_lobby_watch_codes = {}  # lobby_id -> watch code, learned from join responses
+
+
 def join_lobby(game_mode_id: str, api_key: str, label: str = ""):
     deadline = time.time() + 20
     attempts = 0
     while True:
         attempts += 1
         try:
-            return http_json(
+            status, joined = http_json(
                 "POST",
                 "/lobbies/join",
                 body={"game_mode_id": game_mode_id},
                 headers={"x-api-key": api_key},
             )
+            if isinstance(joined, dict) and joined.get("lobby_id"):
+                if joined.get("watch_code"):
+                    _lobby_watch_codes[str(joined["lobby_id"])] = str(joined["watch_code"])
+                if _cred_cache:
+                    _cred_cache.note_lobby(api_key, str(joined["lobby_id"]))
+            return status, joined
         except RuntimeError as exc:
             msg = str(exc)
             transient_404 = "HTTP 404" in msg and "Game mode not found" in msg
@@ -265,7 +573,48 @@ def join_lobby(game_mode_id: str, api_key: str, label: str = ""):
             raise
 
 
+_state_feed = None
+_tick_scheduler = InputScheduler(
+    lead_sec=E2E_TICK_LEAD_MS / 1000.0, settle_sec=E2E_TICK_SETTLE_MS / 1000.0, enabled=E2E_TICK_SYNC
+)
+
+
+def get_state_feed():
+    global _state_feed
+    if _state_feed is None:
+        _state_feed = LobbyStateFeed(E2E_GAME_WS_URL)
+    return _state_feed
+
+
+def wait_for_next_tick(lobby_id: str, fallback_sec: float, tick=None):
+    """
+    Pace a drive loop. With E2E_STATE_SOURCE=ws, block until the game server pushes a tick newer
+    than `tick` (default: the cached one). Polling sources sleep until just after the next predicted
+    tick with E2E_TICK_SYNC=1, otherwise `fallback_sec`.
+    """
+    if E2E_STATE_SOURCE != "ws":
+        wake = _tick_scheduler.next_wake([lobby_id]) if E2E_TICK_SYNC else None
+        time.sleep(min(1.0, max(0.0, wake - time.time())) if wake else fallback_sec)
+        return
+    feed = get_state_feed()
+    if tick is None:
+        tick = feed.current_tick(lobby_id)
+    feed.wait_for_tick(lobby_id, tick, timeout=max(1.0, fallback_sec))
+
+
 def get_lobby_state(lobby_id: str):
+    state = read_lobby_state(lobby_id)
+    if state:
+        _tick_scheduler.observe(lobby_id, state)
+    return state
+
+
+def read_lobby_state(lobby_id: str):
+    if E2E_STATE_SOURCE == "ws":
+        feed = get_state_feed()
+        feed.subscribe(lobby_id, wait_sec=E2E_WS_SNAPSHOT_WAIT_SEC)
+        return feed.latest(lobby_id)
+
     api_err = None
     if E2E_STATE_SOURCE in ("api", "auto"):
         try:
@@ -279,13 +628,7 @@ def get_lobby_state(lobby_id: str):
                 raise
 
     if E2E_STATE_SOURCE in ("redis", "auto"):
-        payload = redis_get(f"lobby:{lobby_id}:state")
-        if payload and payload != "(nil)":
-            try:
-                return json.loads(payload)
-            except json.JSONDecodeError:
-                return None
-        return None
+        return redis_lobby_states([lobby_id]).get(lobby_id)
 
     if api_err:
         raise api_err
@@ -297,12 +640,35 @@ def get_lobby_players(lobby_id: str):
     return rows
 
 
+_lobby_listing_lock = threading.Lock()
+_lobby_listing = {"at": 0.0, "by_id": {}}
+
+
+def lobby_listing(max_age_sec=None):
+    """
+    GET /lobbies parsed into {lobby_id: row}, shared by all callers and refetched once it is older
+    than `max_age_sec` (default E2E_LOBBY_LIST_TTL_SEC). One caller fetches while the rest wait for it.
+    """
+    max_age = E2E_LOBBY_LIST_TTL_SEC if max_age_sec is None else max_age_sec
+    with _lobby_listing_lock:
+        if time.time() - _lobby_listing["at"] >= max_age:
+            _status, rows = http_json("GET", "/lobbies")
+            _lobby_listing["by_id"] = {str(row.get("id", "")): row for row in rows or []}
+            _lobby_listing["at"] = time.time()
+        return _lobby_listing["by_id"]
+
+
 def get_lobby_summary(lobby_id: str):
-    _status, rows = http_json("GET", "/lobbies")
-    for row in rows:
-        if str(row.get("id", "")) == lobby_id:
+    watch_code = _lobby_watch_codes.get(lobby_id)
+    if watch_code:
+        try:
+            _status, row = http_json("GET", f"/lobbies/by-watch-code/{watch_code}")
             return row
-    return None
+        except RuntimeError as exc:
+            if "HTTP 404" in str(exc):
+                return None
+            raise
+    return lobby_listing().get(lobby_id)
 
 
 def get_agent_id(api_key: str):
@@ -310,34 +676,72 @@ def get_agent_id(api_key: str):
     return str(me["id"])
 
 
+_game_mode_lock = threading.Lock()
+_game_listing = {"at": 0.0, "rows": []}
+
+
+def game_mode_listing():
+    """GET /games (ACTIVE modes, title order), reused for E2E_GAME_MODE_CACHE_TTL_SEC."""
+    with _game_mode_lock:
+        if not _game_listing["at"] or time.time() - _game_listing["at"] >= E2E_GAME_MODE_CACHE_TTL_SEC:
+            _status, games = http_json("GET", "/games")
+            _game_listing["rows"] = list(games or [])
+            _game_listing["at"] = time.time()
+        return _game_listing["rows"]
+
+
+def get_game_mode_row(game_mode_id: str):
+    for g in game_mode_listing():
+        if str(g.get("id", "")) == game_mode_id:
+            return g
+    return None
+
+
 def get_or_create_game_mode(max_players: int, duration_sec: int, coins_per_match: int, reward_pool_quai=None):
-    if E2E_USE_DB_HELPERS:
-        return create_game_mode(max_players=max_players, duration_sec=duration_sec, coins_per_match=coins_per_match, reward_pool_quai=reward_pool_quai)
+    """
+    Resolve a game mode for these settings. API-only runs pick from the cached /games listing
+    (E2E_GAME_MODE_ID, else by E2E_GAME_MODE title). DB helpers look up a matching mode with no
+    WAITING lobby before inserting one; that check runs on every call, since an earlier join in this
+    run may have left a part-filled lobby behind.
+    """
+    if not E2E_USE_DB_HELPERS and E2E_GAME_MODE_ID:
+        return E2E_GAME_MODE_ID
+    pool = reward_pool_quai if reward_pool_quai is not None else REWARD_POOL
+    if not E2E_USE_DB_HELPERS:
+        return pick_listed_game_mode(max_players, duration_sec, coins_per_match, pool)
+
+    game_mode_id = find_game_mode(max_players, duration_sec, coins_per_match, pool) if E2E_REUSE_GAME_MODES else ""
+    if game_mode_id:
+        log(f"Reusing game mode id={game_mode_id}")
+        return game_mode_id
+    return create_game_mode(max_players=max_players, duration_sec=duration_sec, coins_per_match=coins_per_match, reward_pool_quai=pool)
 
-    desired = E2E_GAME_MODE_ID
-    if desired:
-        return desired
 
-    _status, games = http_json("GET", "/games")
+def pick_listed_game_mode(max_players: int, duration_sec: int, coins_per_match: int, pool) -> str:
+    games = game_mode_listing()
     if not games:
         raise RuntimeError("No active game modes found. Set E2E_GAME_MODE_ID or ensure /games has active modes.")
 
-    target = None
     target_name = E2E_GAME_MODE.lower()
-    for g in games:
-        title = str(g.get("title", ""))
-        if title.lower() == target_name:
-            target = g
-            break
-    if target is None:
-        for g in games:
-            title = str(g.get("title", ""))
-            if target_name and target_name in title.lower():
-                target = g
-                break
-    if target is None:
-        target = games[0]
-    return str(target["id"])
+    exact = [g for g in games if str(g.get("title", "")).lower() == target_name]
+    partial = [g for g in games if target_name and target_name in str(g.get("title", "")).lower()]
+    candidates = exact or partial or games
+    for g in candidates:
+        if (
+            int(g.get("max_players", 0) or 0) == max_players
+            and int(g.get("duration_sec", 0) or 0) == duration_sec
+            and int(g.get("coins_per_match", 0) or 0) == coins_per_match
+            and _same_amount(g.get("reward_pool_quai"), pool)
+        ):
+            return str(g["id"])
+    return str(candidates[0]["id"])
+
+
+def _same_amount(a, b) -> bool:
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return str(a) == str(b)
 
 
 def ensure_lobby_active(game_mode_id: str, lobby_id: str):
@@ -376,6 +780,34 @@ def ensure_lobby_active(game_mode_id: str, lobby_id: str):
     raise RuntimeError(f"Lobby {lobby_id} did not become ACTIVE in time")
 
 
+def find_game_mode(max_players: int, duration_sec: int, coins_per_match: int, pool) -> str:
+    """
+    An ACTIVE 'Coin Runner' mode with these settings and no WAITING or ACTIVE lobby a join could
+    share. On a persistent SQL session the mode is also claimed with a session advisory lock, held
+    until this process exits, so concurrent runs resolving the same settings skip it.
+    """
+    output = run_sql(
+        "SELECT g.id FROM game_modes g "
+        "WHERE g.status = 'ACTIVE' "
+        "AND g.title = 'Coin Runner' "
+        f"AND g.max_players = {max_players} "
+        f"AND g.duration_sec = {duration_sec} "
+        f"AND g.coins_per_match = {coins_per_match} "
+        f"AND g.reward_pool_quai = {pool} "
+        "AND NOT EXISTS (SELECT 1 FROM lobbies l WHERE l.game_mode_id = g.id AND l.status IN ('WAITING', 'ACTIVE')) "
+        "ORDER BY g.id LIMIT 20;"
+    )
+    candidates = UUID_RE.findall(output or "")
+    if not E2E_SQL_PERSISTENT:
+        return candidates[0] if candidates else ""
+    for game_mode_id in candidates:
+        # Re-entrant within one session, so this run can resolve the same mode again.
+        claimed = run_sql(f"SELECT pg_try_advisory_lock(hashtext('{game_mode_id}'));")
+        if claimed.strip() in ("t", "true"):
+            return game_mode_id
+    return ""
+
+
 def create_game_mode(max_players: int, duration_sec: int, coins_per_match: int, reward_pool_quai=None):
     pool = reward_pool_quai if reward_pool_quai is not None else REWARD_POOL
     sql = (
@@ -404,56 +836,94 @@ def create_game_mode(max_players: int, duration_sec: int, coins_per_match: int,
 
 
 _redis_force_docker = REDIS_FORCE_DOCKER
+_redis_client = None
+_redis_state_cache = {}  # lobby_id -> (seq, parsed state)
+
+
+def get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = RedisClient(REDIS_HOST, REDIS_PORT, timeout=2)
+    return _redis_client
 
 
 def redis_get_via_socket(key: str) -> str:
-    with socket.create_connection((REDIS_HOST, REDIS_PORT), timeout=2) as sock:
-        command = f"*2\r\n$3\r\nGET\r\n${len(key)}\r\n{key}\r\n".encode("utf-8")
-        sock.sendall(command)
-        with sock.makefile("rb") as stream:
-            line = stream.readline()
-            if not line:
-                return ""
-            if line == b"$-1\r\n":
-                return ""
-            if line.startswith(b"$"):
-                length = int(line[1:-2])
-                if length <= 0:
-                    return ""
-                data = stream.read(length)
-                stream.read(2)
-                return data.decode("utf-8")
-            if line.startswith(b"-"):
-                raise RuntimeError(f"Redis error: {line[1:].decode('utf-8').strip()}")
-            return ""
+    return get_redis_client().get(key) or ""
 
 
 def redis_get(key: str):
     global _redis_force_docker
     if not _redis_force_docker:
         try:
-            return redis_get_via_socket(key)
+            with _latency.timed("redis", "GET"):
+                return redis_get_via_socket(key)
         except Exception:
             _redis_force_docker = True
 
-    output = run_cmd([
-        "docker",
-        "compose",
-        "exec",
-        "-T",
-        "redis",
-        "redis-cli",
-        "GET",
-        key,
-    ])
+    with _latency.timed("redis", "GET (docker)"):
+        output = run_cmd([
+            "docker",
+            "compose",
+            "exec",
+            "-T",
+            "redis",
+            "redis-cli",
+            "GET",
+            key,
+        ])
     return output
 
 
+def redis_lobby_states(lobby_ids):
+    """
+    {lobby_id: state} for every lobby from one MGET of `lobby:{id}:state` + `lobby:{id}:seq`.
+    A lobby whose seq has not moved since the last read reuses the parsed state.
+    """
+    global _redis_force_docker
+    lobby_ids = list(lobby_ids)
+    snapshots = None
+    if not _redis_force_docker:
+        try:
+            with _latency.timed("redis", "MGET lobby snapshots"):
+                snapshots = get_redis_client().lobby_snapshots(lobby_ids)
+        except Exception:
+            _redis_force_docker = True
+    if snapshots is None:
+        snapshots = {lobby_id: (redis_get(f"lobby:{lobby_id}:state"), None) for lobby_id in lobby_ids}
+
+    states = {}
+    for lobby_id, (payload, seq) in snapshots.items():
+        cached = _redis_state_cache.get(lobby_id)
+        if seq is not None and cached and cached[0] == seq:
+            states[lobby_id] = cached[1]
+            continue
+        state = None
+        if payload and payload != "(nil)":
+            try:
+                state = json.loads(payload)
+            except json.JSONDecodeError:
+                state = None
+        if seq is not None and state is not None:
+            _redis_state_cache[lobby_id] = (seq, state)
+        states[lobby_id] = state
+    return states
+
+
 def get_balance_wei(address: str) -> int:
-    balance_hex = rpc_json("quai_getBalance", [address, "latest"])
-    if not isinstance(balance_hex, str):
-        raise RuntimeError(f"Invalid balance payload: {balance_hex!r}")
-    return int(balance_hex, 16)
+    return get_balances_wei([address])[address]
+
+
+def get_balances_wei(addresses):
+    """{address: balance_wei} for every address in one batch."""
+    addresses = list(dict.fromkeys(addresses))
+    balances = {}
+    for address, balance_hex in zip(addresses, rpc_batch([("quai_getBalance", [a, "latest"]) for a in addresses])):
+        if isinstance(balance_hex, Exception):
+            raise balance_hex
+        if not isinstance(balance_hex, str):
+            raise RuntimeError(f"Invalid balance payload: {balance_hex!r}")
+        balances[address] = int(balance_hex, 16)
+    return balances
 
 
 def quai_str_to_wei(amount: str) -> int:
@@ -484,7 +954,7 @@ def wait_for_state(lobby_id: str):
                 f"Timed out waiting for lobby state after {COIN_WAIT_SEC:.0f}s. "
                 "Is the game server running and lobby active?"
             )
-        time.sleep(0.2)
+        wait_for_next_tick(lobby_id, 0.2, tick=-1)
 
 
 def wait_for_lobby_finish(lobby_id: str):
@@ -492,8 +962,9 @@ def wait_for_lobby_finish(lobby_id: str):
     while time.time() < deadline:
         state = get_lobby_state(lobby_id)
         if state and state.get("status") == "FINISHED":
+            note_lobby_finished(lobby_id)
             return
-        time.sleep(0.5)
+        wait_for_next_tick(lobby_id, 0.5)
     raise RuntimeError(f"Lobby did not finish within {FINISH_WAIT_SEC:.0f}s")
 
 
@@ -519,7 +990,7 @@ def explore_for_coin(lobby_id: str, api_key: str):
                 if latest_state and latest_state.get("status") == "FINISHED":
                     raise RuntimeError("Lobby finished before coin was collected") from exc
             raise
-        time.sleep(0.11)
+        wait_for_next_tick(lobby_id, 0.11)
 
     def refresh():
         state_payload = get_lobby_state(lobby_id)
@@ -593,7 +1064,7 @@ def explore_for_coin(lobby_id: str, api_key: str):
             maybe_refresh(force=True)
             if state.get("coins"):
                 return
-            time.sleep(0.1)
+            wait_for_next_tick(lobby_id, 0.1)
 
     wait_for_coin_state()
 
@@ -645,27 +1116,10 @@ def pick_direction_toward(player, target_x: int, target_y: int):
 
 def assign_coins_to_players(state, agent_ids):
     coins = list(state.get("coins") or [])
-    players = state.get("players") or {}
     if len(coins) < len(agent_ids):
         return {}
-
-    # Greedy assignment by closest coin; fine for 2 players and tends to avoid crossing.
-    remaining = coins[:]
-    assignments = {}
-    for agent_id in agent_ids:
-        p = players[agent_id]
-        best = None
-        best_dist = None
-        for coin in remaining:
-            dist = abs(int(coin["x"]) - int(p["x"])) + abs(int(coin["y"]) - int(p["y"]))
-            if best is None or dist < best_dist:
-                best = coin
-                best_dist = dist
-        if best is None:
-            continue
-        assignments[agent_id] = (int(best["x"]), int(best["y"]), int(best["id"]))
-        remaining = [c for c in remaining if int(c["id"]) != int(best["id"])]
-    return assignments
+    # Minimum total distance; with 2 players this never sends both across each other's path.
+    return assign_coins(state, agent_ids, "optimal")
 
 
 def two_player_collect_one_each(lobby_id: str, agent_ids, api_keys_by_agent):
@@ -686,7 +1140,7 @@ def two_player_collect_one_each(lobby_id: str, agent_ids, api_keys_by_agent):
             state = latest
             if len(state.get("coins") or []) >= len(agent_ids):
                 break
-        time.sleep(0.1)
+        wait_for_next_tick(lobby_id, 0.1)
 
     assignments = assign_coins_to_players(state, agent_ids)
     if not assignments:
@@ -725,7 +1179,7 @@ def two_player_collect_one_each(lobby_id: str, agent_ids, api_keys_by_agent):
             direction = pick_direction_toward(player, tx, ty)
             send_input(lobby_id, api_keys_by_agent[agent_id], f"P{idx+1}", direction)
 
-        time.sleep(0.11)
+        wait_for_next_tick(lobby_id, 0.11)
 
         # Check for score changes.
         latest = get_lobby_state(lobby_id)
@@ -798,7 +1252,7 @@ def two_player_compete_until_finish(lobby_id: str, agent_ids, api_keys_by_agent)
                 direction = pick_direction_toward(player, tx, ty)
             send_input(lobby_id, api_keys_by_agent[agent_id], f"P{idx+1}", direction)
 
-        time.sleep(0.11)
+        wait_for_next_tick(lobby_id, 0.11)
         if time.time() > deadline:
             # If the lobby isn't finishing, surface a useful error.
             ends_at_now = (state.get("ends_at") or "").strip()
@@ -808,17 +1262,77 @@ def two_player_compete_until_finish(lobby_id: str, agent_ids, api_keys_by_agent)
             )
 
 
+def payout_progress(lobby_ids):
+    """
+    Payout row + grouped payout_items counts for many lobbies in one query.
+    Returns {lobby_id: (payout_id, sent, failed, pending, hashed)} for lobbies that have a payout row.
+    """
+    ids = [str(lobby_id).replace("'", "''") for lobby_id in lobby_ids]
+    if not ids:
+        return {}
+    array = ", ".join(f"'{lobby_id}'" for lobby_id in ids)
+    output = run_sql(
+        "SELECT p.lobby_id, p.id, "
+        "COALESCE(SUM(CASE WHEN i.status='SENT' THEN 1 ELSE 0 END), 0)::int AS sent, "
+        "COALESCE(SUM(CASE WHEN i.status='FAILED' THEN 1 ELSE 0 END), 0)::int AS failed, "
+        "COALESCE(SUM(CASE WHEN i.status='PENDING' THEN 1 ELSE 0 END), 0)::int AS pending, "
+        "COALESCE(SUM(CASE WHEN i.tx_hash IS NOT NULL AND i.tx_hash <> '' THEN 1 ELSE 0 END), 0)::int AS hashed "
+        "FROM payouts p LEFT JOIN payout_items i ON i.payout_id = p.id "
+        f"WHERE p.lobby_id = ANY(ARRAY[{array}]::uuid[]) "
+        "GROUP BY p.lobby_id, p.id;"
+    )
+    progress = {}
+    for line in output.splitlines():
+        parts = line.strip().split("|")
+        if len(parts) < 6 or not UUID_RE.search(parts[0]):
+            continue
+        progress[parts[0]] = (parts[1], int(parts[2] or 0), int(parts[3] or 0), int(parts[4] or 0), int(parts[5] or 0))
+    return progress
+
+
+def wait_for_payouts(lobby_ids, expected_coins=None, timeout_sec: float = PAYOUT_WAIT_SEC, poll_sec: float = 0.5):
+    """
+    Batched payout watcher: one payout_progress query per poll for the lobbies still outstanding.
+    A lobby is done once its payout row exists and, when expected_coins[lobby_id] > 0, every item
+    has been attempted (no PENDING left, something SENT/FAILED or hashed).
+    Returns (done, outstanding): {lobby_id: (payout_id, sent, failed)} and the ids still waiting
+    when timeout_sec ran out (timeout_sec=0 polls once).
+    """
+    if not E2E_USE_DB_HELPERS:
+        raise RuntimeError("wait_for_payouts requires E2E_USE_DB_HELPERS=1")
+    expected_coins = expected_coins or {}
+    outstanding = set(lobby_ids)
+    done = {}
+    deadline = time.time() + timeout_sec
+    while outstanding:
+        for lobby_id, (payout_id, sent, failed, pending, hashed) in payout_progress(sorted(outstanding)).items():
+            if lobby_id not in outstanding:
+                continue
+            if int(expected_coins.get(lobby_id, 0) or 0) <= 0:
+                done[lobby_id] = (payout_id, 0, 0)
+            elif pending == 0 and (hashed > 0 or (sent + failed) > 0):
+                done[lobby_id] = (payout_id, sent, failed)
+            else:
+                continue
+            outstanding.discard(lobby_id)
+        if not outstanding or time.time() + poll_sec > deadline:
+            break
+        time.sleep(poll_sec)
+    return done, outstanding
+
+
 def wait_for_payout(lobby_id: str):
     if not E2E_USE_DB_HELPERS:
         raise RuntimeError("wait_for_payout requires E2E_USE_DB_HELPERS=1")
-    deadline = time.time() + PAYOUT_WAIT_SEC
-    while time.time() < deadline:
-        output = run_sql(f"SELECT id FROM payouts WHERE lobby_id = '{lobby_id}'")
-        payout_id = output.strip()
-        if payout_id:
-            return payout_id
-        time.sleep(0.5)
-    raise RuntimeError(f"Payout not created within {PAYOUT_WAIT_SEC:.0f}s")
+    done, _outstanding = wait_for_payouts([lobby_id])
+    if lobby_id not in done:
+        raise RuntimeError(f"Payout not created within {PAYOUT_WAIT_SEC:.0f}s")
+    return done[lobby_id][0]
+
+
+def payout_exec_wait_sec() -> float:
+    return max(PAYOUT_WAIT_SEC, float(os.getenv("E2E_PAYOUT_EXEC_WAIT_SEC", "45")))
+
 
 def wait_for_payout_execution(lobby_id: str, expected_coins: int):
     """
@@ -826,48 +1340,43 @@ def wait_for_payout_execution(lobby_id: str, expected_coins: int):
     at least one tx_hash exists. This matches the "instant payout on finish" behavior via
     the API worker.
     """
-    exec_wait_sec = float(os.getenv("E2E_PAYOUT_EXEC_WAIT_SEC", "45"))
     if not E2E_USE_DB_HELPERS:
         raise RuntimeError("wait_for_payout_execution requires E2E_USE_DB_HELPERS=1")
-    deadline = time.time() + max(PAYOUT_WAIT_SEC, exec_wait_sec)
-    payout_id = wait_for_payout(lobby_id)
+    done, _outstanding = wait_for_payouts([lobby_id], {lobby_id: expected_coins}, timeout_sec=payout_exec_wait_sec())
+    if lobby_id not in done:
+        raise RuntimeError(f"Payout execution did not complete within timeout for lobby {lobby_id}")
+    return done[lobby_id]
 
-    if expected_coins <= 0:
-        return payout_id, 0, 0
 
-    while time.time() < deadline:
-        output = run_sql(
-            "SELECT "
-            "SUM(CASE WHEN status='SENT' THEN 1 ELSE 0 END)::int AS sent, "
-            "SUM(CASE WHEN status='FAILED' THEN 1 ELSE 0 END)::int AS failed, "
-            "SUM(CASE WHEN status='PENDING' THEN 1 ELSE 0 END)::int AS pending, "
-            "SUM(CASE WHEN tx_hash IS NOT NULL AND tx_hash <> '' THEN 1 ELSE 0 END)::int AS hashed "
-            f"FROM payout_items WHERE payout_id = '{payout_id}';"
-        )
-        line = output.strip()
-        if line:
-            parts = line.split("|")
-            if len(parts) >= 4:
-                sent = int(parts[0] or 0)
-                failed = int(parts[1] or 0)
-                pending = int(parts[2] or 0)
-                hashed = int(parts[3] or 0)
-                # Consider execution "done" once all items have been attempted (no PENDING left).
-                if pending == 0 and (hashed > 0 or (sent + failed) > 0):
-                    return payout_id, sent, failed
-        time.sleep(1.0)
-
-    raise RuntimeError(f"Payout execution did not complete within timeout for lobby {lobby_id}")
+def wait_for_tx_receipt(tx_hash: str):
+    return wait_for_tx_receipts([tx_hash])[tx_hash]
 
 
-def wait_for_tx_receipt(tx_hash: str):
+def rpc_backoff():
+    """Poll intervals for RPC waits: RPC_POLL_MIN_SEC doubling up to RPC_POLL_MAX_SEC."""
+    interval = max(0.05, RPC_POLL_MIN_SEC)
+    while True:
+        yield interval
+        interval = min(max(RPC_POLL_MAX_SEC, RPC_POLL_MIN_SEC), interval * 2)
+
+
+def wait_for_tx_receipts(tx_hashes):
+    """Poll every still-pending receipt in one JSON-RPC batch per interval; returns {tx_hash: receipt}."""
+    pending = list(dict.fromkeys(tx_hashes))
+    receipts = {}
     deadline = time.time() + TX_WAIT_SEC
-    while time.time() < deadline:
-        receipt = rpc_json("quai_getTransactionReceipt", [tx_hash])
-        if receipt:
-            return receipt
-        time.sleep(2)
-    raise RuntimeError(f"Transaction {tx_hash} not confirmed within {TX_WAIT_SEC:.0f}s")
+    for interval in rpc_backoff():
+        results = rpc_batch([("quai_getTransactionReceipt", [h]) for h in pending])
+        for h, receipt in zip(list(pending), results):
+            if receipt and not isinstance(receipt, Exception):
+                receipts[h] = receipt
+                pending.remove(h)
+        if not pending:
+            return receipts
+        if time.time() + interval > deadline:
+            break
+        time.sleep(interval)
+    raise RuntimeError(f"Transaction {pending[0]} not confirmed within {TX_WAIT_SEC:.0f}s ({len(pending)} pending)")
 
 
 def execute_and_verify_payout(lobby_id: str, include_second_wallet: bool):
@@ -882,8 +1391,10 @@ def execute_and_verify_payout(lobby_id: str, include_second_wallet: bool):
     else:
         log(f"Executing payout for lobby {lobby_id} (DB helpers disabled)...")
 
-    before_1 = get_balance_wei(AGENT_PAYOUT_ADDRESS)
-    before_2 = get_balance_wei(AGENT2_PAYOUT_ADDRESS) if include_second_wallet else None
+    wallets = [AGENT_PAYOUT_ADDRESS, AGENT2_PAYOUT_ADDRESS] if include_second_wallet else [AGENT_PAYOUT_ADDRESS]
+    before = get_balances_wei(wallets)
+    before_1 = before[AGENT_PAYOUT_ADDRESS]
+    before_2 = before.get(AGENT2_PAYOUT_ADDRESS) if include_second_wallet else None
     _, execute = http_json("POST", "/payouts/execute", body={"lobby_id": lobby_id})
     sent = int(execute.get("sent", 0)) if isinstance(execute, dict) else 0
     failed = int(execute.get("failed", 0)) if isinstance(execute, dict) else 0
@@ -907,7 +1418,9 @@ def execute_and_verify_payout(lobby_id: str, include_second_wallet: bool):
 
     for h in tx_hashes:
         log(f"Waiting for tx confirmation... {h}")
-        receipt = wait_for_tx_receipt(h)
+    receipts = wait_for_tx_receipts(tx_hashes)
+    for h in tx_hashes:
+        receipt = receipts[h]
         status = receipt.get("status") if isinstance(receipt, dict) else None
         if status not in ("0x1", "0x01", 1, True):
             raise RuntimeError(f"Transaction failed (status={status})")
@@ -925,14 +1438,16 @@ def execute_and_verify_payout(lobby_id: str, include_second_wallet: bool):
 
     log("Waiting for balance update...")
     deadline = time.time() + BALANCE_WAIT_SEC
+    backoff = rpc_backoff()
     while time.time() < deadline:
-        after_1 = get_balance_wei(AGENT_PAYOUT_ADDRESS)
+        after = get_balances_wei(wallets)
+        after_1 = after[AGENT_PAYOUT_ADDRESS]
         ok_1 = after_1 - before_1 >= expected.get(AGENT_PAYOUT_ADDRESS.lower(), 1)
 
         ok_2 = True
         after_2 = None
         if include_second_wallet and before_2 is not None:
-            after_2 = get_balance_wei(AGENT2_PAYOUT_ADDRESS)
+            after_2 = after[AGENT2_PAYOUT_ADDRESS]
             ok_2 = after_2 - before_2 >= expected.get(AGENT2_PAYOUT_ADDRESS.lower(), 1)
 
         if ok_1 and ok_2:
@@ -945,7 +1460,7 @@ def execute_and_verify_payout(lobby_id: str, include_second_wallet: bool):
             else:
                 log(f"Balance increased: {wei_to_quai(before_1)} -> {wei_to_quai(after_1)}")
             return
-        time.sleep(2)
+        time.sleep(min(next(backoff), max(0.0, deadline - time.time())))
 
     raise RuntimeError(f"Balance did not increase within {BALANCE_WAIT_SEC:.0f}s")
 
@@ -971,6 +1486,44 @@ def scale_scenario():
     scale_execute_payouts = os.getenv("E2E_SCALE_EXECUTE_PAYOUTS", "0") == "1"
     scale_input_every_ticks = int(os.getenv("E2E_SCALE_INPUT_EVERY_TICKS", "1"))
     scale_runners_per_lobby = int(os.getenv("E2E_SCALE_RUNNERS_PER_LOBBY", str(scale_players_per_lobby)))
+    # How many registered-but-unjoined agents the background producer may keep ready.
+    scale_cred_pool_size = int(os.getenv("E2E_SCALE_CRED_POOL_SIZE", "32"))
+    # "sync" drives lobbies serially from the join loop; "async" runs one asyncio task per lobby.
+    scale_engine = os.getenv("E2E_SCALE_ENGINE", "sync").strip().lower()
+    scale_async_concurrency = int(os.getenv("E2E_SCALE_ASYNC_CONCURRENCY", "64"))
+    scale_async_poll_sec = float(os.getenv("E2E_SCALE_ASYNC_POLL_SEC", "0"))  # 0 => half a server tick
+    if scale_engine not in ("sync", "async"):
+        raise RuntimeError(f"E2E_SCALE_ENGINE must be 'sync' or 'async', got {scale_engine!r}")
+    # "greedy" takes the closest free (runner, coin) pair first; "optimal" minimizes total distance.
+    scale_assign_method = os.getenv("E2E_SCALE_ASSIGN", "greedy").strip().lower()
+    if scale_assign_method not in ASSIGN_SOLVERS:
+        raise RuntimeError(f"E2E_SCALE_ASSIGN must be one of {sorted(ASSIGN_SOLVERS)}, got {scale_assign_method!r}")
+    # "cooperative" plans all runners of a lobby together around each other's paths; "greedy" is the
+    # one-step heuristic that only avoids currently occupied tiles.
+    scale_planner = os.getenv("E2E_SCALE_PLANNER", "cooperative").strip().lower()
+    if scale_planner not in ("cooperative", "greedy"):
+        raise RuntimeError(f"E2E_SCALE_PLANNER must be 'cooperative' or 'greedy', got {scale_planner!r}")
+    # Open loop: > 0 sends runner inputs on a fixed schedule at this many inputs/sec (round-robin over
+    # every runner with a planned move), whether or not earlier requests have answered. The rate can
+    # ramp from E2E_SCALE_RAMP_START_RPS ("step" or "linear" over E2E_SCALE_RAMP_SEC).
+    scale_target_rps = float(os.getenv("E2E_SCALE_TARGET_RPS", "0"))
+    scale_ramp = os.getenv("E2E_SCALE_RAMP", "none").strip().lower()
+    scale_ramp_start_rps = float(os.getenv("E2E_SCALE_RAMP_START_RPS", "0"))
+    scale_ramp_sec = float(os.getenv("E2E_SCALE_RAMP_SEC", "60"))
+    scale_ramp_steps = int(os.getenv("E2E_SCALE_RAMP_STEPS", "5"))
+    scale_open_window_sec = float(os.getenv("E2E_SCALE_OPEN_WINDOW_SEC", "5"))
+    open_loop = scale_target_rps > 0
+    if scale_ramp not in RAMPS:
+        raise RuntimeError(f"E2E_SCALE_RAMP must be one of {list(RAMPS)}, got {scale_ramp!r}")
+    if open_loop and scale_engine != "async":
+        raise RuntimeError("E2E_SCALE_TARGET_RPS requires E2E_SCALE_ENGINE=async")
+    # "paced" spreads joins over E2E_SCALE_FILL_SECONDS; "storm" registers everyone, then fires all
+    # joins at once (E2E_SCALE_JOIN_CONCURRENCY threads, 0 => one per agent) and verifies allocation.
+    scale_join_mode = os.getenv("E2E_SCALE_JOIN_MODE", "paced").strip().lower()
+    scale_join_concurrency = int(os.getenv("E2E_SCALE_JOIN_CONCURRENCY", "0"))
+    scale_join_retries = int(os.getenv("E2E_SCALE_JOIN_RETRIES", "3"))
+    if scale_join_mode not in ("paced", "storm"):
+        raise RuntimeError(f"E2E_SCALE_JOIN_MODE must be 'paced' or 'storm', got {scale_join_mode!r}")
 
     # Optional alias: E2E_AGENT_AMOUNT as TOTAL agents in scale mode.
     # If provided, derive lobby count from agents_per_lobby.
@@ -981,18 +1534,14 @@ def scale_scenario():
             raise RuntimeError("E2E_AGENT_AMOUNT must be > 0")
         scale_lobbies = max(1, math.ceil(total / max(1, scale_players_per_lobby)))
 
-    if E2E_USE_DB_HELPERS:
-        log(
-            "Creating scale game mode... "
-            f"max_players={scale_players_per_lobby} duration={scale_duration_sec}s "
-            f"coins={scale_coins_per_match} reward_pool_quai={scale_reward_pool_quai}"
-        )
-        game_mode_id = create_game_mode(
-            max_players=scale_players_per_lobby,
-            duration_sec=scale_duration_sec,
-            coins_per_match=scale_coins_per_match,
-            reward_pool_quai=scale_reward_pool_quai,
-        )
+    log(
+        "Resolving scale game mode... "
+        f"max_players={scale_players_per_lobby} duration={scale_duration_sec}s "
+        f"coins={scale_coins_per_match} reward_pool_quai={scale_reward_pool_quai}"
+    )
+    if E2E_SCALE_WORKER_INDEX >= 0 and E2E_GAME_MODE_ID:
+        # Resolved once by the coordinator so every worker fills the same mode.
+        game_mode_id = E2E_GAME_MODE_ID
     else:
         game_mode_id = get_or_create_game_mode(
             max_players=scale_players_per_lobby,
@@ -1000,12 +1549,8 @@ def scale_scenario():
             coins_per_match=scale_coins_per_match,
             reward_pool_quai=scale_reward_pool_quai,
         )
-        _status, games = http_json("GET", "/games")
-        selected = None
-        for g in games:
-            if str(g.get("id", "")) == game_mode_id:
-                selected = g
-                break
+    if not E2E_USE_DB_HELPERS:
+        selected = get_game_mode_row(game_mode_id)
         if selected is None:
             raise RuntimeError(
                 f"Scale API-only mode could not resolve active game mode id={game_mode_id}. "
@@ -1054,6 +1599,9 @@ def scale_scenario():
 
     total_agents = scale_lobbies * scale_players_per_lobby
     join_interval = scale_fill_seconds / max(1, total_agents)
+    # As a coordinator's worker, only this slice of the lobbies is ours. Workers share the fill window
+    # (so the overall join rate is unchanged) and may land agents in the same lobbies.
+    sharded = E2E_SCALE_WORKER_INDEX >= 0
 
     log(
         "Scale config: "
@@ -1061,7 +1609,11 @@ def scale_scenario():
         f"fill_seconds={scale_fill_seconds:.0f} join_interval={join_interval:.2f}s "
         f"duration_sec={scale_duration_sec} coins_per_match={scale_coins_per_match} "
         f"reward_pool_quai={scale_reward_pool_quai} execute_payouts={int(scale_execute_payouts)} "
-        f"db_helpers={int(E2E_USE_DB_HELPERS)} input_every_ticks={scale_input_every_ticks}"
+        f"db_helpers={int(E2E_USE_DB_HELPERS)} input_every_ticks={scale_input_every_ticks} "
+        f"cred_pool={scale_cred_pool_size} engine={scale_engine} assign={scale_assign_method} planner={scale_planner}"
+        + (f" worker={E2E_SCALE_WORKER_INDEX}/{E2E_SCALE_WORKER_COUNT}" if sharded else "")
+        + (f" target_rps={scale_target_rps:g} ramp={scale_ramp}" if open_loop else "")
+        + (f" join_mode=storm join_concurrency={scale_join_concurrency or total_agents}" if scale_join_mode == "storm" else "")
     )
     log(
         "Scale payout wallets: "
@@ -1073,63 +1625,42 @@ def scale_scenario():
         log("Scale payouts: DRY RUN (no on-chain tx). Set E2E_SCALE_EXECUTE_PAYOUTS=1 to send transactions.")
 
     lobbies = {}
+    # lobby_id -> (expected_coins, deadline) for lobbies whose payout the API worker should execute.
+    payout_watch = {}
+    # Guards lobby records when the async engine thread and the join loop touch them together.
+    lobbies_lock = threading.RLock()
+    async_engine_stats = {}
+    # Cooperative planner totals (updated under lobbies_lock, which plan_lobby_inputs runs under).
+    planner_stats = {"plans": 0, "waits": 0, "expansions": 0}
+    # lobby_id -> coins collected, from the lobby's final results.
+    lobby_coins = {}
+    # Send -> visible-in-state latency of every runner input.
+    input_effects = InputEffectTracker()
+    # Open loop: lobby_id -> {agent_id: (api_key, direction, tick, px, py)} from the latest plan.
+    open_plans = {}
+    open_queue = []
+    open_stats = OpenLoopStats(scale_open_window_sec)
 
-    def assign_coins_to_players_any(state, agent_ids):
-        coins = list(state.get("coins") or [])
-        players = state.get("players") or {}
-        if not coins or not agent_ids:
-            return {}
+    def ensure_lobby_record(lobby_id: str, watch_code: str, status: str):
+        with lobbies_lock:
+            record = lobbies.get(lobby_id)
+            if record is None:
+                record = lobbies[lobby_id] = LobbyRecord(lobby_id, watch_code, status)
+            else:
+                record.watch_code = watch_code or record.watch_code
+                record.status = status or record.status
+            return record
 
-        pairs = []
-        for aid in agent_ids:
-            p = players.get(aid)
-            if not p:
-                continue
-            for coin in coins:
-                try:
-                    cx = int(coin["x"]); cy = int(coin["y"]); cid = int(coin["id"])
-                except Exception:
-                    continue
-                dist = abs(cx - int(p["x"])) + abs(cy - int(p["y"]))
-                pairs.append((dist, aid, cx, cy, cid))
-        pairs.sort(key=lambda t: t[0])
-
-        assigned_agents = set()
-        assigned_coins = set()
-        assignments = {}
-        for _dist, aid, cx, cy, cid in pairs:
-            if aid in assigned_agents or cid in assigned_coins:
+    def apply_agent_id_mapping(record, rows):
+        slot_to_agent_id = {}
+        for row in rows:
+            try:
+                slot_to_agent_id[int(row["slot"])] = str(row["agent_id"])
+            except Exception:
                 continue
-            assignments[aid] = (cx, cy, cid)
-            assigned_agents.add(aid)
-            assigned_coins.add(cid)
-            if len(assigned_coins) >= len(coins):
-                break
-        return assignments
-
-    def ensure_lobby_record(lobby_id: str, watch_code: str, status: str):
-        if lobby_id not in lobbies:
-            lobbies[lobby_id] = {
-                "lobby_id": lobby_id,
-                "watch_code": watch_code,
-                "status": status,
-                "slot_to_api_key": {},
-                "agent_id_to_api_key": {},
-                "runners": [],
-                "slot_to_agent_id": {},
-                "targets": {},  # agent_id -> coin_id
-                "last_tick_sent": {},
-                "last_pos": {},  # agent_id -> (x,y)
-                "last_move_tick": {},  # agent_id -> tick we last sent an input for
-                "blocked_count": {},  # agent_id -> consecutive blocked moves
-                "finished": False,
-                "payout_checked": False,
-                "payout_executed": False,
-            }
-        else:
-            lobbies[lobby_id]["watch_code"] = watch_code or lobbies[lobby_id]["watch_code"]
-            lobbies[lobby_id]["status"] = status or lobbies[lobby_id]["status"]
-        return lobbies[lobby_id]
+        # Keep runners in sync as the lobby fills (otherwise we might lock in at 1 runner).
+        record.apply_slots(slot_to_agent_id, scale_runners_per_lobby)
+        record.last_map_refresh_at = time.time()
 
     def refresh_agent_id_mapping(lobby_id: str):
         record = lobbies.get(lobby_id)
@@ -1139,224 +1670,438 @@ def scale_scenario():
             _status, rows = http_json("GET", f"/lobbies/{lobby_id}/players")
         except Exception:
             return
+        with lobbies_lock:
+            apply_agent_id_mapping(record, rows)
+
+    def agent_id_mapping_stale(record) -> bool:
+        # Refresh mapping periodically and while the lobby is still filling.
+        expected_runners = min(scale_runners_per_lobby, len(record.slot_to_api_key))
+        return (
+            time.time() - record.last_map_refresh_at > 2.0
+            or len(record.runners) < expected_runners
+            or record.keyed_agents() < len(record.slot_to_api_key)
+        )
 
-        slot_to_agent_id = {}
-        for row in rows:
-            try:
-                slot_to_agent_id[int(row["slot"])] = str(row["agent_id"])
-            except Exception:
+    def observe_lobby_status(record, state) -> bool:
+        """Track status from a fetched state; returns True when the lobby should be driven."""
+        status = state.get("status")
+        record.status = status
+        if status == "FINISHED":
+            record.finished = True
+            return False
+        return status == "ACTIVE"
+
+    def plan_lobby_inputs(lobby_id: str, record, state):
+        """
+        Decide this tick's direction for every runner that is due an input.
+        Returns (tick, [(agent_id, api_key, direction, px, py), ...]); the caller sends them and
+        reports successes back through mark_input_sent. A runner is planned at most once per tick:
+        a later pass on the same tick would plan it against stale positions and reservations.
+        """
+        runners = record.runners
+        tick = int(state.get("tick", 0) or 0)
+        if not runners:
+            return tick, []
+
+        def due(runner):
+            return runner.last_tick_planned != tick and tick - runner.last_tick_sent >= scale_input_every_ticks
+
+        view = record.view
+        if view is None:
+            view = record.view = LobbyView()
+        if view.update(state):
+            input_effects.observe(lobby_id, view.tick, view.positions, time.time())
+        elif not any(due(runner) for runner in runners):
+            return tick, []
+
+        assignments = view.assignments(record.runner_ids, scale_assign_method)
+        positions = view.positions
+        occupied = view.occupied
+        coin_by_id = view.coins
+        width = view.width
+        height = view.height
+
+        def next_xy(px: int, py: int, direction: str):
+            if direction == "left":
+                return max(0, px - 1), py
+            if direction == "right":
+                return min(width - 1, px + 1), py
+            if direction == "up":
+                return px, max(0, py - 1)
+            if direction == "down":
+                return px, min(height - 1, py + 1)
+            return px, py
+
+        def choose_direction(px: int, py: int, tx: int, ty: int, prefer_shuffle: bool):
+            dx = tx - px
+            dy = ty - py
+            primary = []
+            if abs(dx) >= abs(dy):
+                if dx > 0: primary.append("right")
+                elif dx < 0: primary.append("left")
+                if dy > 0: primary.append("down")
+                elif dy < 0: primary.append("up")
+            else:
+                if dy > 0: primary.append("down")
+                elif dy < 0: primary.append("up")
+                if dx > 0: primary.append("right")
+                elif dx < 0: primary.append("left")
+            for d in ["up", "down", "left", "right"]:
+                if d not in primary:
+                    primary.append(d)
+            if prefer_shuffle:
+                import random
+                head = primary[:2]
+                tail = primary[2:]
+                random.shuffle(tail)
+                primary = head + tail
+            # Avoid moving into currently occupied tiles when possible.
+            for d in primary:
+                nx, ny = next_xy(px, py, d)
+                if (nx, ny) not in occupied:
+                    return d
+            return primary[0] if primary else "up"
+
+        goals = []
+        for runner in runners:
+            agent_id = runner.agent_id
+            api_key = runner.api_key
+            if not api_key or not due(runner):
+                continue
+            pos = positions.get(agent_id)
+            if not pos:
                 continue
 
-        record["slot_to_agent_id"] = slot_to_agent_id
-        agent_id_to_slot = {}
-        for slot, agent_id in slot_to_agent_id.items():
-            agent_id_to_slot[agent_id] = slot
-        record["agent_id_to_slot"] = agent_id_to_slot
-        for slot, agent_id in slot_to_agent_id.items():
-            api_key = record["slot_to_api_key"].get(slot)
-            if api_key:
-                record["agent_id_to_api_key"][agent_id] = api_key
+            # Detect "blocked" behavior: we sent an input on a previous tick, but position didn't change.
+            px, py = pos
+            last_move_tick = runner.last_move_tick
+            blocked = runner.last_pos == pos and tick > last_move_tick and last_move_tick >= 0
+            if blocked:
+                runner.blocked_count += 1
+            else:
+                runner.blocked_count = 0
 
-        # Keep runners in sync as the lobby fills (otherwise we might lock in at 1 runner).
-        runner_slots = sorted(record["slot_to_api_key"].keys())[:max(1, scale_runners_per_lobby)]
-        record["runners"] = [slot_to_agent_id.get(s) for s in runner_slots if slot_to_agent_id.get(s)]
-        record["last_map_refresh_at"] = time.time()
+            # Prefer assigned coin; else keep a stable target coin; else drift toward a unique center offset.
+            goal = None
+            if agent_id in assignments:
+                tx, ty, cid = assignments[agent_id]
+                runner.target = cid
+                goal = (tx, ty)
+            else:
+                target_id = runner.target
+                if target_id in coin_by_id:
+                    tx, ty = coin_by_id[target_id]
+                    goal = (tx, ty)
+                elif coin_by_id:
+                    # Pick the nearest coin to look intelligent even when we couldn't uniquely assign.
+                    best = None
+                    best_dist = None
+                    for cid, (cx, cy) in coin_by_id.items():
+                        dist = abs(cx - px) + abs(cy - py)
+                        if best is None or dist < best_dist:
+                            best = (cx, cy, cid)
+                            best_dist = dist
+                    if best:
+                        tx, ty, cid = best
+                        runner.target = cid
+                        goal = (tx, ty)
+
+            if goal is None:
+                # No coins to chase: sweep a per-slot slice of the grid to look "smart" and increase coverage.
+                slot = runner.slot
+                slices = max(1, scale_players_per_lobby)
+                slice_start = (slot * width) // slices
+                slice_end = ((slot + 1) * width) // slices - 1
+                if slice_end < slice_start:
+                    slice_end = slice_start
+
+                # Keep the agent inside its slice.
+                if px < slice_start:
+                    goal = (slice_start, py)
+                elif px > slice_end:
+                    goal = (slice_end, py)
+                else:
+                    # Serpentine sweep: move horizontally within slice; when hitting an edge, step vertically.
+                    hdir = runner.patrol_hdir
+                    vdir = runner.patrol_vdir
+                    if hdir not in (-1, 1):
+                        hdir = 1 if (slot % 2 == 0) else -1
+                    if vdir not in (-1, 1):
+                        vdir = 1
+
+                    next_x = px + hdir
+                    if next_x < slice_start or next_x > slice_end:
+                        # Flip horizontal direction and advance vertically.
+                        hdir = -hdir
+                        next_y = py + vdir
+                        if next_y < 0 or next_y >= height:
+                            vdir = -vdir
+                            next_y = py + vdir
+                            if next_y < 0 or next_y >= height:
+                                next_y = py
+                        goal = (px, next_y)
+                    else:
+                        goal = (next_x, py)
+
+                    runner.patrol_hdir = hdir
+                    runner.patrol_vdir = vdir
+
+            goals.append((agent_id, api_key, pos, goal, blocked))
+
+        planned = []
+        if scale_planner == "cooperative":
+            # Runners closest to their goal go first; inputs are sent in this same order.
+            goals.sort(key=lambda g: abs(g[3][0] - g[2][0]) + abs(g[3][1] - g[2][1]))
+            planner = CooperativePlanner(
+                width,
+                height,
+                positions,
+                [g[0] for g in goals],
+                ordered=scale_engine == "sync",
+            )
+            for agent_id, api_key, (px, py), goal, _blocked in goals:
+                direction = planner.plan(agent_id, goal)
+                # A hold counts as this tick's plan too: re-planning it on a later pass would ignore
+                # the cells the other runners reserved.
+                record.agents[agent_id].last_tick_planned = tick
+                if direction is None:
+                    # Holding still this tick; any input would just bounce off another runner.
+                    continue
+                planned.append((agent_id, api_key, direction, px, py))
+            planner_stats["plans"] += len(goals)
+            planner_stats["waits"] += planner.waits
+            planner_stats["expansions"] += planner.expansions
+        else:
+            for agent_id, api_key, (px, py), (tx, ty), blocked in goals:
+                direction = choose_direction(px, py, tx, ty, prefer_shuffle=blocked)
+                record.agents[agent_id].last_tick_planned = tick
+                planned.append((agent_id, api_key, direction, px, py))
+        return tick, planned
+
+    def mark_input_sent(record, agent_id: str, tick: int, px: int, py: int, sent_at: float):
+        runner = record.agents.get(agent_id)
+        if runner is None:
+            return
+        input_effects.sent(record.lobby_id, agent_id, tick, (px, py), sent_at)
+        runner.last_tick_sent = tick
+        runner.last_move_tick = tick
+        runner.last_pos = (px, py)
 
     def drive_active_lobbies():
-        for lobby_id, record in lobbies.items():
-            if record.get("finished"):
-                continue
-            state = get_lobby_state(lobby_id)
+        pending = []
+        active = [(lobby_id, record) for lobby_id, record in list(lobbies.items()) if not record.finished]
+        prefetched = {}
+        if E2E_STATE_SOURCE == "redis" and active:
+            # Every lobby's state in one round trip instead of a GET per lobby.
+            prefetched = redis_lobby_states([lobby_id for lobby_id, _record in active])
+        for lobby_id, record in active:
+            if lobby_id in prefetched:
+                state = prefetched[lobby_id]
+                if state:
+                    _tick_scheduler.observe(lobby_id, state)
+            else:
+                state = get_lobby_state(lobby_id)
             if not state:
                 continue
-
-            status = state.get("status")
-            record["status"] = status
-            if status == "FINISHED":
-                record["finished"] = True
-                continue
-            if status != "ACTIVE":
+            if not observe_lobby_status(record, state):
                 continue
-
-            # Refresh mapping periodically and while the lobby is still filling.
-            expected_runners = min(scale_runners_per_lobby, len(record.get("slot_to_api_key") or {}))
-            if (
-                time.time() - float(record.get("last_map_refresh_at") or 0) > 2.0
-                or len(record.get("runners") or []) < expected_runners
-                or len(record.get("agent_id_to_api_key") or {}) < len(record.get("slot_to_api_key") or {})
-            ):
+            if agent_id_mapping_stale(record):
                 refresh_agent_id_mapping(lobby_id)
-            runners = list(record.get("runners") or [])
-            if not runners:
-                continue
-
-            tick = int(state.get("tick", 0) or 0)
-            assignments = assign_coins_to_players_any(state, runners)
-            players = state.get("players") or {}
-            coins = list(state.get("coins") or [])
-            occupied = set()
-            for _aid, p in players.items():
-                try:
-                    occupied.add((int(p["x"]), int(p["y"])))
-                except Exception:
-                    continue
-            coin_by_id = {}
-            for coin in coins:
-                try:
-                    coin_by_id[int(coin["id"])] = (int(coin["x"]), int(coin["y"]))
-                except Exception:
-                    continue
-            width = int(state.get("width", 1) or 1)
-            height = int(state.get("height", 1) or 1)
-
-            def next_xy(px: int, py: int, direction: str):
-                if direction == "left":
-                    return max(0, px - 1), py
-                if direction == "right":
-                    return min(width - 1, px + 1), py
-                if direction == "up":
-                    return px, max(0, py - 1)
-                if direction == "down":
-                    return px, min(height - 1, py + 1)
-                return px, py
-
-            def choose_direction(player, tx: int, ty: int, prefer_shuffle: bool):
-                px = int(player["x"]); py = int(player["y"])
-                dx = tx - px
-                dy = ty - py
-                primary = []
-                if abs(dx) >= abs(dy):
-                    if dx > 0: primary.append("right")
-                    elif dx < 0: primary.append("left")
-                    if dy > 0: primary.append("down")
-                    elif dy < 0: primary.append("up")
-                else:
-                    if dy > 0: primary.append("down")
-                    elif dy < 0: primary.append("up")
-                    if dx > 0: primary.append("right")
-                    elif dx < 0: primary.append("left")
-                for d in ["up", "down", "left", "right"]:
-                    if d not in primary:
-                        primary.append(d)
-                if prefer_shuffle:
-                    import random
-                    head = primary[:2]
-                    tail = primary[2:]
-                    random.shuffle(tail)
-                    primary = head + tail
-                # Avoid moving into currently occupied tiles when possible.
-                for d in primary:
-                    nx, ny = next_xy(px, py, d)
-                    if (nx, ny) not in occupied:
-                        return d
-                return primary[0] if primary else "up"
-
-            for agent_id in runners:
-                api_key = record["agent_id_to_api_key"].get(agent_id)
-                if not api_key:
-                    continue
-                last_sent = int(record["last_tick_sent"].get(agent_id, -999999))
-                if tick - last_sent < scale_input_every_ticks:
-                    continue
-                player = players.get(agent_id)
-                if not player:
-                    continue
-
-                # Detect "blocked" behavior: we sent an input on a previous tick, but position didn't change.
-                px = int(player["x"]); py = int(player["y"])
-                prev_pos = record.get("last_pos", {}).get(agent_id)
-                last_move_tick = int(record.get("last_move_tick", {}).get(agent_id, -999999))
-                blocked = bool(prev_pos == (px, py) and tick > last_move_tick and last_move_tick >= 0)
-                if blocked:
-                    record["blocked_count"][agent_id] = int(record["blocked_count"].get(agent_id, 0)) + 1
-                else:
-                    record["blocked_count"][agent_id] = 0
-
-                # Prefer assigned coin; else keep a stable target coin; else drift toward a unique center offset.
-                direction = None
-                if agent_id in assignments:
-                    tx, ty, cid = assignments[agent_id]
-                    record["targets"][agent_id] = cid
-                    direction = choose_direction(player, tx, ty, prefer_shuffle=blocked)
-                else:
-                    target_id = record["targets"].get(agent_id)
-                    if target_id in coin_by_id:
-                        tx, ty = coin_by_id[target_id]
-                        direction = choose_direction(player, tx, ty, prefer_shuffle=blocked)
-                    elif coins:
-                        # Pick the nearest coin to look intelligent even when we couldn't uniquely assign.
-                        best = None
-                        best_dist = None
-                        for coin in coins:
-                            try:
-                                cx = int(coin["x"]); cy = int(coin["y"]); cid = int(coin["id"])
-                            except Exception:
-                                continue
-                            dist = abs(cx - int(player["x"])) + abs(cy - int(player["y"]))
-                            if best is None or dist < best_dist:
-                                best = (cx, cy, cid)
-                                best_dist = dist
-                        if best:
-                            tx, ty, cid = best
-                            record["targets"][agent_id] = cid
-                            direction = choose_direction(player, tx, ty, prefer_shuffle=blocked)
 
-                if direction is None:
-                    # No coins to chase: sweep a per-slot slice of the grid to look "smart" and increase coverage.
-                    slot = int((record.get("agent_id_to_slot") or {}).get(agent_id, 0))
-                    slices = max(1, scale_players_per_lobby)
-                    slice_start = (slot * width) // slices
-                    slice_end = ((slot + 1) * width) // slices - 1
-                    if slice_end < slice_start:
-                        slice_end = slice_start
-
-                    # Keep the agent inside its slice.
-                    if int(player["x"]) < slice_start:
-                        direction = choose_direction(player, slice_start, int(player["y"]), prefer_shuffle=blocked)
-                    elif int(player["x"]) > slice_end:
-                        direction = choose_direction(player, slice_end, int(player["y"]), prefer_shuffle=blocked)
-                    else:
-                        # Serpentine sweep: move horizontally within slice; when hitting an edge, step vertically.
-                        hdir = record.setdefault("patrol_hdir", {}).get(agent_id)
-                        vdir = record.setdefault("patrol_vdir", {}).get(agent_id)
-                        if hdir not in (-1, 1):
-                            hdir = 1 if (slot % 2 == 0) else -1
-                        if vdir not in (-1, 1):
-                            vdir = 1
-
-                        next_x = int(player["x"]) + int(hdir)
-                        if next_x < slice_start or next_x > slice_end:
-                            # Flip horizontal direction and advance vertically.
-                            hdir = -int(hdir)
-                            next_y = int(player["y"]) + int(vdir)
-                            if next_y < 0 or next_y >= height:
-                                vdir = -int(vdir)
-                                next_y = int(player["y"]) + int(vdir)
-                                if next_y < 0 or next_y >= height:
-                                    next_y = int(player["y"])
-                            direction = choose_direction(player, int(player["x"]), next_y, prefer_shuffle=blocked)
-                        else:
-                            direction = choose_direction(player, next_x, int(player["y"]), prefer_shuffle=blocked)
-
-                        record["patrol_hdir"][agent_id] = int(hdir)
-                        record["patrol_vdir"][agent_id] = int(vdir)
+            with lobbies_lock:
+                tick, planned = plan_lobby_inputs(lobby_id, record, state)
+            target, fire_at = _tick_scheduler.plan(lobby_id, tick)
+            for item in planned:
+                pending.append((fire_at, lobby_id, record, tick, target, item))
+
+        # Fire in deadline order across lobbies; without E2E_TICK_SYNC fire_at is the plan time.
+        pending.sort(key=lambda entry: entry[0])
+        fire_times = _tick_scheduler.stagger([entry[0] for entry in pending])
+        for fire_at, (_due, lobby_id, record, tick, target, item) in zip(fire_times, pending):
+            agent_id, api_key, direction, px, py = item
+            if not _tick_scheduler.claim(lobby_id, agent_id, target):
+                continue
+            delay = fire_at - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.time()
+            try:
+                http_json(
+                    "POST",
+                    f"/lobbies/{lobby_id}/input",
+                    body={"direction": direction},
+                    headers={"x-api-key": api_key},
+                )
+            except Exception:
+                continue
+            _tick_scheduler.record(lobby_id, agent_id, target, started, time.time())
+            with lobbies_lock:
+                mark_input_sent(record, agent_id, tick, px, py, started)
 
+    async def fetch_lobby_state_async(client, lobby_id: str):
+        if E2E_STATE_SOURCE in ("api", "auto"):
+            try:
+                _status, state = await client.json("GET", f"/lobbies/{lobby_id}/state")
+                return state
+            except RuntimeError as exc:
+                if "HTTP 404" in str(exc):
+                    return None
+                if E2E_STATE_SOURCE == "api":
+                    raise
+        # Redis (or auto fallback) goes through the blocking helper on a worker thread.
+        return await asyncio.get_running_loop().run_in_executor(None, get_lobby_state, lobby_id)
+
+    async def drive_lobby_async(client, lobby_id: str, record):
+        """One task per lobby: fetch state, then fan out every runner's input concurrently."""
+        feed = get_state_feed() if E2E_STATE_SOURCE == "ws" else None
+        remove_listener = None
+        updated = asyncio.Event()
+        if feed:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, feed.subscribe, lobby_id)
+            remove_listener = feed.add_listener(lobby_id, lambda _lid, _state: loop.call_soon_threadsafe(updated.set))
+        try:
+            await _drive_lobby_async(client, lobby_id, record, feed, updated)
+        finally:
+            if remove_listener:
+                remove_listener()
+
+    async def _drive_lobby_async(client, lobby_id: str, record, feed, updated):
+        async def send(agent_id, api_key, direction, tick, target, px, py):
+            if not _tick_scheduler.claim(lobby_id, agent_id, target):
+                return
+            started = time.time()
+            await client.json(
+                "POST",
+                f"/lobbies/{lobby_id}/input",
+                body={"direction": direction},
+                headers={"x-api-key": api_key},
+            )
+            _tick_scheduler.record(lobby_id, agent_id, target, started, time.time())
+            with lobbies_lock:
+                mark_input_sent(record, agent_id, tick, px, py, started)
+
+        poll_sec = scale_async_poll_sec or 0.05
+        last_planned_tick = None
+        while not record.finished:
+            updated.clear()
+            try:
+                state = feed.latest(lobby_id) if feed else await fetch_lobby_state_async(client, lobby_id)
+            except Exception:
+                state = None
+            if state:
+                _tick_scheduler.observe(lobby_id, state)
+            if state and observe_lobby_status(record, state):
+                if not scale_async_poll_sec:
+                    # Default: poll twice per server tick.
+                    poll_sec = 0.5 / max(1.0, float(state.get("tick_rate") or 10))
+                if agent_id_mapping_stale(record):
+                    try:
+                        _status, rows = await client.json("GET", f"/lobbies/{lobby_id}/players")
+                        with lobbies_lock:
+                            apply_agent_id_mapping(record, rows)
+                    except Exception:
+                        pass
+                tick = int(state.get("tick", 0) or 0)
+                if tick != last_planned_tick:
+                    last_planned_tick = tick
+                    with lobbies_lock:
+                        tick, planned = plan_lobby_inputs(lobby_id, record, state)
+                        if open_loop:
+                            # The open-loop sender picks these up on its own schedule.
+                            open_plans[lobby_id] = {aid: (key, d, tick, px, py) for aid, key, d, px, py in planned}
+                    if planned and not open_loop:
+                        target, fire_at = _tick_scheduler.plan(lobby_id, tick)
+                        delay = fire_at - time.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        await asyncio.gather(
+                            *[send(aid, key, direction, tick, target, px, py) for aid, key, direction, px, py in planned],
+                            return_exceptions=True,
+                        )
+            if feed:
+                # Push mode: wake on the next broadcast (the timeout only guards a silent socket).
                 try:
-                    http_json(
-                        "POST",
-                        f"/lobbies/{lobby_id}/input",
-                        body={"direction": direction},
-                        headers={"x-api-key": api_key},
-                    )
-                    record["last_tick_sent"][agent_id] = tick
-                    record["last_move_tick"][agent_id] = tick
-                    record["last_pos"][agent_id] = (px, py)
-                except Exception:
-                    continue
+                    await asyncio.wait_for(updated.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                wake = _tick_scheduler.next_wake([lobby_id]) if E2E_TICK_SYNC else None
+                await asyncio.sleep(min(1.0, max(0.0, wake - time.time())) if wake else poll_sec)
+
+    async def run_async_engine(stop):
+        client = AsyncHttpClient(
+            API_URL,
+            concurrency=scale_async_concurrency,
+            timeout=HTTP_TIMEOUT_SEC,
+            observe=lambda method, path, sec, ok: _latency.record("http", f"{method} {route_template(path)}", sec, ok),
+        )
+        tasks = {}
+
+        def next_open_job():
+            # Round-robin over every runner with a planned move; None when nobody has one.
+            for _ in range(2):
+                while open_queue:
+                    lobby_id, agent_id = open_queue.pop()
+                    record = lobbies.get(lobby_id)
+                    item = open_plans.get(lobby_id, {}).get(agent_id)
+                    if record is not None and not record.finished and item is not None:
+                        return record, agent_id, item
+                with lobbies_lock:
+                    open_queue.extend(reversed([(lid, aid) for lid, plans in open_plans.items() for aid in plans]))
+            return None
+
+        async def fire_open_input(job):
+            record, agent_id, (api_key, direction, tick, px, py) = job
+            started = time.time()
+            await client.json(
+                "POST",
+                f"/lobbies/{record.lobby_id}/input",
+                body={"direction": direction},
+                headers={"x-api-key": api_key},
+            )
+            with lobbies_lock:
+                runner = record.agents.get(agent_id)
+                if runner is not None and runner.last_tick_sent != tick:
+                    mark_input_sent(record, agent_id, tick, px, py, started)
+
+        sender = None
+        if open_loop:
+            sender = asyncio.ensure_future(run_open_loop(
+                lambda elapsed: ramp_rate(
+                    scale_ramp, scale_target_rps, scale_ramp_start_rps, scale_ramp_sec, scale_ramp_steps, elapsed
+                ),
+                next_open_job,
+                fire_open_input,
+                open_stats,
+                stop,
+            ))
+        try:
+            while not stop.is_set():
+                with lobbies_lock:
+                    snapshot = list(lobbies.items())
+                for lobby_id, record in snapshot:
+                    if lobby_id not in tasks and not record.finished:
+                        tasks[lobby_id] = asyncio.ensure_future(drive_lobby_async(client, lobby_id, record))
+                for lobby_id, task in tasks.items():
+                    if task.done() and not task.cancelled() and task.exception() and not lobbies[lobby_id].finished:
+                        log(f"Async driver for lobby {lobby_id} crashed: {task.exception()}; restarting")
+                        tasks[lobby_id] = asyncio.ensure_future(drive_lobby_async(client, lobby_id, lobbies[lobby_id]))
+                await asyncio.sleep(0.1)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            if sender is not None:
+                await asyncio.gather(sender, return_exceptions=True)
+            await client.close()
+            async_engine_stats.update(
+                {"requests": client.requests, "opened": client.opened, "reused": client.reused}
+            )
 
     def verify_lobby_results(lobby_id: str):
         record = lobbies.get(lobby_id)
-        if not record or record.get("payout_checked"):
+        if not record or record.payout_checked:
             return
         try:
             _status, res = http_json("GET", f"/lobbies/{lobby_id}/result")
@@ -1379,31 +2124,53 @@ def scale_scenario():
             f"Lobby {lobby_id} results: coins_collected={total_coins}/{scale_coins_per_match} "
             f"reward_sum={total_reward:.6f} mismatches={mismatches} players={len(rows)}"
         )
-        record["payout_checked"] = True
+        lobby_coins[lobby_id] = total_coins
+        record.payout_checked = True
         # Execution is handled separately so we can serialize and keep the "finish -> payout" flow consistent.
 
-    def execute_lobby_payout_if_needed(lobby_id: str):
+    def watch_payout_worker(timeout_sec: float):
+        """
+        Check every lobby waiting on the payout worker with one query per poll (timeout_sec=0 polls
+        once). Lobbies past their deadline fall back to a manual /payouts/execute.
+        """
+        if not payout_watch:
+            return
+        expected = {lobby_id: coins for lobby_id, (coins, _deadline) in payout_watch.items()}
+        done, outstanding = wait_for_payouts(list(payout_watch), expected, timeout_sec=timeout_sec)
+        for lobby_id, (payout_id, sent, failed) in done.items():
+            log(f"Lobby {lobby_id} payout worker observed: payout_id={payout_id} sent={sent} failed={failed}")
+            lobbies[lobby_id].payout_executed = True
+            payout_watch.pop(lobby_id, None)
+        now = time.time()
+        for lobby_id in sorted(outstanding):
+            if payout_watch[lobby_id][1] > now:
+                continue
+            payout_watch.pop(lobby_id, None)
+            log(f"Lobby {lobby_id} payout worker wait failed; falling back to manual execute: timed out")
+            execute_lobby_payout_if_needed(lobby_id, worker_wait_failed=True)
+
+    def execute_lobby_payout_if_needed(lobby_id: str, worker_wait_failed: bool = False):
         record = lobbies.get(lobby_id)
-        if not record or record.get("payout_executed"):
+        if not record or record.payout_executed:
             return
         if not scale_execute_payouts:
-            record["payout_executed"] = True
+            record.payout_executed = True
             return
         # Prefer instant payouts via the API worker (AUTO_PAYOUTS_ENABLED=1).
-        if os.getenv("AUTO_PAYOUTS_ENABLED", "0") == "1" and E2E_USE_DB_HELPERS:
-            # We'll just verify completion; no manual /payouts/execute calls here to avoid blocking
-            # agent driving and to match production behavior.
+        if os.getenv("AUTO_PAYOUTS_ENABLED", "0") == "1" and E2E_USE_DB_HELPERS and not worker_wait_failed:
+            # We'll just verify completion (batched across lobbies by watch_payout_worker); no manual
+            # /payouts/execute calls here to avoid blocking agent driving and to match production behavior.
+            if lobby_id in payout_watch:
+                return
             try:
                 _status, res = http_json("GET", f"/lobbies/{lobby_id}/result")
-                total_coins = 0
-                for row in (res.get("results") or []):
-                    total_coins += int(row.get("final_coins") or 0)
-                payout_id, sent, failed = wait_for_payout_execution(lobby_id, total_coins)
-                log(f"Lobby {lobby_id} payout worker observed: payout_id={payout_id} sent={sent} failed={failed}")
-                record["payout_executed"] = True
+            except Exception:
                 return
-            except Exception as exc:
-                log(f"Lobby {lobby_id} payout worker wait failed; falling back to manual execute: {exc}")
+            total_coins = 0
+            for row in (res.get("results") or []):
+                total_coins += int(row.get("final_coins") or 0)
+            payout_watch[lobby_id] = (total_coins, time.time() + payout_exec_wait_sec())
+            return
         elif os.getenv("AUTO_PAYOUTS_ENABLED", "0") == "1" and not E2E_USE_DB_HELPERS:
             log(
                 f"Lobby {lobby_id}: AUTO_PAYOUTS_ENABLED=1 with API-only scale mode; "
@@ -1420,7 +2187,7 @@ def scale_scenario():
             total_coins += int(row.get("final_coins") or 0)
         if total_coins <= 0:
             log(f"Lobby {lobby_id} payout skipped (0 coins collected => total_quai=0)")
-            record["payout_executed"] = True
+            record.payout_executed = True
             return
 
         if E2E_USE_DB_HELPERS:
@@ -1430,7 +2197,7 @@ def scale_scenario():
             sent = int(execute.get("sent", 0)) if isinstance(execute, dict) else int(execute.get("attempted", 0) or 0)
             failed = int(execute.get("failed", 0)) if isinstance(execute, dict) else 0
             log(f"Lobby {lobby_id} payout execute sent={sent} failed={failed}")
-            record["payout_executed"] = True
+            record.payout_executed = True
             return
 
         # API-only mode: payout row creation may lag briefly after lobby finalization.
@@ -1446,7 +2213,7 @@ def scale_scenario():
                     f"Lobby {lobby_id} payout execute (API-only) sent={sent} failed={failed} "
                     "(DB verification skipped)"
                 )
-                record["payout_executed"] = True
+                record.payout_executed = True
                 return
             except Exception as exc:
                 last_err = exc
@@ -1454,19 +2221,63 @@ def scale_scenario():
 
         raise RuntimeError(f"Lobby {lobby_id} payout execution did not succeed in API-only mode: {last_err}")
 
-    start = time.time()
-    next_join_at = start
-    for idx in range(total_agents):
-        if time.time() < next_join_at:
-            while time.time() < next_join_at:
-                drive_active_lobbies()
-                time.sleep(0.25)
+    # Agents alternate payout wallets A/B; registration runs ahead of the join schedule.
+    label_prefix = f"W{E2E_SCALE_WORKER_INDEX}" if sharded else ""
+    credential_specs = [
+        (f"{label_prefix}S{idx+1:03d}", AGENT_PAYOUT_ADDRESS if idx % 2 == 0 else AGENT2_PAYOUT_ADDRESS)
+        for idx in range(total_agents)
+    ]
+    credentials = CredentialPool(credential_specs, register_agent, size=scale_cred_pool_size).start()
 
-        payout_address = AGENT_PAYOUT_ADDRESS if idx % 2 == 0 else AGENT2_PAYOUT_ADDRESS
-        label = f"S{idx+1:03d}"
-        api_key = register_agent(payout_address, label)
+    async_stop = threading.Event()
+    async_thread = None
+    if scale_engine == "async":
+        async_thread = threading.Thread(
+            target=lambda: asyncio.run(run_async_engine(async_stop)), name="scale-async-engine", daemon=True
+        )
+        async_thread.start()
 
-        _status, joined = join_lobby(game_mode_id, api_key, label=label)
+    def wait_scale_loop(sleep_sec: float):
+        if E2E_STATE_SOURCE == "ws":
+            get_state_feed().wait_for_any(sleep_sec)
+            return
+        if E2E_TICK_SYNC and async_thread is None:
+            # Wake just after the next tick of any running lobby rather than on a fixed cadence.
+            with lobbies_lock:
+                running = [lobby_id for lobby_id, record in lobbies.items() if not record.finished]
+            wake = _tick_scheduler.next_wake(running) if running else None
+            if wake:
+                sleep_sec = min(1.0, max(0.0, wake - time.time()))
+        time.sleep(sleep_sec)
+
+    def log_tick_sync_report():
+        """Log per-lobby input timing; returns the totals."""
+        report = _tick_scheduler.report()
+        totals = {"sent": 0, "on_time": 0, "late": 0, "duplicate": 0, "suppressed": 0}
+        for lobby_id, row in report.items():
+            record = lobbies.get(lobby_id)
+            for name in totals:
+                totals[name] += row[name]
+            log(
+                f"Tick sync lobby={(record and record.watch_code) or lobby_id[:8]}: sent={row['sent']} "
+                f"on_time={row['on_time_ratio']:.1%} late={row['late_ratio']:.1%} "
+                f"duplicate={row['duplicate_ratio']:.1%} suppressed={row['suppressed']}"
+            )
+        classified = totals["on_time"] + totals["late"] + totals["duplicate"]
+        if classified:
+            log(
+                f"Tick sync total (scheduler={'on' if E2E_TICK_SYNC else 'off'}): sent={totals['sent']} "
+                f"on_time={totals['on_time'] / classified:.1%} late={totals['late'] / classified:.1%} "
+                f"duplicate={totals['duplicate'] / classified:.1%} suppressed={totals['suppressed']}"
+            )
+        return totals
+
+    def drive_or_wait(sleep_sec: float):
+        if async_thread is None:
+            drive_active_lobbies()
+        wait_scale_loop(sleep_sec)
+
+    def record_join(idx: int, api_key: str, joined):
         lobby_id = joined["lobby_id"]
         watch_code = joined.get("watch_code") or ""
         status = joined.get("status") or ""
@@ -1476,10 +2287,11 @@ def scale_scenario():
         record = ensure_lobby_record(lobby_id, watch_code, status)
         if is_new_lobby and watch_code:
             log(f"UI: {WEB_URL}/#/watch/{game_mode_id}/{watch_code}")
-        record["slot_to_api_key"][slot] = api_key
+        with lobbies_lock:
+            record.slot_to_api_key[slot] = api_key
         refresh_agent_id_mapping(lobby_id)
 
-        joined_count = len(record["slot_to_api_key"])
+        joined_count = len(record.slot_to_api_key)
         log(
             f"Scale join {idx+1}/{total_agents}: lobby={watch_code or lobby_id[:8]} "
             f"slot={slot} joined={joined_count}/{scale_players_per_lobby} status={status}"
@@ -1488,49 +2300,421 @@ def scale_scenario():
         if status == "ACTIVE":
             refresh_agent_id_mapping(lobby_id)
 
-        next_join_at += join_interval
+    def join_storm():
+        """
+        Register every agent first, then release all joins at once from a thread pool so they race for
+        the same WAITING lobby. Transient failures (5xx, connection errors) are retried.
+        """
+        started = time.time()
+        creds = [credentials.get(timeout=HTTP_TIMEOUT_SEC) for _ in range(total_agents)]
+        log(f"Join storm: {total_agents} agents registered in {time.time() - started:.2f}s; releasing joins")
+        concurrency = min(total_agents, scale_join_concurrency or total_agents)
+        work = queue.Queue()
+        for idx, (label, _payout_address, api_key) in enumerate(creds):
+            work.put((idx, label, api_key))
+        gate = threading.Event()
+        lock = threading.Lock()
+        hist = LatencyHistogram()
+        results = []
+        failures = []
+        retries = [0]
+
+        def join_one(label: str, api_key: str):
+            for attempt in range(scale_join_retries + 1):
+                try:
+                    return join_lobby(game_mode_id, api_key, label=label)[1]
+                except (RuntimeError, OSError) as exc:
+                    # Safe to repeat: /lobbies/join hands back an agent's existing membership, so a join that
+                    # landed before the error cannot take a second seat.
+                    transient = isinstance(exc, OSError) or "HTTP 5" in str(exc)
+                    if not transient or attempt == scale_join_retries:
+                        raise
+                    with lock:
+                        retries[0] += 1
+                    time.sleep(0.05 * (2 ** attempt))
+
+        def worker():
+            gate.wait()
+            while True:
+                try:
+                    idx, label, api_key = work.get_nowait()
+                except queue.Empty:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    joined = join_one(label, api_key)
+                except Exception as exc:
+                    with lock:
+                        hist.record(time.perf_counter() - t0, ok=False)
+                        failures.append((label, str(exc)))
+                    continue
+                with lock:
+                    hist.record(time.perf_counter() - t0)
+                    results.append((idx, api_key, joined))
+
+        threads = [threading.Thread(target=worker, name=f"join-storm-{i}", daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        burst_started = time.time()
+        gate.set()
+        for thread in threads:
+            thread.join()
+        wall = time.time() - burst_started
 
-    if len(lobbies) != scale_lobbies:
-        codes = [rec.get("watch_code") or rec.get("lobby_id") for rec in lobbies.values()]
-        raise RuntimeError(f"Expected {scale_lobbies} lobbies, but created {len(lobbies)}. Lobbies: {codes}")
+        log(
+            f"Join storm: joins={len(results)}/{total_agents} concurrency={concurrency} wall={wall:.2f}s "
+            f"rate={len(results) / wall if wall else 0.0:.1f}/s p50={hist.percentile(50) / 1000:.1f}ms "
+            f"p95={hist.percentile(95) / 1000:.1f}ms p99={hist.percentile(99) / 1000:.1f}ms "
+            f"max={hist.max_us / 1000:.1f}ms retries={retries[0]} failed={len(failures)}"
+        )
+        if failures:
+            raise RuntimeError(f"Join storm: {len(failures)} joins failed, first: {failures[0]}")
+        for n, (idx, api_key, joined) in enumerate(sorted(results, key=lambda r: r[0])):
+            record_join(n, api_key, joined)
+        verify_join_allocation()
+
+    def verify_join_allocation():
+        """
+        Check allocation of the lobbies this storm's joins landed in, from the API's view
+        (/lobbies + /lobbies/{id}/players): none over capacity or with a slot taken twice, and at
+        most one left part-filled (a second one means concurrent joins were split instead of packed).
+        Other lobbies of the mode (earlier runs, released agents) are not ours to judge.
+        """
+        listing = lobby_listing(max_age_sec=0)
+        capacity = {
+            lobby_id: int((listing.get(lobby_id) or {}).get("max_players") or scale_players_per_lobby)
+            for lobby_id in lobbies
+        }
+        overfilled = []
+        duplicate_slots = []
+        underfilled = []
+        for lobby_id, max_players in sorted(capacity.items()):
+            try:
+                _status, rows = http_json("GET", f"/lobbies/{lobby_id}/players")
+            except RuntimeError as exc:
+                # 404 means nobody is JOINED any more.
+                if "HTTP 404" not in str(exc):
+                    raise
+                rows = []
+            slots = [int(r["slot"]) for r in rows if str(r.get("status", "JOINED")) == "JOINED"]
+            label = lobbies[lobby_id].label
+            if len(slots) > max_players:
+                overfilled.append((label, len(slots), max_players))
+            if len(set(slots)) != len(slots):
+                duplicate_slots.append((label, sorted(slots)))
+            if 0 < len(slots) < max_players:
+                underfilled.append((label, len(slots), max_players))
+        log(
+            f"Join storm allocation: lobbies={len(capacity)} full={len(capacity) - len(underfilled)} "
+            f"underfilled={underfilled} overfilled={overfilled} duplicate_slots={duplicate_slots}"
+        )
+        if overfilled or duplicate_slots:
+            raise RuntimeError(f"Join storm over-filled lobbies: overfilled={overfilled} duplicate_slots={duplicate_slots}")
+        if len(underfilled) > 1 and not sharded:
+            # Other workers may still be joining; only a lone harness can call this a split.
+            raise RuntimeError(f"Join storm left {len(underfilled)} lobbies part-filled: {underfilled}")
 
-    not_full = [
-        (rec.get("watch_code") or rec.get("lobby_id"), len(rec.get("slot_to_api_key") or {}))
-        for rec in lobbies.values()
-        if len(rec.get("slot_to_api_key") or {}) != scale_players_per_lobby
-    ]
-    if not_full:
-        raise RuntimeError(f"Some lobbies did not fill to {scale_players_per_lobby} players: {not_full}")
+    start = time.time()
+    next_join_at = start
+    if sharded:
+        # Interleave with the other workers' joins instead of bursting together.
+        next_join_at += join_interval * E2E_SCALE_WORKER_INDEX / max(1, E2E_SCALE_WORKER_COUNT)
+    if scale_join_mode == "storm":
+        join_storm()
+    else:
+        for idx in range(total_agents):
+            if time.time() < next_join_at:
+                while time.time() < next_join_at:
+                    drive_or_wait(0.25 if async_thread is None else min(0.05, max(0.0, next_join_at - time.time())))
+
+            ran_dry = not credentials.ready()
+            while not credentials.ready():
+                # Producer is behind: keep lobbies moving instead of stalling on PoW.
+                drive_or_wait(0.05)
+            label, _payout_address, api_key = credentials.get(timeout=HTTP_TIMEOUT_SEC)
+            if ran_dry:
+                log(f"Credential pool ran dry before {label}; join is {time.time() - next_join_at:.2f}s behind schedule")
+
+            _status, joined = join_lobby(game_mode_id, api_key, label=label)
+            record_join(idx, api_key, joined)
+            next_join_at += join_interval
+
+    credentials.stop()
+    log(f"Scale credential pool: produced={credentials.produced} join_wait={credentials.waited_sec:.2f}s")
+    if _cred_cache:
+        log(f"Credential cache: hits={_cred_cache.hits} misses={_cred_cache.misses}")
+
+    if sharded:
+        # Lobbies may be shared with other workers; the coordinator checks counts and fill across all of them.
+        shared = sum(1 for rec in lobbies.values() if len(rec.slot_to_api_key) != scale_players_per_lobby)
+        log(f"Scale worker joins: agents={total_agents} lobbies={len(lobbies)} shared={shared}")
+    else:
+        if len(lobbies) != scale_lobbies:
+            codes = [rec.label for rec in lobbies.values()]
+            raise RuntimeError(f"Expected {scale_lobbies} lobbies, but created {len(lobbies)}. Lobbies: {codes}")
+
+        not_full = [
+            (rec.label, len(rec.slot_to_api_key))
+            for rec in lobbies.values()
+            if len(rec.slot_to_api_key) != scale_players_per_lobby
+        ]
+        if not_full:
+            raise RuntimeError(f"Some lobbies did not fill to {scale_players_per_lobby} players: {not_full}")
 
     log("Scale fill complete. Driving lobbies until all are finished...")
     # After fill, the last lobby may have just started. Give it duration + grace.
     hard_deadline = time.time() + scale_duration_sec + 180
+    next_payout_poll_at = 0.0
     while time.time() < hard_deadline:
-        drive_active_lobbies()
+        if async_thread is None:
+            drive_active_lobbies()
         finished = 0
         for lobby_id, record in lobbies.items():
-            if record.get("finished"):
+            if record.finished:
                 finished += 1
+                if sharded and not record.holds_first_slot():
+                    # A shared lobby is verified and paid out by the worker holding its first slot.
+                    continue
                 verify_lobby_results(lobby_id)
                 execute_lobby_payout_if_needed(lobby_id)
-        if finished >= scale_lobbies:
-            log(f"All lobbies finished ({finished}/{scale_lobbies}).")
+        if payout_watch and time.time() >= next_payout_poll_at:
+            watch_payout_worker(0)
+            next_payout_poll_at = time.time() + 1.0
+        if finished >= len(lobbies):
+            log(f"All lobbies finished ({finished}/{len(lobbies)}).")
+            if _cred_cache:
+                _cred_cache.forget_lobbies(lobbies)
             break
-        time.sleep(0.25)
+        wait_scale_loop(0.25)
+
+    while payout_watch:
+        # Remaining worker payouts: bounded by the slowest one, not the sum.
+        watch_payout_worker(max(0.0, max(deadline for _coins, deadline in payout_watch.values()) - time.time()))
 
-    if any(not record.get("finished") for record in lobbies.values()):
-        still = [rec.get("watch_code") or rec.get("lobby_id") for rec in lobbies.values() if not rec.get("finished")]
+    if async_thread is not None:
+        async_stop.set()
+        async_thread.join(timeout=10)
+        log(
+            "Scale async engine: "
+            f"requests={async_engine_stats.get('requests', 0)} "
+            f"connections_opened={async_engine_stats.get('opened', 0)} "
+            f"reused={async_engine_stats.get('reused', 0)}"
+        )
+    tick_totals = log_tick_sync_report()
+    if open_loop:
+        log_open_loop_report(open_stats)
+    for lobby_id, stats in sorted(input_effects.lobbies().items()):
+        record = lobbies.get(lobby_id)
+        log(f"Input effect lobby={record.label if record else lobby_id[:8]}: {stats.summary()}")
+    effect_total = input_effects.total()
+    if effect_total.ms.count or effect_total.lost:
+        log(f"Input effect total: {effect_total.summary()}")
+    if planner_stats["plans"]:
+        log(
+            f"Scale planner: plans={planner_stats['plans']} "
+            f"holds={planner_stats['waits']} ({planner_stats['waits'] / planner_stats['plans']:.1%}) "
+            f"avg_expansions={planner_stats['expansions'] / planner_stats['plans']:.1f}"
+        )
+    views = [record.view for record in lobbies.values() if record.view]
+    cache_stats = {
+        "new_ticks": sum(v.diffs for v in views),
+        "skipped_same_tick": sum(v.skips for v in views),
+        "player_moves": sum(v.moved for v in views),
+        "coin_changes": sum(v.coin_changes for v in views),
+    }
+    if views:
+        log(
+            f"Scale state cache: new_ticks={cache_stats['new_ticks']} "
+            f"skipped_same_tick={cache_stats['skipped_same_tick']} "
+            f"player_moves={cache_stats['player_moves']} coin_changes={cache_stats['coin_changes']}"
+        )
+
+    if any(not record.finished for record in lobbies.values()):
+        still = [rec.label for rec in lobbies.values() if not rec.finished]
         raise RuntimeError(f"Scale scenario did not finish all lobbies before deadline. Remaining: {still}")
 
     if E2E_USE_DB_HELPERS:
         # Ensure payout rows exist (helps debugging in DRY RUN mode).
         log("Scale post-phase: waiting for payout rows...")
+        ready, missing = wait_for_payouts(list(lobbies.keys()))
         for lobby_id in lobbies.keys():
-            payout_id = wait_for_payout(lobby_id)
-            log(f"Lobby {lobby_id} payout ready: {payout_id}")
+            if lobby_id in ready:
+                log(f"Lobby {lobby_id} payout ready: {ready[lobby_id][0]}")
+        if missing:
+            raise RuntimeError(f"Payout not created within {PAYOUT_WAIT_SEC:.0f}s for lobbies: {sorted(missing)}")
     else:
         log("Scale post-phase: DB helpers disabled; skipping payout-row checks.")
 
+    metrics_fd = os.getenv("E2E_SCALE_METRICS_FD", "").strip()
+    if metrics_fd:
+        write_report(int(metrics_fd), {
+            "worker": E2E_SCALE_WORKER_INDEX,
+            "agents": total_agents,
+            "players_per_lobby": scale_players_per_lobby,
+            "elapsed_sec": time.time() - start,
+            "lobbies": {
+                lobby_id: {
+                    "label": record.label,
+                    "joined": len(record.slot_to_api_key),
+                    "finished": record.finished,
+                    "coins": lobby_coins.get(lobby_id),
+                }
+                for lobby_id, record in lobbies.items()
+            },
+            "tick_sync": tick_totals,
+            "planner": planner_stats,
+            "state_cache": cache_stats,
+            "async": async_engine_stats,
+            "credentials": {"produced": credentials.produced, "join_wait_sec": credentials.waited_sec},
+            "http": _http_pool.stats() if HTTP_KEEPALIVE else {},
+            "latency": _latency.to_dict(),
+            "input_effect": effect_total.to_dict(),
+            "open_loop": open_stats.to_dict() if open_loop else {},
+        })
+
+
+def log_open_loop_report(stats):
+    """Per-window open-loop results and the highest rate that stayed within E2E_SCALE_OPEN_SLO_MS."""
+    slo_ms = float(os.getenv("E2E_SCALE_OPEN_SLO_MS", "500"))
+    for start, target, ok_rps, error_ratio, window in stats.rows():
+        hist = window.latency
+        log(
+            f"Open loop t={start:.0f}s: target={target:.1f}/s ok={ok_rps:.1f}/s errors={error_ratio:.1%} "
+            f"skipped={window.skipped} p50={hist.percentile(50) / 1000:.1f}ms "
+            f"p99={hist.percentile(99) / 1000:.1f}ms max={hist.max_us / 1000:.1f}ms"
+        )
+    best = stats.max_sustainable(slo_ms)
+    if best is None:
+        log(f"Open loop max sustainable: no window met p99<={slo_ms:.0f}ms with <=1% errors")
+    else:
+        log(f"Open loop max sustainable: {best:.1f} inputs/s (p99<={slo_ms:.0f}ms, <=1% errors)")
+
+
+def scale_coordinator():
+    """
+    Run the scale scenario as E2E_SCALE_WORKERS child processes, each driving its share of
+    E2E_SCALE_LOBBIES with its own agents, then merge their metrics into one report.
+    """
+    scale_lobbies = int(os.getenv("E2E_SCALE_LOBBIES", "10"))
+    scale_players_per_lobby = int(os.getenv("E2E_SCALE_PLAYERS_PER_LOBBY", os.getenv("E2E_AGENTS_PER_LOBBY", "10")))
+    scale_agent_amount = os.getenv("E2E_AGENT_AMOUNT", "").strip()
+    if scale_agent_amount:
+        total = int(scale_agent_amount)
+        if total <= 0:
+            raise RuntimeError("E2E_AGENT_AMOUNT must be > 0")
+        scale_lobbies = max(1, math.ceil(total / max(1, scale_players_per_lobby)))
+    shares = [n for n in split_evenly(scale_lobbies, min(E2E_SCALE_WORKERS, scale_lobbies)) if n > 0]
+    log(f"Scale coordinator: workers={len(shares)} lobbies={scale_lobbies} shares={shares}")
+    # One resolve for the whole run: workers resolving on their own could pick different modes, or
+    # race each other for the same idle one.
+    game_mode_id = get_or_create_game_mode(
+        max_players=scale_players_per_lobby,
+        duration_sec=int(os.getenv("E2E_SCALE_DURATION_SEC", "60")),
+        coins_per_match=int(os.getenv("E2E_SCALE_COINS_PER_MATCH", "10")),
+        reward_pool_quai=os.getenv("E2E_SCALE_REWARD_POOL_QUAI", os.getenv("E2E_PAYOUT_AMOUNT", "10")),
+    )
+    log(f"Scale coordinator: game mode {game_mode_id} for every worker")
+
+    workers = []
+    try:
+        for index, share in enumerate(shares):
+            env = dict(os.environ)
+            env.pop("E2E_AGENT_AMOUNT", None)
+            env.pop("E2E_METRICS_JSON", None)  # workers report latency over the pipe; we dump the merged set
+            env["E2E_SCALE_LOBBIES"] = str(share)
+            env["E2E_SCALE_WORKER_INDEX"] = str(index)
+            env["E2E_SCALE_WORKER_COUNT"] = str(len(shares))
+            env["E2E_GAME_MODE_ID"] = game_mode_id
+            for name in ("E2E_SCALE_TARGET_RPS", "E2E_SCALE_RAMP_START_RPS"):
+                # Each worker carries its share of the open-loop rate.
+                if os.getenv(name):
+                    env[name] = str(float(os.environ[name]) * share / scale_lobbies)
+            if E2E_CRED_CACHE_FILE:
+                # One cache file per worker: they would otherwise rewrite the same file concurrently.
+                env["E2E_CRED_CACHE_FILE"] = f"{E2E_CRED_CACHE_FILE}.w{index}"
+            workers.append(WorkerProcess(index, [os.path.abspath(__file__)], env, log))
+        for worker in workers:
+            worker.wait()
+    except BaseException:
+        for worker in workers:
+            worker.terminate()
+        raise
+
+    failed = [w.index for w in workers if w.returncode != 0 or w.report is None]
+    merged = merge_reports([w.report for w in workers if w.report is not None])
+    for worker in workers:
+        if worker.report is not None and worker.report.get("latency"):
+            # Folded into this process's histograms so the end-of-run latency report covers all workers.
+            _latency.merge_dict(worker.report["latency"])
+    lobbies = merged["lobbies"]
+    # Workers report the lobby size they ran with (API-only mode adopts the game mode's value).
+    scale_players_per_lobby = merged["players_per_lobby"] or scale_players_per_lobby
+    shared = sum(1 for row in lobbies.values() if row["workers"] > 1)
+    finished = sum(1 for row in lobbies.values() if row["finished"])
+    coins = sum(row["coins"] or 0 for row in lobbies.values())
+    log(
+        f"Scale sharded: workers={merged['workers']}/{len(workers)} agents={merged['agents']} "
+        f"lobbies={len(lobbies)} shared_lobbies={shared} finished={finished} coins_collected={coins} "
+        f"elapsed={merged['elapsed_sec']:.1f}s"
+    )
+    cred = merged["credentials"]
+    log(f"Scale sharded credentials: produced={cred.get('produced', 0)} join_wait={cred.get('join_wait_sec', 0.0):.2f}s")
+    ticks = merged["tick_sync"]
+    classified = ticks.get("on_time", 0) + ticks.get("late", 0) + ticks.get("duplicate", 0)
+    if classified:
+        log(
+            f"Scale sharded tick sync: sent={ticks.get('sent', 0)} "
+            f"on_time={ticks['on_time'] / classified:.1%} late={ticks['late'] / classified:.1%} "
+            f"duplicate={ticks['duplicate'] / classified:.1%} suppressed={ticks.get('suppressed', 0)}"
+        )
+    planner = merged["planner"]
+    if planner.get("plans"):
+        log(
+            f"Scale sharded planner: plans={planner['plans']} "
+            f"holds={planner['waits']} ({planner['waits'] / planner['plans']:.1%}) "
+            f"avg_expansions={planner['expansions'] / planner['plans']:.1f}"
+        )
+    cache = merged["state_cache"]
+    if cache.get("new_ticks"):
+        log(
+            f"Scale sharded state cache: new_ticks={cache['new_ticks']} "
+            f"skipped_same_tick={cache.get('skipped_same_tick', 0)} "
+            f"player_moves={cache.get('player_moves', 0)} coin_changes={cache.get('coin_changes', 0)}"
+        )
+    effects = EffectStats()
+    for worker in workers:
+        if worker.report is not None and worker.report.get("input_effect"):
+            effects.merge(EffectStats.from_dict(worker.report["input_effect"]))
+    if effects.ms.count or effects.lost:
+        log(f"Scale sharded input effect: {effects.summary()}")
+    open_stats = OpenLoopStats(float(os.getenv("E2E_SCALE_OPEN_WINDOW_SEC", "5")))
+    for worker in workers:
+        if worker.report is not None and worker.report.get("open_loop"):
+            open_stats.merge_dict(worker.report["open_loop"])
+    if open_stats.windows:
+        log_open_loop_report(open_stats)
+    if merged["async"].get("requests"):
+        stats = merged["async"]
+        log(
+            f"Scale sharded async engine: requests={stats['requests']} "
+            f"connections_opened={stats.get('opened', 0)} reused={stats.get('reused', 0)}"
+        )
+    if merged["http"]:
+        stats = merged["http"]
+        log(
+            f"Scale sharded HTTP pool: opened={stats.get('opened', 0)} reused={stats.get('reused', 0)} "
+            f"stale={stats.get('stale', 0)} discarded={stats.get('discarded', 0)}"
+        )
+
+    if failed:
+        raise RuntimeError(f"Scale workers failed: {failed}")
+    if len(lobbies) != scale_lobbies:
+        codes = [row["label"] for row in lobbies.values()]
+        raise RuntimeError(f"Expected {scale_lobbies} lobbies, but created {len(lobbies)}. Lobbies: {codes}")
+    not_full = [(row["label"], row["joined"]) for row in lobbies.values() if row["joined"] != scale_players_per_lobby]
+    if not_full:
+        raise RuntimeError(f"Some lobbies did not fill to {scale_players_per_lobby} players: {not_full}")
+
 
 def main():
     if not TREASURY_PRIVATE_KEY:
@@ -1563,6 +2747,10 @@ def main():
 
     log("Checking API health...")
     http_json("GET", "/health")
+    if SCENARIO == "scale" and E2E_SCALE_WORKERS > 1 and E2E_SCALE_WORKER_INDEX < 0:
+        scale_coordinator()
+        return
+    load_credential_cache()
 
     if SCENARIO == "scale":
         scale_scenario()
@@ -1582,12 +2770,9 @@ def main():
             raise RuntimeError("E2E_DEMO_UI=1 requires E2E_PLAYER_COUNT=2")
 
         coins = GAME_COINS_PER_MATCH if GAME_COINS_PER_MATCH > 0 else max(10, GAME_DURATION_SEC)
-        if E2E_USE_DB_HELPERS:
-            log(f"Creating game mode for UI demo... players=2 duration={GAME_DURATION_SEC}s coins={coins}")
-            game_mode_id = get_or_create_game_mode(max_players=2, duration_sec=GAME_DURATION_SEC, coins_per_match=coins)
-        else:
-            game_mode_id = get_or_create_game_mode(max_players=2, duration_sec=GAME_DURATION_SEC, coins_per_match=coins)
-            log(f"Using existing game mode for UI demo: {game_mode_id}")
+        log(f"Resolving game mode for UI demo... players=2 duration={GAME_DURATION_SEC}s coins={coins}")
+        game_mode_id = get_or_create_game_mode(max_players=2, duration_sec=GAME_DURATION_SEC, coins_per_match=coins)
+        log(f"Using game mode for UI demo: {game_mode_id}")
 
         log("Joining lobby (demo run) as P1...")
         _, joined = join_lobby(game_mode_id, api_key_1, label="P1 demo")
@@ -1622,7 +2807,7 @@ def main():
         return
 
     if E2E_USE_DB_HELPERS:
-        log("Creating game mode for leave test...")
+        log("Resolving game mode for leave test...")
         game_mode_id = get_or_create_game_mode(max_players=1, duration_sec=10, coins_per_match=1)
 
         log("Joining lobby (leave test)...")
@@ -1669,9 +2854,47 @@ def main():
     execute_and_verify_payout(lobby_id, include_second_wallet=(completion_players == 2))
 
 
+def log_run_summary():
+    if _state_feed is not None:
+        log(f"WS state feed: messages={_state_feed.messages} reconnects={_state_feed.reconnects}")
+    if _rpc_stats["posts"]:
+        log(f"RPC: posts={_rpc_stats['posts']} calls={_rpc_stats['calls']} batch={int(_rpc_batch_supported)}")
+    if _sql_stats["queries"]:
+        spawns = _sql_session.spawns if _sql_session is not None else _sql_stats["queries"]
+        log(
+            f"SQL helper: backend={_sql_stats['backend']} queries={_sql_stats['queries']} "
+            f"total={_sql_stats['total_sec']:.2f}s avg={_sql_stats['total_sec'] / _sql_stats['queries'] * 1000:.1f}ms "
+            f"process_spawns={spawns}"
+        )
+    if _redis_client is not None:
+        stats = _redis_client.stats()
+        log(
+            "Redis client: "
+            f"connects={stats['connects']} round_trips={stats['round_trips']} commands={stats['commands']} "
+            f"docker_fallback={int(_redis_force_docker)}"
+        )
+    if HTTP_KEEPALIVE:
+        stats = _http_pool.stats()
+        log(
+            "HTTP pool: "
+            f"opened={stats['opened']} reused={stats['reused']} stale={stats['stale']} "
+            f"discarded={stats['discarded']} idle={stats['idle']} (pool_size={HTTP_POOL_SIZE})"
+        )
+    lines = _latency.report_lines()
+    if lines:
+        log(f"Latency ({_latency.wall_sec():.1f}s of calls):")
+        for line in lines:
+            log(f"  {line}")
+    if E2E_METRICS_JSON:
+        _latency.dump(E2E_METRICS_JSON)
+        log(f"Latency metrics written to {E2E_METRICS_JSON}")
+
+
 if __name__ == "__main__":
     try:
         main()
     except Exception as exc:
         print("E2E chain test failed:", exc)
+        log_run_summary()
         sys.exit(1)
+    log_run_summary()
@@ -0,0 +1 @@
+"""Helpers shared by the Python harness scripts (e2e-chain.py, local-smoke.py)."""
@@ -0,0 +1,289 @@
+import argparse
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional: every solver has a pure-Python path
+    np = None
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def extract_points(state, agent_ids):
+    """([(agent_id, x, y)], [(coin_id, x, y)]) for the given agents present in `state` and every coin."""
+    players = state.get("players") or {}
+    agents = []
+    for agent_id in agent_ids:
+        p = players.get(agent_id)
+        if not p:
+            continue
+        try:
+            agents.append((agent_id, int(p["x"]), int(p["y"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    coins = []
+    for coin in state.get("coins") or []:
+        try:
+            coins.append((int(coin["id"]), int(coin["x"]), int(coin["y"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return agents, coins
+
+
+def distance_matrix(agents, coins):
+    """Manhattan distances, agents x coins (ndarray with NumPy, list of rows otherwise)."""
+    if np is not None:
+        a = np.array([(x, y) for _aid, x, y in agents], dtype=np.int64).reshape(-1, 2)
+        c = np.array([(x, y) for _cid, x, y in coins], dtype=np.int64).reshape(-1, 2)
+        return np.abs(a[:, None, 0] - c[None, :, 0]) + np.abs(a[:, None, 1] - c[None, :, 1])
+    return [[abs(cx - ax) + abs(cy - ay) for _cid, cx, cy in coins] for _aid, ax, ay in agents]
+
+
+def solve_greedy(cost, rows: int, cols: int):
+    """
+    Repeatedly take the globally cheapest (row, col) among unassigned rows/cols; ties go to the
+    lowest row, then the lowest col. Returns [(row, col), ...].
+    """
+    if not rows or not cols:
+        return []
+    if np is not None:
+        work = np.array(cost, dtype=np.float64)
+        pairs = []
+        for _ in range(min(rows, cols)):
+            flat = int(np.argmin(work))
+            r, c = divmod(flat, cols)
+            pairs.append((r, c))
+            work[r, :] = np.inf
+            work[:, c] = np.inf
+        return pairs
+
+    # Integer distances are small (< width + height): bucket the pairs instead of sorting them.
+    buckets = {}
+    for r, row in enumerate(cost):
+        base = r * cols
+        for c, d in enumerate(row):
+            bucket = buckets.get(d)
+            if bucket is None:
+                buckets[d] = [base + c]
+            else:
+                bucket.append(base + c)
+    pairs = []
+    used_rows = set()
+    used_cols = set()
+    target = min(rows, cols)
+    for d in sorted(buckets):
+        for flat in buckets[d]:
+            r, c = divmod(flat, cols)
+            if r in used_rows or c in used_cols:
+                continue
+            pairs.append((r, c))
+            used_rows.add(r)
+            used_cols.add(c)
+            if len(pairs) == target:
+                return pairs
+    return pairs
+
+
+def _hungarian(cost, rows: int, cols: int):
+    # Shortest augmenting path (Jonker-Volgenant style) for rows <= cols; 1-based potentials.
+    inf = float("inf")
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (cols + 1)
+    owner = [0] * (cols + 1)
+    way = [0] * (cols + 1)
+    for i in range(1, rows + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [inf] * (cols + 1)
+        used = [False] * (cols + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, cols + 1):
+                if used[j]:
+                    continue
+                cur = row[j - 1] - ui0 - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(cols + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    return [(owner[j] - 1, j - 1) for j in range(1, cols + 1) if owner[j]]
+
+
+def _hungarian_np(cost):
+    # Same algorithm with the O(cols) inner scans vectorized.
+    rows, cols = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    owner = np.zeros(cols + 1, dtype=np.int64)
+    way = np.zeros(cols + 1, dtype=np.int64)
+    padded = np.zeros((rows + 1, cols + 1))
+    padded[1:, 1:] = cost
+    for i in range(1, rows + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used
+            free[0] = False
+            cur = padded[i0] - u[i0] - v
+            better = free & (cur < minv)
+            minv[better] = cur[better]
+            way[better] = j0
+            masked = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(masked))
+            delta = masked[j1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    return [(int(owner[j]) - 1, j - 1) for j in range(1, cols + 1) if owner[j]]
+
+
+def solve_optimal(cost, rows: int, cols: int):
+    """Minimum total distance matching of min(rows, cols) pairs. Returns [(row, col), ...]."""
+    if not rows or not cols:
+        return []
+    if linear_sum_assignment is not None:
+        r, c = linear_sum_assignment(np.asarray(cost))
+        return [(int(a), int(b)) for a, b in zip(r, c)]
+    if rows > cols:
+        if np is not None:
+            return [(r, c) for c, r in _hungarian_np(np.asarray(cost, dtype=np.float64).T)]
+        transposed = [list(col) for col in zip(*cost)]
+        return [(r, c) for c, r in _hungarian(transposed, cols, rows)]
+    if np is not None:
+        return _hungarian_np(np.asarray(cost, dtype=np.float64))
+    return _hungarian(cost, rows, cols)
+
+
+SOLVERS = {"greedy": solve_greedy, "optimal": solve_optimal}
+
+
+def assign_points(agents, coins, method: str = "greedy"):
+    """
+    {agent_id: (coin_x, coin_y, coin_id)} for already-parsed [(agent_id, x, y)] and [(coin_id, x, y)]
+    lists, pairing each agent with at most one coin and each coin with at most one agent. `method` is
+    "greedy" (cheapest pair first) or "optimal" (min total distance).
+    """
+    if not agents or not coins:
+        return {}
+    solver = SOLVERS.get(method)
+    if solver is None:
+        raise RuntimeError(f"Unknown assignment method {method!r} (expected one of {sorted(SOLVERS)})")
+    cost = distance_matrix(agents, coins)
+    assignments = {}
+    for r, c in solver(cost, len(agents), len(coins)):
+        cid, cx, cy = coins[c]
+        assignments[agents[r][0]] = (cx, cy, cid)
+    return assignments
+
+
+def assign_coins(state, agent_ids, method: str = "greedy"):
+    """assign_points over a raw lobby state dict."""
+    agents, coins = extract_points(state, agent_ids)
+    return assign_points(agents, coins, method)
+
+
+def _reference_greedy(state, agent_ids):
+    # The original pairs-sort implementation from scale_scenario; benchmark baseline.
+    coins = list(state.get("coins") or [])
+    players = state.get("players") or {}
+    pairs = []
+    for aid in agent_ids:
+        p = players.get(aid)
+        for coin in coins:
+            dist = abs(int(coin["x"]) - int(p["x"])) + abs(int(coin["y"]) - int(p["y"]))
+            pairs.append((dist, aid, int(coin["x"]), int(coin["y"]), int(coin["id"])))
+    pairs.sort(key=lambda t: t[0])
+    assigned_agents = set()
+    assigned_coins = set()
+    assignments = {}
+    for _dist, aid, cx, cy, cid in pairs:
+        if aid in assigned_agents or cid in assigned_coins:
+            continue
+        assignments[aid] = (cx, cy, cid)
+        assigned_agents.add(aid)
+        assigned_coins.add(cid)
+        if len(assigned_coins) >= len(coins):
+            break
+    return assignments
+
+
+def _total_distance(state, assignments):
+    players = state["players"]
+    return sum(abs(x - players[aid]["x"]) + abs(y - players[aid]["y"]) for aid, (x, y, _cid) in assignments.items())
+
+
+def main():
+    # Benchmark: `cd scripts && python3 -m harness.assign --players 50 --coins 100`
+    parser = argparse.ArgumentParser(description="Coin assignment solver benchmark")
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--coins", type=int, default=100)
+    parser.add_argument("--width", type=int, default=64)
+    parser.add_argument("--height", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cells = rng.sample(range(args.width * args.height), args.players + args.coins)
+    players = {f"p{i}": {"x": cells[i] % args.width, "y": cells[i] // args.width} for i in range(args.players)}
+    coins = [
+        {"id": i, "x": cell % args.width, "y": cell // args.width} for i, cell in enumerate(cells[args.players:])
+    ]
+    state = {"players": players, "coins": coins}
+    agent_ids = list(players)
+
+    backend = "scipy" if linear_sum_assignment is not None else ("numpy" if np is not None else "pure-python")
+    print(f"{args.players} players x {args.coins} coins on {args.width}x{args.height}, backend={backend}")
+    kernels = [
+        ("reference", lambda: _reference_greedy(state, agent_ids)),
+        ("greedy", lambda: assign_coins(state, agent_ids, "greedy")),
+        ("optimal", lambda: assign_coins(state, agent_ids, "optimal")),
+    ]
+    for name, fn in kernels:
+        best = None
+        result = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:>10}: {best * 1000:8.3f} ms  assigned={len(result)} total_distance={_total_distance(state, result)}")
+
+
+if __name__ == "__main__":
+    main()
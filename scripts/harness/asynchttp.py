@@ -0,0 +1,121 @@
+import asyncio
+import json
+import ssl
+import time
+import urllib.parse
+
+
+class AsyncHttpClient:
+    """
+    Minimal asyncio HTTP/1.1 JSON client with keep-alive connection reuse.
+    `concurrency` bounds in-flight requests across all hosts (and therefore open sockets).
+    `observe(method, path, seconds, ok)`, if given, is called after every `json` call.
+    """
+
+    def __init__(self, base_url: str, concurrency: int = 64, timeout: float = 30.0, observe=None):
+        parts = urllib.parse.urlsplit(base_url.rstrip("/"))
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parts.path
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.observe = observe
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._idle = []
+        self.opened = 0
+        self.reused = 0
+        self.requests = 0
+
+    async def _connect(self):
+        self.opened += 1
+        ssl_ctx = ssl.create_default_context() if self.scheme == "https" else None
+        return await asyncio.open_connection(self.host, self.port, ssl=ssl_ctx)
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        parts = status_line.decode("latin-1").split(" ", 2)
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        else:
+            body = await reader.readexactly(int(headers.get("content-length", "0") or 0))
+        keep_alive = headers.get("connection", "").lower() != "close"
+        return status, body, keep_alive
+
+    async def request(self, method: str, path: str, body=None, headers=None):
+        """Returns (status, raw_body_bytes). Raises on transport errors and timeouts."""
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        lines = [
+            f"{method} {self.base_path}{path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: keep-alive",
+            "Content-Type: application/json",
+        ]
+        if body is not None or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(data)}")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        wire = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data
+
+        async with self._sem:
+            self.requests += 1
+            while True:
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await self._connect()
+                try:
+                    writer.write(wire)
+                    await writer.drain()
+                    status, raw, keep_alive = await asyncio.wait_for(self._read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if reused:
+                    self.reused += 1
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, raw
+
+    async def json(self, method: str, path: str, body=None, headers=None):
+        """Same contract as the sync http_json: (status, payload) or RuntimeError on HTTP >= 400."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            status, raw = await self.request(method, path, body=body, headers=headers)
+            payload = raw.decode("utf-8")
+            if status >= 400:
+                raise RuntimeError(f"HTTP {status} {self.base_url}{path}: {payload}")
+            ok = True
+            return status, json.loads(payload) if payload else None
+        finally:
+            if self.observe is not None:
+                self.observe(method, path, time.perf_counter() - started, ok)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _reader, writer in idle:
+            writer.close()
@@ -0,0 +1,285 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CredentialPool:
+    """
+    Background producer that registers agents ahead of the consumer.
+    `specs` is the ordered list of (label, payout_address); `register(payout_address, label)`
+    returns an api_key. Credentials come out in spec order, at most `size` ahead of the consumer.
+    """
+
+    def __init__(self, specs, register, size: int = 16):
+        self._specs = list(specs)
+        self._register = register
+        self._ready = queue.Queue(maxsize=max(1, size))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, name="credential-pool", daemon=True)
+        self.produced = 0
+        self.waited_sec = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._ready.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        for label, payout_address in self._specs:
+            if self._stop.is_set():
+                return
+            try:
+                api_key = self._register(payout_address, label)
+            except Exception as exc:
+                self._put(exc)
+                return
+            if not self._put((label, payout_address, api_key)):
+                return
+            self.produced += 1
+
+    def depth(self) -> int:
+        return self._ready.qsize()
+
+    def ready(self) -> bool:
+        # A dead producer counts as ready so get() surfaces the failure instead of spinning.
+        return self._ready.qsize() > 0 or not self._thread.is_alive()
+
+    def get(self, timeout: float = None):
+        """Block until the next credential is ready; returns (label, payout_address, api_key)."""
+        started = time.time()
+        try:
+            item = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No agent credential ready within {timeout:.0f}s (produced={self.produced})")
+        self.waited_sec += time.time() - started
+        if isinstance(item, Exception):
+            raise RuntimeError(f"Agent registration failed in credential pool: {item}") from item
+        return item
+
+
+class CredentialCache:
+    """
+    On-disk api_key/agent_id store keyed by (api_url, label, payout_address), so repeated
+    harness runs against the same stack can skip PoW + /agents/verify for known agents.
+    Each new entry or recorded join is appended to `<path>.journal` straight away, so a killed run
+    loses nothing; the journal is folded into the main file every `save_every` changes and on
+    flush(). Both files are 0600.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, api_url: str, save_every: int = 500):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.api_url = api_url.rstrip("/")
+        self.save_every = max(1, save_every)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = 0
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    payload = json.load(fh)
+                if payload.get("version") == self.VERSION:
+                    self._entries = dict(payload.get("entries") or {})
+            except (OSError, ValueError):
+                self._entries = {}
+        self._replay_journal()
+        self._by_api_key = {e.get("api_key"): k for k, e in self._entries.items()}
+
+    def _key(self, label: str, payout_address: str) -> str:
+        return f"{self.api_url}|{label}|{payout_address.strip().lower()}"
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as fh:
+                lines = fh.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                key, entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a killed run
+            self._entries[key] = entry
+            self._dirty += 1
+
+    def _journal_locked(self, key: str):
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        with os.fdopen(fd, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps([key, self._entries[key]], sort_keys=True) + "\n")
+        self._dirty += 1
+        if self._dirty >= self.save_every:
+            self._save_locked()
+
+    def _save_locked(self):
+        tmp = f"{self.path}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"version": self.VERSION, "entries": self._entries}, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+        try:
+            os.unlink(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._dirty = 0
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def lookup(self, label: str, payout_address: str):
+        with self._lock:
+            entry = self._entries.get(self._key(label, payout_address))
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def store(self, label: str, payout_address: str, api_key: str, agent_id: str):
+        with self._lock:
+            self._entries[self._key(label, payout_address)] = {
+                "api_url": self.api_url,
+                "label": label,
+                "payout_address": payout_address,
+                "api_key": api_key,
+                "agent_id": agent_id,
+                "stored_at": int(time.time()),
+            }
+            self._by_api_key[api_key] = self._key(label, payout_address)
+            self._journal_locked(self._key(label, payout_address))
+
+    def note_lobby(self, api_key: str, lobby_id: str):
+        """Remember the lobby a cached agent joined, so the next run can take it back out."""
+        with self._lock:
+            key = self._by_api_key.get(api_key)
+            entry = self._entries.get(key)
+            if entry and entry.get("lobby_id") != lobby_id:
+                entry["lobby_id"] = lobby_id
+                self._journal_locked(key)
+
+    def agents(self):
+        """{agent_id: api_key} for this api_url."""
+        with self._lock:
+            return {
+                str(e.get("agent_id", "")): e["api_key"]
+                for e in self._entries.values()
+                if e.get("api_url") == self.api_url
+            }
+
+    def joined_lobbies(self):
+        """{api_key: lobby_id} for entries that recorded a join."""
+        with self._lock:
+            return {
+                e["api_key"]: e["lobby_id"]
+                for e in self._entries.values()
+                if e.get("api_url") == self.api_url and e.get("lobby_id")
+            }
+
+    def forget_lobbies(self, lobby_ids):
+        """Clear the recorded join for agents whose lobby was seen to finish."""
+        lobby_ids = set(lobby_ids)
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.get("lobby_id") in lobby_ids:
+                    del entry["lobby_id"]
+                    self._dirty += 1
+
+    def drop(self, api_keys):
+        api_keys = set(api_keys)
+        if not api_keys:
+            return
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.get("api_key") in api_keys:
+                    del self._entries[key]
+                    self._by_api_key.pop(entry.get("api_key"), None)
+            self._save_locked()
+
+    def release(self, memberships, leave, workers: int = 16):
+        """
+        Take cached agents out of lobbies they are still JOINED in: `memberships` is
+        [(api_key, lobby_id)], `leave(api_key, lobby_id)` returns once the agent is out (or was
+        never in) and raises otherwise. Agents that could not leave are dropped from the cache so
+        they are never handed out again. Returns (released, dropped).
+        """
+        if not memberships:
+            return 0, 0
+
+        def attempt(item):
+            api_key, lobby_id = item
+            try:
+                leave(api_key, lobby_id)
+                return api_key, True
+            except Exception:
+                return api_key, False
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(attempt, memberships))
+
+        released = {api_key for api_key, ok in results if ok}
+        failed = {api_key for api_key, ok in results if not ok}
+        with self._lock:
+            for api_key in released:
+                entry = self._entries.get(self._by_api_key.get(api_key))
+                if entry:
+                    entry.pop("lobby_id", None)
+            self._save_locked()
+        self.drop(failed)
+        return len(released), len(failed)
+
+    def validate(self, fetch_me, workers: int = 16):
+        """
+        Check every entry for this api_url concurrently with `fetch_me(api_key)` (returns the
+        /agents/me payload or None). Drops entries whose key was rejected or whose agent no
+        longer matches; a failed check (timeout, 5xx) keeps the entry. Returns (kept, dropped).
+        """
+        with self._lock:
+            mine = [(k, e) for k, e in self._entries.items() if e.get("api_url") == self.api_url]
+        if not mine:
+            return 0, 0
+
+        def check(item):
+            key, entry = item
+            try:
+                me = fetch_me(entry["api_key"])
+            except Exception:
+                return key, True
+            if not me or str(me.get("id", "")) != str(entry.get("agent_id", "")):
+                return key, False
+            if str(me.get("status", "ACTIVE")).upper() != "ACTIVE":
+                return key, False
+            address = str(me.get("payout_address") or "").strip().lower()
+            return key, address == str(entry.get("payout_address", "")).strip().lower()
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(check, mine))
+
+        dropped = [key for key, ok in results if not ok]
+        if dropped:
+            with self._lock:
+                for key in dropped:
+                    entry = self._entries.pop(key, None)
+                    if entry:
+                        self._by_api_key.pop(entry.get("api_key"), None)
+                self._save_locked()
+        return len(results) - len(dropped), len(dropped)
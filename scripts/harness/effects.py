@@ -0,0 +1,121 @@
+import threading
+
+from harness.latency import LatencyHistogram
+
+
+def _tick_percentile(counts, pct: float) -> int:
+    total = sum(counts.values())
+    if not total:
+        return 0
+    rank = max(1, int(round(pct / 100.0 * total + 0.4999)))
+    seen = 0
+    for ticks in sorted(counts):
+        seen += counts[ticks]
+        if seen >= rank:
+            return ticks
+    return max(counts)
+
+
+class EffectStats:
+    """Input-to-effect distribution for one lobby (or all of them): ms histogram + tick counts."""
+
+    __slots__ = ("ms", "ticks", "no_effect", "lost")
+
+    def __init__(self):
+        self.ms = LatencyHistogram()
+        self.ticks = {}  # ticks until visible -> inputs
+        self.no_effect = 0  # replaced by the runner's next input before anything moved (blocked/dropped)
+        self.lost = 0  # nothing visible within max_ticks
+
+    def add(self, seconds: float, ticks: int):
+        self.ms.record(seconds)
+        self.ticks[ticks] = self.ticks.get(ticks, 0) + 1
+
+    def merge(self, other):
+        self.ms.merge(other.ms)
+        for ticks, count in other.ticks.items():
+            self.ticks[ticks] = self.ticks.get(ticks, 0) + count
+        self.no_effect += other.no_effect
+        self.lost += other.lost
+
+    def summary(self) -> str:
+        ms = self.ms
+        return (
+            f"n={ms.count} p50={ms.percentile(50) / 1000:.1f}ms p95={ms.percentile(95) / 1000:.1f}ms "
+            f"p99={ms.percentile(99) / 1000:.1f}ms max={ms.max_us / 1000:.1f}ms "
+            f"ticks p50={_tick_percentile(self.ticks, 50)} p95={_tick_percentile(self.ticks, 95)} "
+            f"max={max(self.ticks) if self.ticks else 0} no_effect={self.no_effect} lost={self.lost}"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "ms": self.ms.to_dict(),
+            "ticks": {str(t): n for t, n in sorted(self.ticks.items())},
+            "no_effect": self.no_effect,
+            "lost": self.lost,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        stats = cls()
+        stats.ms = LatencyHistogram.from_dict(data.get("ms") or {})
+        stats.ticks = {int(t): int(n) for t, n in (data.get("ticks") or {}).items()}
+        stats.no_effect = int(data.get("no_effect", 0))
+        stats.lost = int(data.get("lost", 0))
+        return stats
+
+
+class InputEffectTracker:
+    """
+    Time from POST /lobbies/{id}/input until lobby state shows the player somewhere else.
+    `sent` remembers (send time, tick the input was planned on, position then) per agent; `observe`
+    resolves it on the first newer state where the position changed. An input the runner replaces
+    before that counts as no_effect; one still unresolved after `max_ticks` ticks as lost.
+    """
+
+    def __init__(self, max_ticks: int = 20):
+        self.max_ticks = max_ticks
+        self._lock = threading.Lock()
+        self._pending = {}  # lobby_id -> {agent_id: (sent_at, tick, pos)}
+        self._stats = {}  # lobby_id -> EffectStats
+
+    def _lobby(self, lobby_id: str):
+        stats = self._stats.get(lobby_id)
+        if stats is None:
+            stats = self._stats[lobby_id] = EffectStats()
+        return stats
+
+    def sent(self, lobby_id: str, agent_id: str, tick: int, pos, sent_at: float):
+        with self._lock:
+            pending = self._pending.setdefault(lobby_id, {})
+            if agent_id in pending:
+                self._lobby(lobby_id).no_effect += 1
+            pending[agent_id] = (sent_at, tick, pos)
+
+    def observe(self, lobby_id: str, tick: int, positions, seen_at: float):
+        """Resolve pending inputs against a state at `tick` (positions: agent_id -> (x, y))."""
+        with self._lock:
+            pending = self._pending.get(lobby_id)
+            if not pending:
+                return
+            stats = self._lobby(lobby_id)
+            for agent_id, (sent_at, sent_tick, pos) in list(pending.items()):
+                if tick <= sent_tick:
+                    continue
+                now_pos = positions.get(agent_id)
+                if now_pos is not None and now_pos != pos:
+                    stats.add(max(0.0, seen_at - sent_at), tick - sent_tick)
+                    del pending[agent_id]
+                elif tick - sent_tick > self.max_ticks:
+                    stats.lost += 1
+                    del pending[agent_id]
+
+    def lobbies(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def total(self):
+        total = EffectStats()
+        for stats in self.lobbies().values():
+            total.merge(stats)
+        return total
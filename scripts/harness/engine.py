@@ -0,0 +1,466 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+from harness.ticks import parse_iso_epoch
+
+# Mirrors apps/game-server/src/state: rng.ts nextRandom and engine.ts pickEmptyCell / initLobbyState /
+# stepLobbyState. Keep the two in step: scripts/tests/test_engine_parity.py and engine.test.ts replay
+# apps/game-server/test/fixtures/engine-recording.jsonl, and `python3 -m harness.engine parity <file>`
+# diffs a live recording tick by tick.
+
+_DELTAS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+# Grid cell flags.
+PLAYER = 1
+COIN = 2
+
+
+def next_random(seed: int):
+    """One LCG step: (float in [0, 1), next state)."""
+    nxt = (seed * 1664525 + 1013904223) & 0xFFFFFFFF
+    return nxt / 4294967296, nxt
+
+
+def pick_empty_cell(width: int, height: int, grid, rng_state: int, max_attempts: int = 200):
+    """(x, y, rng_state) of a cell whose `grid` entry is 0, or None after `max_attempts` draws."""
+    state = rng_state
+    for _ in range(max_attempts):
+        rand, state = next_random(state)
+        x = int(rand * width)
+        rand, state = next_random(state)
+        y = int(rand * height)
+        if not grid[y * width + x]:
+            return x, y, state
+    return None
+
+
+class Player:
+    __slots__ = ("x", "y", "direction", "score")
+
+    def __init__(self, x: int, y: int, direction: str = "up", score: int = 0):
+        self.x = x
+        self.y = y
+        self.direction = direction
+        self.score = score
+
+
+class LobbySim:
+    """
+    One lobby's match state on a flat bytearray grid (PLAYER/COIN flags per cell).
+    `step` applies one tick exactly like stepLobbyState; `to_state` renders the server's JSON shape.
+    """
+
+    __slots__ = (
+        "lobby_id", "width", "height", "tick_rate", "duration_sec", "coins_per_match", "started_at",
+        "ends_at", "status", "tick", "updated_at", "players", "coins", "coins_spawned", "next_coin_id",
+        "spawn_accumulator", "rng_state", "grid", "_ends_epoch", "_started_epoch",
+    )
+
+    def __init__(self, config):
+        self.lobby_id = config.get("lobby_id", "sim")
+        self.width = int(config["width"])
+        self.height = int(config["height"])
+        self.tick_rate = config["tick_rate"]
+        self.duration_sec = config["duration_sec"]
+        self.coins_per_match = config["coins_per_match"]
+        self.started_at = config.get("started_at") or "1970-01-01T00:00:00.000Z"
+        self._started_epoch = parse_iso_epoch(self.started_at) or 0.0
+        self._ends_epoch = self._started_epoch + self.duration_sec
+        self.ends_at = None
+        self.status = "ACTIVE"
+        self.tick = 0
+        self.updated_at = None
+        self.players = {}
+        self.coins = []  # [[id, x, y], ...] in spawn order
+        self.coins_spawned = 0
+        self.next_coin_id = 1
+        self.spawn_accumulator = 1
+        self.rng_state = int(config.get("seed", 0)) & 0xFFFFFFFF
+        self.grid = bytearray(self.width * self.height)
+
+    @classmethod
+    def start(cls, config, agent_ids):
+        """initLobbyState: place each agent on a random empty cell drawn from the seed."""
+        sim = cls(config)
+        for agent_id in agent_ids:
+            cell = pick_empty_cell(sim.width, sim.height, sim.grid, sim.rng_state)
+            if cell is None:
+                break
+            x, y, sim.rng_state = cell
+            sim.players[agent_id] = Player(x, y)
+            sim.grid[y * sim.width + x] |= PLAYER
+        return sim
+
+    @classmethod
+    def from_state(cls, state, config):
+        sim = cls(config)
+        sim.lobby_id = state.get("lobby_id", sim.lobby_id)
+        sim.width = int(state["width"])
+        sim.height = int(state["height"])
+        sim.grid = bytearray(sim.width * sim.height)
+        sim.status = state.get("status", "ACTIVE")
+        sim.tick = int(state["tick"])
+        sim.tick_rate = state.get("tick_rate", sim.tick_rate)
+        sim.started_at = state.get("started_at", sim.started_at)
+        sim.ends_at = state.get("ends_at")
+        ends = parse_iso_epoch(sim.ends_at)
+        if ends is not None:
+            sim._ends_epoch = ends
+        sim.updated_at = state.get("updated_at")
+        for agent_id, p in (state.get("players") or {}).items():
+            sim.players[agent_id] = Player(int(p["x"]), int(p["y"]), p.get("direction", "up"), int(p.get("score", 0)))
+            sim.grid[int(p["y"]) * sim.width + int(p["x"])] |= PLAYER
+        for coin in state.get("coins") or []:
+            sim.coins.append([int(coin["id"]), int(coin["x"]), int(coin["y"])])
+            sim.grid[int(coin["y"]) * sim.width + int(coin["x"])] |= COIN
+        sim.coins_spawned = int(state.get("coins_spawned", 0))
+        sim.next_coin_id = int(state.get("next_coin_id", 1))
+        sim.spawn_accumulator = state.get("spawn_accumulator", 1)
+        sim.rng_state = int(state.get("rng_state", 0))
+        return sim
+
+    def to_state(self):
+        return {
+            "lobby_id": self.lobby_id,
+            "status": self.status,
+            "tick": self.tick,
+            "tick_rate": self.tick_rate,
+            "width": self.width,
+            "height": self.height,
+            "started_at": self.started_at,
+            "ends_at": self.ends_at,
+            "updated_at": self.updated_at,
+            "players": {
+                aid: {"x": p.x, "y": p.y, "direction": p.direction, "score": p.score} for aid, p in self.players.items()
+            },
+            "coins": [{"id": cid, "x": x, "y": y} for cid, x, y in self.coins],
+            "coins_spawned": self.coins_spawned,
+            "next_coin_id": self.next_coin_id,
+            "spawn_accumulator": self.spawn_accumulator,
+            "rng_state": self.rng_state,
+        }
+
+    def remove_player(self, agent_id: str):
+        p = self.players.pop(agent_id, None)
+        if p is not None:
+            self.grid[p.y * self.width + p.x] &= ~PLAYER
+
+    def step(self, inputs, now: float = None):
+        """
+        Advance one tick. `inputs` is [(agent_id, direction), ...] in arrival order; `now` (epoch
+        seconds) decides FINISHED and defaults to the tick's nominal time.
+        Returns the number of coins collected this tick.
+        """
+        width = self.width
+        height = self.height
+        grid = self.grid
+        players = self.players
+        self.tick += 1
+        if now is None:
+            now = self._started_epoch + self.tick / self.tick_rate
+
+        moved = set()
+        for agent_id, direction in inputs:
+            if agent_id in moved:
+                continue
+            p = players.get(agent_id)
+            if p is None:
+                continue
+            moved.add(agent_id)
+            dx, dy = _DELTAS.get(direction, (0, 0))
+            nx = min(max(p.x + dx, 0), width - 1)
+            ny = min(max(p.y + dy, 0), height - 1)
+            target = ny * width + nx
+            if grid[target] & PLAYER:
+                continue
+            grid[p.y * width + p.x] &= ~PLAYER
+            grid[target] |= PLAYER
+            p.x = nx
+            p.y = ny
+            p.direction = direction
+
+        collected = 0
+        if self.coins:
+            owner_by_cell = None
+            remaining = []
+            for coin in self.coins:
+                idx = coin[2] * width + coin[1]
+                if grid[idx] & PLAYER:
+                    if owner_by_cell is None:
+                        owner_by_cell = {q.y * width + q.x: q for q in players.values()}
+                    owner_by_cell[idx].score += 1
+                    grid[idx] &= ~COIN
+                    collected += 1
+                else:
+                    remaining.append(coin)
+            self.coins = remaining
+
+        self.spawn_accumulator += (self.coins_per_match / self.duration_sec) / self.tick_rate
+        while self.spawn_accumulator >= 1 and self.coins_spawned < self.coins_per_match:
+            cell = pick_empty_cell(width, height, grid, self.rng_state)
+            if cell is None:
+                break
+            x, y, self.rng_state = cell
+            self.coins.append([self.next_coin_id, x, y])
+            grid[y * width + x] |= COIN
+            self.next_coin_id += 1
+            self.coins_spawned += 1
+            self.spawn_accumulator -= 1
+
+        if now >= self._ends_epoch:
+            self.status = "FINISHED"
+        return collected
+
+
+# Recorded states don't carry the inputs; rebuild them from what changed between two ticks.
+def infer_inputs(prev, curr):
+    """
+    [(agent_id, direction), ...] that turn `prev`'s positions into `curr`'s, ordered so a runner
+    stepping into a cell vacated the same tick comes after the runner that left it.
+    """
+    prev_players = prev.get("players") or {}
+    curr_players = curr.get("players") or {}
+    occupied = {(int(p["x"]), int(p["y"])) for aid, p in prev_players.items() if aid in curr_players}
+    pending = []
+    for aid, p in curr_players.items():
+        before = prev_players.get(aid)
+        if before and (int(before["x"]), int(before["y"])) != (int(p["x"]), int(p["y"])):
+            pending.append((aid, p["direction"], (int(before["x"]), int(before["y"])), (int(p["x"]), int(p["y"]))))
+    ordered = []
+    while pending:
+        blocked = []
+        for item in pending:
+            _aid, _direction, src, dst = item
+            if dst in occupied:
+                blocked.append(item)
+                continue
+            occupied.discard(src)
+            occupied.add(dst)
+            ordered.append(item[:2])
+        if len(blocked) == len(pending):
+            ordered.extend(item[:2] for item in blocked)
+            break
+        pending = blocked
+    return ordered
+
+
+_PARITY_FIELDS = ("status", "tick", "players", "coins", "coins_spawned", "next_coin_id", "spawn_accumulator", "rng_state")
+
+
+def check_parity(config, states):
+    """Replay consecutive recorded ticks; returns (ticks_checked, [mismatch descriptions])."""
+    checked = 0
+    mismatches = []
+    for prev, curr in zip(states, states[1:]):
+        if int(curr["tick"]) != int(prev["tick"]) + 1 or prev.get("status") == "FINISHED":
+            continue
+        sim = LobbySim.from_state(prev, config)
+        for agent_id in list(sim.players):
+            if agent_id not in (curr.get("players") or {}):
+                sim.remove_player(agent_id)
+        sim.step(infer_inputs(prev, curr), parse_iso_epoch(curr.get("updated_at")))
+        got = sim.to_state()
+        checked += 1
+        for field in _PARITY_FIELDS:
+            if got[field] != curr.get(field):
+                mismatches.append(f"tick {curr['tick']}: {field} expected {curr.get(field)!r} got {got[field]!r}")
+    return checked, mismatches
+
+
+def record(args):
+    from harness.redisclient import RedisClient
+
+    client = RedisClient(args.redis_host, args.redis_port)
+    keys = [f"lobby:{args.lobby_id}:config", f"lobby:{args.lobby_id}:state"]
+    last_tick = None
+    written = 0
+    deadline = time.time() + args.timeout
+    with open(args.file, "w", encoding="utf-8") as out:
+        while time.time() < deadline:
+            raw_config, raw_state = client.mget(keys)
+            if raw_state:
+                state = json.loads(raw_state)
+                if state.get("tick") != last_tick:
+                    if written == 0:
+                        out.write(json.dumps({"config": json.loads(raw_config) if raw_config else None}) + "\n")
+                    out.write(raw_state + "\n")
+                    written += 1
+                    last_tick = state.get("tick")
+                if state.get("status") == "FINISHED":
+                    break
+            time.sleep(args.poll_ms / 1000.0)
+    client.close()
+    print(f"Recorded {written} states to {args.file}")
+
+
+def parity(args):
+    config = None
+    states = []
+    with open(args.file, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if "config" in row and "tick" not in row:
+                config = row["config"]
+            else:
+                states.append(row)
+    if not states:
+        raise RuntimeError(f"No states in {args.file}")
+    if not config:
+        raise RuntimeError(f"No lobby config in {args.file}; record with `python3 -m harness.engine record`")
+    checked, mismatches = check_parity(config, states)
+    for line in mismatches[:20]:
+        print(line)
+    print(f"Parity: ticks_checked={checked} mismatches={len(mismatches)}")
+    if mismatches or not checked:
+        sys.exit(1)
+
+
+def _greedy_moves(sim, assignments):
+    # The harness's old one-step heuristic: head for the coin, skip tiles that are taken right now.
+    grid = sim.grid
+    width = sim.width
+    out = []
+    for aid, p in sim.players.items():
+        target = assignments.get(aid)
+        if target is None:
+            continue
+        tx, ty, _cid = target
+        dx = tx - p.x
+        dy = ty - p.y
+        order = []
+        if abs(dx) >= abs(dy):
+            order += (["right"] if dx > 0 else ["left"] if dx < 0 else []) + (["down"] if dy > 0 else ["up"] if dy < 0 else [])
+        else:
+            order += (["down"] if dy > 0 else ["up"] if dy < 0 else []) + (["right"] if dx > 0 else ["left"] if dx < 0 else [])
+        for d in order:
+            mx, my = _DELTAS[d]
+            nx, ny = p.x + mx, p.y + my
+            if 0 <= nx < width and 0 <= ny < sim.height and not grid[ny * width + nx] & PLAYER:
+                out.append((aid, d))
+                break
+        else:
+            if order:
+                out.append((aid, order[0]))
+    return out
+
+
+def _cooperative_moves(sim, assignments):
+    from harness.planner import CooperativePlanner
+
+    positions = {aid: (p.x, p.y) for aid, p in sim.players.items()}
+    movers = [aid for aid in sim.players if aid in assignments]
+    movers.sort(key=lambda aid: abs(assignments[aid][0] - positions[aid][0]) + abs(assignments[aid][1] - positions[aid][1]))
+    planner = CooperativePlanner(sim.width, sim.height, positions, movers)
+    out = []
+    for aid in movers:
+        direction = planner.plan(aid, assignments[aid][:2])
+        if direction:
+            out.append((aid, direction))
+    return out
+
+
+STRATEGIES = {
+    "idle": lambda sim, assignments: [],
+    "greedy": _greedy_moves,
+    "cooperative": _cooperative_moves,
+}
+
+
+def simulate(config, players: int, strategy: str, assign_method: str = "greedy"):
+    """One headless match. Returns dict(ticks, coins, inputs, blocked, pickup_ticks)."""
+    from harness.assign import assign_points
+
+    sim = LobbySim.start(config, [f"p{i}" for i in range(players)])
+    choose = STRATEGIES[strategy]
+    spawned_at = {}
+    ticks = inputs_sent = blocked = collected = pickup_ticks = 0
+    while sim.status != "FINISHED":
+        assignments = {}
+        if sim.coins and strategy != "idle":
+            agents = [(aid, p.x, p.y) for aid, p in sim.players.items()]
+            assignments = assign_points(agents, sim.coins, assign_method)
+        moves = choose(sim, assignments)
+        before = {aid: (sim.players[aid].x, sim.players[aid].y) for aid, _d in moves}
+        on_board = {coin[0] for coin in sim.coins}
+        if sim.step(moves):
+            remaining = {coin[0] for coin in sim.coins}
+            for cid in on_board - remaining:
+                collected += 1
+                pickup_ticks += sim.tick - spawned_at.pop(cid)
+        for coin in sim.coins:
+            spawned_at.setdefault(coin[0], sim.tick)
+        inputs_sent += len(moves)
+        blocked += sum(1 for aid, _d in moves if (sim.players[aid].x, sim.players[aid].y) == before[aid])
+        ticks += 1
+    return {"ticks": ticks, "coins": collected, "inputs": inputs_sent, "blocked": blocked, "pickup_ticks": pickup_ticks}
+
+
+def bench(args):
+    rng = random.Random(args.seed)
+    base = {
+        "width": args.width,
+        "height": args.height,
+        "tick_rate": args.tick_rate,
+        "duration_sec": args.duration,
+        "coins_per_match": args.coins,
+    }
+    for strategy in args.strategies.split(","):
+        totals = {"ticks": 0, "coins": 0, "inputs": 0, "blocked": 0, "pickup_ticks": 0}
+        started = time.perf_counter()
+        for _ in range(args.matches):
+            config = dict(base, seed=rng.randrange(1 << 31))
+            for key, value in simulate(config, args.players, strategy, args.assign).items():
+                totals[key] += value
+        elapsed = time.perf_counter() - started
+        print(
+            f"{strategy:>12}: {args.matches / elapsed:8.1f} matches/s {totals['ticks'] / elapsed:10.0f} ticks/s "
+            f"coins/match={totals['coins'] / args.matches:.2f} "
+            f"coins_per_100_ticks={100.0 * totals['coins'] / max(1, totals['ticks']):.2f} "
+            f"ticks_to_pickup={totals['pickup_ticks'] / max(1, totals['coins']):.1f} "
+            f"blocked={totals['blocked'] / max(1, totals['inputs']):.1%}"
+        )
+
+
+def main():
+    # `cd scripts && python3 -m harness.engine bench --matches 200`
+    parser = argparse.ArgumentParser(description="Offline replica of the game-server engine")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_bench = sub.add_parser("bench", help="simulate matches headless and compare movement strategies")
+    p_bench.add_argument("--matches", type=int, default=100)
+    p_bench.add_argument("--players", type=int, default=4)
+    p_bench.add_argument("--width", type=int, default=100)
+    p_bench.add_argument("--height", type=int, default=56)
+    p_bench.add_argument("--tick-rate", type=int, default=10)
+    p_bench.add_argument("--duration", type=int, default=60)
+    p_bench.add_argument("--coins", type=int, default=10)
+    p_bench.add_argument("--strategies", default="idle,greedy,cooperative")
+    p_bench.add_argument("--assign", default="greedy")
+    p_bench.add_argument("--seed", type=int, default=1)
+    p_bench.set_defaults(func=bench)
+
+    p_record = sub.add_parser("record", help="record a live lobby's states from Redis to JSONL")
+    p_record.add_argument("lobby_id")
+    p_record.add_argument("file")
+    p_record.add_argument("--redis-host", default="localhost")
+    p_record.add_argument("--redis-port", type=int, default=6379)
+    p_record.add_argument("--poll-ms", type=float, default=10)
+    p_record.add_argument("--timeout", type=float, default=600)
+    p_record.set_defaults(func=record)
+
+    p_parity = sub.add_parser("parity", help="replay a recording tick by tick and diff against the server")
+    p_parity.add_argument("file")
+    p_parity.set_defaults(func=parity)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import http.client
+import queue
+import select
+import socket
+import threading
+import urllib.parse
+
+# Errors that mean a reused keep-alive socket was closed by the server under us.
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+# Once a request has been written, only these are replayed after a stale-socket error: the server
+# may already have acted on anything else (a PoW verify, a payout, a game input, an RPC call).
+_IDEMPOTENT = frozenset(("GET", "HEAD"))
+
+
+class HttpPool:
+    """
+    Persistent HTTP/1.1 connections, one bounded idle pool per (scheme, host, port).
+    Safe to share between threads; a connection is owned by one request at a time.
+    """
+
+    def __init__(self, max_per_host: int = 32, timeout: float = 30.0):
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.opened = 0
+        self.reused = 0
+        self.stale = 0
+        self.discarded = 0
+
+    def _idle_for(self, origin):
+        with self._lock:
+            pool = self._idle.get(origin)
+            if pool is None:
+                pool = queue.LifoQueue(maxsize=self.max_per_host)
+                self._idle[origin] = pool
+            return pool
+
+    def _connect(self, origin, timeout: float):
+        scheme, host, port = origin
+        with self._lock:
+            self.opened += 1
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        conn.connect()
+        # Small JSON requests on a long-lived socket: don't let Nagle hold them back.
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    @staticmethod
+    def _dropped(conn) -> bool:
+        """True when an idle socket can't take another request: it is readable, so the server closed it."""
+        if conn.sock is None:
+            return True
+        try:
+            readable, _w, _x = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _checkout(self, origin, timeout: float):
+        idle = self._idle_for(origin)
+        while True:
+            try:
+                conn = idle.get_nowait()
+            except queue.Empty:
+                return self._connect(origin, timeout), False
+            if not self._dropped(conn):
+                break
+            with self._lock:
+                self.stale += 1
+            conn.close()
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.timeout = timeout
+        return conn, True
+
+    def _checkin(self, origin, conn, resp):
+        if resp.will_close:
+            conn.close()
+            return
+        try:
+            self._idle_for(origin).put_nowait(conn)
+        except queue.Full:
+            with self._lock:
+                self.discarded += 1
+            conn.close()
+
+    def request(self, method: str, url: str, body: bytes = None, headers=None, timeout: float = None):
+        """
+        Returns (status, body_bytes). Transport errors propagate as OSError/http.client errors.
+        A reused socket that fails while the request is being written is retried on another one;
+        a failure after that is retried only for GET/HEAD.
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        origin = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        timeout = self.timeout if timeout is None else timeout
+
+        while True:
+            conn, reused = self._checkout(origin, timeout)
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                sent = True
+                resp = conn.getresponse()
+                payload = resp.read()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused and (not sent or method.upper() in _IDEMPOTENT):
+                    # Idle socket went away under us; retry on the next idle or a fresh connection.
+                    with self._lock:
+                        self.stale += 1
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if reused:
+                with self._lock:
+                    self.reused += 1
+            self._checkin(origin, conn, resp)
+            return resp.status, payload
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle = sum(pool.qsize() for pool in self._idle.values())
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "stale": self.stale,
+                "discarded": self.discarded,
+                "idle": idle,
+            }
+
+    def close(self):
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle = {}
+        for pool in pools:
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
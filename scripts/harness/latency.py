@@ -0,0 +1,202 @@
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Log-linear buckets over microseconds, HDR-style: values below 2**SUB_BITS are exact, above that
+# every power of two is split into 2**(SUB_BITS - 1) equal buckets (~1.6% worst-case error).
+SUB_BITS = 7
+_SUB_COUNT = 1 << SUB_BITS
+_HALF = _SUB_COUNT >> 1
+
+_ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+|0x[0-9a-fA-F]+)$"
+)
+
+
+def route_template(path: str) -> str:
+    """`/lobbies/<uuid>/input?x=1` -> `/lobbies/:id/input`, so per-lobby calls share one series."""
+    parts = path.split("?", 1)[0].split("/")
+    out = []
+    for i, part in enumerate(parts):
+        if i and parts[i - 1] == "by-watch-code":
+            out.append(":code")
+        else:
+            out.append(":id" if _ID_SEGMENT.match(part) else part)
+    return "/".join(out)
+
+
+def bucket_index(micros: int) -> int:
+    if micros < _SUB_COUNT:
+        return max(0, micros)
+    shift = micros.bit_length() - SUB_BITS
+    return _SUB_COUNT + (shift - 1) * _HALF + ((micros >> shift) - _HALF)
+
+
+def bucket_upper(index: int) -> int:
+    """Largest value (microseconds) that lands in bucket `index`."""
+    if index < _SUB_COUNT:
+        return index
+    shift, offset = divmod(index - _SUB_COUNT, _HALF)
+    shift += 1
+    return ((offset + _HALF + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Counts per log-linear bucket plus exact count/sum/max and an error tally; not thread-safe."""
+
+    __slots__ = ("buckets", "count", "errors", "total_us", "max_us")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.errors = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float, ok: bool = True):
+        micros = max(0, int(seconds * 1_000_000))
+        index = bucket_index(micros)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_us += micros
+        if micros > self.max_us:
+            self.max_us = micros
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> int:
+        """Upper bound (microseconds) of the bucket holding the pct-th percentile value."""
+        if not self.count:
+            return 0
+        rank = max(1, int(round(pct / 100.0 * self.count + 0.4999)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(bucket_upper(index), self.max_us)
+        return self.max_us
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.errors += other.errors
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_us": self.total_us,
+            "max_us": self.max_us,
+            "buckets": {str(index): count for index, count in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        hist = cls()
+        hist.count = int(data.get("count", 0))
+        hist.errors = int(data.get("errors", 0))
+        hist.total_us = int(data.get("total_us", 0))
+        hist.max_us = int(data.get("max_us", 0))
+        hist.buckets = {int(index): int(count) for index, count in (data.get("buckets") or {}).items()}
+        return hist
+
+
+class LatencyRecorder:
+    """
+    Thread-safe set of histograms keyed by (kind, name), e.g. ("http", "POST /lobbies/:id/input")
+    or ("sql", "SELECT"). Throughput is measured over the wall time since the first call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self.started_at = None
+        self.last_at = None
+
+    def record(self, kind: str, name: str, seconds: float, ok: bool = True):
+        now = time.time()
+        with self._lock:
+            hist = self._series.get((kind, name))
+            if hist is None:
+                hist = self._series[(kind, name)] = LatencyHistogram()
+            hist.record(seconds, ok)
+            if self.started_at is None:
+                self.started_at = now - seconds
+            self.last_at = now
+
+    @contextmanager
+    def timed(self, kind: str, name: str):
+        """Record the wrapped block's duration; an exception counts as an error and propagates."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(kind, name, time.perf_counter() - started, ok)
+
+    def wall_sec(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return max(1e-9, self.last_at - self.started_at)
+
+    def rows(self):
+        """[(kind, name, histogram)] sorted by kind, then by call count (busiest first)."""
+        with self._lock:
+            items = list(self._series.items())
+        items.sort(key=lambda item: (item[0][0], -item[1].count, item[0][1]))
+        return [(kind, name, hist) for (kind, name), hist in items]
+
+    def report_lines(self):
+        wall = self.wall_sec()
+        lines = []
+        for kind, name, hist in self.rows():
+            lines.append(
+                f"{kind:<5} {name:<36} n={hist.count:<7d} err={hist.errors:<5d} "
+                f"rps={hist.count / wall if wall else 0.0:8.1f} "
+                f"p50={hist.percentile(50) / 1000:8.2f}ms p95={hist.percentile(95) / 1000:8.2f}ms "
+                f"p99={hist.percentile(99) / 1000:8.2f}ms max={hist.max_us / 1000:8.2f}ms"
+            )
+        return lines
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_sec": self.wall_sec(),
+            "series": [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "p50_ms": hist.percentile(50) / 1000,
+                    "p95_ms": hist.percentile(95) / 1000,
+                    "p99_ms": hist.percentile(99) / 1000,
+                    "max_ms": hist.max_us / 1000,
+                    **hist.to_dict(),
+                }
+                for kind, name, hist in self.rows()
+            ],
+        }
+
+    def merge_dict(self, data: dict):
+        """Fold in another recorder's to_dict() (e.g. a scale worker's) as if its calls were ours."""
+        wall = float(data.get("wall_sec", 0.0) or 0.0)
+        with self._lock:
+            for row in data.get("series") or []:
+                key = (row["kind"], row["name"])
+                hist = self._series.get(key)
+                if hist is None:
+                    hist = self._series[key] = LatencyHistogram()
+                hist.merge(LatencyHistogram.from_dict(row))
+            # Workers run side by side: keep the longest wall time rather than adding them up.
+            if wall and (self.started_at is None or self.last_at - self.started_at < wall):
+                now = time.time()
+                self.started_at = now - wall
+                self.last_at = now
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, indent=1)
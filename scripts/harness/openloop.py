@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+from harness.latency import LatencyHistogram
+
+RAMPS = ("none", "step", "linear")
+# Never schedule slower than this, so a ramp starting at 0 still makes progress.
+MIN_RATE = 0.5
+
+
+def ramp_rate(profile: str, target: float, start: float, ramp_sec: float, steps: int, elapsed: float) -> float:
+    """
+    Intended requests/sec `elapsed` seconds into the run. "none" is flat at `target`; "linear" goes
+    from `start` to `target` over `ramp_sec`; "step" climbs in `steps` equal increments, one every
+    ramp_sec / steps, and holds `target` afterwards.
+    """
+    if profile == "none" or ramp_sec <= 0 or elapsed >= ramp_sec:
+        return max(MIN_RATE, target)
+    if profile == "linear":
+        return max(MIN_RATE, start + (target - start) * elapsed / ramp_sec)
+    steps = max(1, steps)
+    level = min(steps, int(elapsed / (ramp_sec / steps)) + 1)
+    return max(MIN_RATE, start + (target - start) * level / steps)
+
+
+class OpenLoopWindow:
+    __slots__ = ("scheduled", "ok", "errors", "skipped", "latency")
+
+    def __init__(self):
+        self.scheduled = 0
+        self.ok = 0
+        self.errors = 0
+        self.skipped = 0  # send slots with no runner ready (counted against the target, never sent)
+        self.latency = LatencyHistogram()
+
+    def merge(self, other):
+        self.scheduled += other.scheduled
+        self.ok += other.ok
+        self.errors += other.errors
+        self.skipped += other.skipped
+        self.latency.merge(other.latency)
+
+
+class OpenLoopStats:
+    """
+    Open-loop results bucketed by *intended* send time into `window_sec` windows. Latency runs from
+    the intended send time to the response, so time spent queued behind a slow API is included
+    rather than silently stretching the schedule (no coordinated omission).
+    """
+
+    def __init__(self, window_sec: float = 5.0):
+        self.window_sec = window_sec
+        self.windows = {}
+
+    def _window(self, offset: float):
+        index = max(0, int(offset // self.window_sec))
+        window = self.windows.get(index)
+        if window is None:
+            window = self.windows[index] = OpenLoopWindow()
+        return window
+
+    def skipped(self, offset: float):
+        window = self._window(offset)
+        window.scheduled += 1
+        window.skipped += 1
+
+    def completed(self, offset: float, latency_sec: float, ok: bool):
+        window = self._window(offset)
+        window.scheduled += 1
+        window.latency.record(latency_sec, ok)
+        if ok:
+            window.ok += 1
+        else:
+            window.errors += 1
+
+    def rows(self):
+        """[(start_sec, target_rps, ok_rps, error_ratio, window)] in time order."""
+        out = []
+        for index in sorted(self.windows):
+            window = self.windows[index]
+            sent = window.ok + window.errors
+            out.append((
+                index * self.window_sec,
+                window.scheduled / self.window_sec,
+                window.ok / self.window_sec,
+                window.errors / sent if sent else 0.0,
+                window,
+            ))
+        return out
+
+    def max_sustainable(self, slo_ms: float, max_error_ratio: float = 0.01, min_delivery: float = 0.95):
+        """Highest window target rate that met the p99 SLO and error budget and delivered ~all of it."""
+        best = None
+        for _start, target, ok_rps, error_ratio, window in self.rows():
+            if not window.latency.count or window.skipped:
+                continue
+            if error_ratio > max_error_ratio or ok_rps < target * min_delivery:
+                continue
+            if window.latency.percentile(99) / 1000 > slo_ms:
+                continue
+            if best is None or target > best:
+                best = target
+        return best
+
+    def to_dict(self) -> dict:
+        return {
+            "window_sec": self.window_sec,
+            "windows": {
+                str(index): {
+                    "scheduled": w.scheduled,
+                    "ok": w.ok,
+                    "errors": w.errors,
+                    "skipped": w.skipped,
+                    "latency": w.latency.to_dict(),
+                }
+                for index, w in sorted(self.windows.items())
+            },
+        }
+
+    def merge_dict(self, data: dict):
+        for index, row in (data.get("windows") or {}).items():
+            other = OpenLoopWindow()
+            other.scheduled = int(row.get("scheduled", 0))
+            other.ok = int(row.get("ok", 0))
+            other.errors = int(row.get("errors", 0))
+            other.skipped = int(row.get("skipped", 0))
+            other.latency = LatencyHistogram.from_dict(row.get("latency") or {})
+            window = self.windows.get(int(index))
+            if window is None:
+                self.windows[int(index)] = other
+            else:
+                window.merge(other)
+
+
+async def run_open_loop(rate_at, next_job, fire, stats: OpenLoopStats, stop):
+    """
+    Fire one job per schedule slot, never waiting for earlier responses. `rate_at(elapsed)` gives the
+    intended rate, `next_job()` the next job (or None when no runner is ready) and `fire(job)` is the
+    coroutine sending it (raises on failure). The clock starts with the first available job.
+    """
+    loop = asyncio.get_running_loop()
+    started = None
+    next_at = None
+    inflight = set()
+
+    async def send(job, intended: float):
+        ok = False
+        try:
+            await fire(job)
+            ok = True
+        except Exception:
+            pass
+        stats.completed(intended - started, time.time() - intended, ok)
+
+    try:
+        while not stop.is_set():
+            now = time.time()
+            if started is None:
+                job = next_job()
+                if job is None:
+                    await asyncio.sleep(0.05)
+                    continue
+                started = next_at = now
+            else:
+                if next_at > now:
+                    await asyncio.sleep(next_at - now)
+                job = next_job()
+            intended = next_at
+            if job is None:
+                stats.skipped(intended - started)
+            else:
+                task = loop.create_task(send(job, intended))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+            next_at = intended + 1.0 / rate_at(intended - started)
+    finally:
+        if inflight:
+            await asyncio.gather(*inflight, return_exceptions=True)
@@ -0,0 +1,162 @@
+import heapq
+
+# Per-agent search budget; past it the agent heads for the closest cell reached so far.
+MAX_EXPANSIONS = 2000
+
+_MOVES = (("up", 0, -1), ("down", 0, 1), ("left", -1, 0), ("right", 1, 0))
+
+
+class CooperativePlanner:
+    """
+    Cooperative space-time A* for every runner of one lobby in one tick.
+
+    The engine applies a tick's inputs one by one in arrival order: a move into a cell that is occupied
+    at that moment is dropped, so a runner can step into a cell vacated earlier in the same tick but
+    not into one whose owner moves later. Runners are planned in the order their inputs will be sent,
+    each against a reservation table of the paths already planned:
+
+    - (cell, t) is unusable if a planned runner is there at t, or enters it at t + 1 (it would be
+      processed first and bounce off us);
+    - on the first step, every runner not planned yet is still on its cell;
+    - with `ordered=False` (inputs may arrive in any order) a cell is also unusable on the step its
+      planned owner leaves it.
+
+    A runner that reaches its goal (or the end of its partial path) parks there. `plan` returns the
+    first direction to send, or None when the runner should hold still this tick.
+    """
+
+    def __init__(self, width: int, height: int, positions, movers, ordered: bool = True, horizon: int = 0):
+        self.width = max(1, int(width))
+        self.height = max(1, int(height))
+        self.ordered = ordered
+        self.horizon = horizon if horizon > 0 else min(64, self.width + self.height)
+        movers = set(movers)
+        self._start = {aid: pos for aid, pos in positions.items() if aid in movers}
+        # Players we never plan (idle runners, other bots) stay where they are.
+        self._static = {pos for aid, pos in positions.items() if aid not in movers}
+        self._unplanned = {}
+        for pos in self._start.values():
+            self._unplanned[pos] = self._unplanned.get(pos, 0) + 1
+        self._reserved = {}  # t -> {cell}
+        self._parked = {}  # cell -> first t the cell stays taken for good
+        self._last_reserved = {}  # cell -> last t with a reservation
+        self.expansions = 0
+        self.waits = 0
+
+    def _taken(self, cell, t: int) -> bool:
+        if cell in self._reserved.get(t, ()):
+            return True
+        parked = self._parked.get(cell)
+        return parked is not None and parked <= t
+
+    def _free(self, cell, t: int) -> bool:
+        return not (self._taken(cell, t) or self._taken(cell, t + 1))
+
+    def _can_enter(self, cell, t: int) -> bool:
+        # Step t -> t + 1 into `cell`.
+        if cell in self._static:
+            return False
+        if t == 0 and cell in self._unplanned:
+            return False
+        if not self.ordered and self._taken(cell, t):
+            return False
+        return self._free(cell, t + 1)
+
+    def _reserve(self, path):
+        for t, cell in enumerate(path):
+            self._reserved.setdefault(t, set()).add(cell)
+            self._last_reserved[cell] = max(t, self._last_reserved.get(cell, -1))
+        end = path[-1]
+        self._parked[end] = min(len(path) - 1, self._parked.get(end, len(path) - 1))
+
+    def _room_within(self, goal, radius: int, start) -> bool:
+        gx, gy = goal
+        for dx in range(-radius, radius + 1):
+            rest = radius - abs(dx)
+            for dy in range(-rest, rest + 1):
+                cell = (gx + dx, gy + dy)
+                if not (0 <= cell[0] < self.width and 0 <= cell[1] < self.height):
+                    continue
+                if cell == start or (cell not in self._static and cell not in self._parked):
+                    return True
+        return False
+
+    def _search(self, start, goal, slack: int):
+        gx, gy = goal
+        width, height = self.width, self.height
+
+        def h(cell):
+            return abs(cell[0] - gx) + abs(cell[1] - gy)
+
+        start_node = (start, 0)
+        parents = {start_node: None}
+        best = start_node
+        best_key = (h(start), 0)
+        heap = [(h(start), 0, 0, start, 0)]
+        counter = 0
+        expansions = 0
+        while heap and expansions < MAX_EXPANSIONS:
+            _f, _neg_t, _n, cell, t = heapq.heappop(heap)
+            expansions += 1
+            dist = h(cell)
+            if dist <= slack and self._last_reserved.get(cell, -1) <= t:
+                best = (cell, t)
+                break
+            if (dist, -t) < best_key:
+                best, best_key = (cell, t), (dist, -t)
+            if t >= self.horizon:
+                continue
+            x, y = cell
+            options = [(cell, None)]
+            for _name, dx, dy in _MOVES:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    options.append(((nx, ny), True))
+            for nxt, is_move in options:
+                node = (nxt, t + 1)
+                if node in parents:
+                    continue
+                if is_move:
+                    if not self._can_enter(nxt, t):
+                        continue
+                elif not self._free(nxt, t + 1):
+                    continue
+                parents[node] = (cell, t)
+                counter += 1
+                heapq.heappush(heap, (t + 1 + h(nxt), -(t + 1), counter, nxt, t + 1))
+        self.expansions += expansions
+
+        path = []
+        node = best
+        while node is not None:
+            path.append(node[0])
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def plan(self, agent_id: str, goal):
+        start = self._start.get(agent_id)
+        if start is None:
+            return None
+        left = self._unplanned.get(start, 0) - 1
+        if left > 0:
+            self._unplanned[start] = left
+        else:
+            self._unplanned.pop(start, None)
+        goal = (min(max(int(goal[0]), 0), self.width - 1), min(max(int(goal[1]), 0), self.height - 1))
+        # Runners sharing a goal (several chasing the same coin, an idle player on it) settle on the
+        # nearest cell nobody holds for good instead of searching the whole space-time grid for it.
+        slack = 0
+        while slack < self.width + self.height and not self._room_within(goal, slack, start):
+            slack += 1
+        path = self._search(start, goal, slack)
+        self._reserve(path)
+        if len(path) < 2 or path[1] == path[0]:
+            self.waits += 1
+            return None
+        dx = path[1][0] - start[0]
+        dy = path[1][1] - start[1]
+        for name, mx, my in _MOVES:
+            if (mx, my) == (dx, dy):
+                return name
+        return None
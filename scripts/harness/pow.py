@@ -0,0 +1,195 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+
+POW_MAX_ITERS = int(os.getenv("POW_MAX_ITERS", "500000"))
+# Number of solver processes; 0/1 keeps everything in-process.
+POW_WORKERS = int(os.getenv("POW_WORKERS", str(os.cpu_count() or 1)))
+# Below this difficulty the expected work is too small to amortize IPC.
+POW_PARALLEL_MIN_DIFFICULTY = int(os.getenv("POW_PARALLEL_MIN_DIFFICULTY", "4"))
+# Work unit handed to a worker: BLOCK_TENS * 10 consecutive suffixes. Also the cancel-poll granularity.
+BLOCK_TENS = 1024
+
+_DIGITS = [bytes([c]) for c in b"0123456789"]
+
+_pool = None
+_pool_stop = None
+_pool_lock = threading.Lock()
+_worker_stop = None
+
+
+def difficulty_threshold(difficulty: int) -> bytes:
+    # `difficulty` leading zero hex nibbles <=> digest (big-endian) < 16 ** (64 - difficulty).
+    return (16 ** (64 - difficulty)).to_bytes(32, "big")
+
+
+def _increment_ascii(counter: bytearray):
+    j = len(counter) - 1
+    while j >= 0 and counter[j] == 57:  # '9'
+        counter[j] = 48
+        j -= 1
+    if j < 0:
+        counter.insert(0, 49)
+    else:
+        counter[j] += 1
+
+
+def scan_block(prefix, threshold: bytes, tens_start: int, tens_end: int, max_iters: int):
+    """
+    Check suffixes tens_start*10 .. tens_end*10-1 against `threshold`.
+    `prefix` is a sha256 object already fed `{nonce}:sol-`; every candidate is a copy of the
+    per-ten midstate plus one digit byte, and the tens counter is incremented in place.
+    """
+    counter = bytearray(b"%d" % tens_start) if tens_start else bytearray()
+    for tens in range(tens_start, tens_end):
+        copy = prefix.copy()
+        copy.update(counter)
+        fork = copy.copy
+        for d, digit in enumerate(_DIGITS):
+            h = fork()
+            h.update(digit)
+            if h.digest() < threshold:
+                i = tens * 10 + d
+                return i if i < max_iters else None
+        _increment_ascii(counter)
+    return None
+
+
+def solve_range(nonce: str, difficulty: int, start: int, stride: int, max_iters: int, stop=None):
+    """
+    Scan blocks start, start+stride, ... of BLOCK_TENS*10 suffixes below max_iters.
+    Returns the winning index or None. Polls `stop` between blocks.
+    """
+    return scan_range(nonce, difficulty, start, stride, max_iters, stop)[0]
+
+
+def scan_range(nonce: str, difficulty: int, start: int, stride: int, max_iters: int, stop=None):
+    """solve_range, plus how many suffixes were hashed: (index or None, hashed)."""
+    if difficulty <= 0:
+        return (0, 1) if max_iters > 0 else (None, 0)
+    threshold = difficulty_threshold(difficulty)
+    prefix = hashlib.sha256(f"{nonce}:sol-".encode("utf-8"))
+    total_tens = (max_iters + 9) // 10
+    hashed = 0
+    for block in range(start, (total_tens + BLOCK_TENS - 1) // BLOCK_TENS, stride):
+        if stop is not None and stop.is_set():
+            return None, hashed
+        tens_start = block * BLOCK_TENS
+        tens_end = min(tens_start + BLOCK_TENS, total_tens)
+        found = scan_block(prefix, threshold, tens_start, tens_end, max_iters)
+        if found is not None:
+            return found, hashed + found - tens_start * 10 + 1
+        hashed += min(tens_end * 10, max_iters) - tens_start * 10
+    return None, hashed
+
+
+def solve_reference(nonce: str, difficulty: int, max_iters: int):
+    # Original string-formatting loop; kept for the benchmark baseline.
+    target = "0" * difficulty
+    for i in range(max_iters):
+        if hashlib.sha256(f"{nonce}:sol-{i}".encode("utf-8")).hexdigest().startswith(target):
+            return i
+    return None
+
+
+def _init_worker(stop):
+    global _worker_stop
+    _worker_stop = stop
+
+
+def _solve_task(args):
+    nonce, difficulty, start, stride, max_iters = args
+    found, hashed = scan_range(nonce, difficulty, start, stride, max_iters, _worker_stop)
+    if found is not None:
+        _worker_stop.set()
+    return found, hashed
+
+
+def _get_pool():
+    global _pool, _pool_stop
+    if _pool is None:
+        # Never fork: the first solve usually runs on a credential producer thread while other
+        # threads hold locks. Workers still re-import the calling script as __mp_main__ (spawn
+        # preparation), so entry scripts keep side effects behind their __main__ guard.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload([__name__])
+        else:
+            ctx = multiprocessing.get_context("spawn")
+        _pool_stop = ctx.Event()
+        _pool = ctx.Pool(POW_WORKERS, initializer=_init_worker, initargs=(_pool_stop,))
+    return _pool, _pool_stop
+
+
+def shutdown_pool():
+    global _pool, _pool_stop
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool.join()
+        _pool = None
+        _pool_stop = None
+
+
+def solve_pow_parallel(nonce: str, difficulty: int, max_iters: int = POW_MAX_ITERS, workers: int = POW_WORKERS):
+    """
+    Interleave blocks across the process pool: worker k owns blocks k, k+N, ...
+    The first worker to hit the target sets the shared stop event and the rest bail out.
+    Returns (index or None, suffixes hashed across all workers).
+    """
+    with _pool_lock:
+        pool, stop = _get_pool()
+        stop.clear()
+        tasks = [(nonce, difficulty, k, workers, max_iters) for k in range(workers)]
+        best = None
+        hashed = 0
+        for found, scanned in pool.imap_unordered(_solve_task, tasks):
+            # Keep draining so no task from this solve leaks into the next one.
+            hashed += scanned
+            if found is not None and (best is None or found < best):
+                best = found
+        stop.clear()
+    return best, hashed
+
+
+def solve_pow(nonce: str, difficulty: int, max_iters: int = POW_MAX_ITERS):
+    if POW_WORKERS > 1 and difficulty >= POW_PARALLEL_MIN_DIFFICULTY:
+        found, hashed = solve_pow_parallel(nonce, difficulty, max_iters)
+    else:
+        found, hashed = scan_range(nonce, difficulty, 0, 1, max_iters)
+    if found is None:
+        raise RuntimeError(f"Failed to solve PoW in {max_iters} iterations. Increase POW_MAX_ITERS or reduce difficulty.")
+    return f"sol-{found}", hashed
+
+
+def main():
+    # Microbenchmark: `cd scripts && python3 -m harness.pow --iters 500000`
+    parser = argparse.ArgumentParser(description="PoW kernel microbenchmark (hashes/sec)")
+    parser.add_argument("--iters", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    nonce = os.urandom(16).hex()
+    # Unreachable difficulty so every kernel scans the full range.
+    kernels = [
+        ("reference", lambda: solve_reference(nonce, 64, args.iters)),
+        ("midstate", lambda: solve_range(nonce, 64, 0, 1, args.iters)),
+    ]
+    rates = {}
+    for name, fn in kernels:
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        rates[name] = args.iters / best
+        print(f"{name:>10}: {rates[name]:,.0f} hashes/sec")
+    print(f"   speedup: {rates['midstate'] / rates['reference']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+NEVER = -999999
+
+
+class RunnerState:
+    """Per-agent bookkeeping for one joined agent of a scale lobby."""
+
+    __slots__ = (
+        "agent_id", "slot", "api_key", "last_tick_sent", "last_tick_planned", "last_move_tick", "last_pos",
+        "blocked_count", "target", "patrol_hdir", "patrol_vdir",
+    )
+
+    def __init__(self, agent_id: str, slot: int, api_key: str = None):
+        self.agent_id = agent_id
+        self.slot = slot
+        self.api_key = api_key
+        self.last_tick_sent = NEVER
+        self.last_tick_planned = NEVER  # tick this runner was last handed a direction for
+        self.last_move_tick = NEVER  # tick we last sent an input for
+        self.last_pos = None  # (x, y) when that input went out
+        self.blocked_count = 0  # consecutive inputs that didn't move us
+        self.target = None  # coin_id being chased
+        self.patrol_hdir = 0  # serpentine sweep directions once there are no coins
+        self.patrol_vdir = 0
+
+
+class LobbyRecord:
+    """
+    One scale lobby: join bookkeeping, the runners driven in it, and run/payout flags.
+    `slot_to_api_key` fills as agents join; `agents` (agent_id -> RunnerState) and `runners` (the
+    driven subset, in slot order) are rebuilt from the lobby's slot -> agent_id listing.
+    """
+
+    __slots__ = (
+        "lobby_id", "watch_code", "status", "slot_to_api_key", "agents", "runners", "runner_ids",
+        "last_map_refresh_at", "view", "finished", "payout_checked", "payout_executed",
+    )
+
+    def __init__(self, lobby_id: str, watch_code: str = None, status: str = None):
+        self.lobby_id = lobby_id
+        self.watch_code = watch_code
+        self.status = status
+        self.slot_to_api_key = {}
+        self.agents = {}
+        self.runners = []
+        self.runner_ids = ()
+        self.last_map_refresh_at = 0.0
+        self.view = None
+        self.finished = False
+        self.payout_checked = False
+        self.payout_executed = False
+
+    @property
+    def label(self) -> str:
+        return self.watch_code or self.lobby_id
+
+    def apply_slots(self, slot_to_agent_id, max_runners: int):
+        """Bind joined agents to their slots and api keys; the lowest `max_runners` slots are driven."""
+        agents = {}
+        for slot, agent_id in slot_to_agent_id.items():
+            runner = self.agents.get(agent_id)
+            if runner is None:
+                runner = RunnerState(agent_id, slot)
+            runner.slot = slot
+            runner.api_key = self.slot_to_api_key.get(slot) or runner.api_key
+            agents[agent_id] = runner
+        self.agents = agents
+        runner_slots = sorted(self.slot_to_api_key)[:max(1, max_runners)]
+        by_slot = {runner.slot: runner for runner in agents.values()}
+        self.runners = [by_slot[s] for s in runner_slots if s in by_slot]
+        self.runner_ids = tuple(runner.agent_id for runner in self.runners)
+
+    def keyed_agents(self) -> int:
+        return sum(1 for runner in self.agents.values() if runner.api_key)
+
+    def holds_first_slot(self) -> bool:
+        """True when one of our agents has the lowest joined slot (the lobby is ours to settle)."""
+        if not self.slot_to_api_key:
+            return False
+        ours = min(self.slot_to_api_key)
+        return all(ours <= runner.slot for runner in self.agents.values())
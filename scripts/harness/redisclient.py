@@ -0,0 +1,146 @@
+import socket
+import threading
+
+
+class RedisError(RuntimeError):
+    pass
+
+
+class RedisClient:
+    """
+    One persistent RESP2 connection with pipelining. Thread-safe: a pipeline owns the socket
+    for its whole write/read cycle. A dropped connection is reopened once per call (the
+    harness only issues idempotent reads).
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._stream = None
+        self.connects = 0
+        self.round_trips = 0
+        self.commands = 0
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._stream = sock.makefile("rb")
+        self.connects += 1
+
+    def _drop(self):
+        if self._stream is not None:
+            self._stream.close()
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._stream = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n" % len(arg))
+            out.append(arg)
+            out.append(b"\r\n")
+        return b"".join(out)
+
+    def _read_reply(self):
+        line = self._stream.readline()
+        if not line or not line.endswith(b"\r\n"):
+            raise ConnectionResetError("Redis connection closed mid-reply")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            return RedisError(f"Redis error: {body.decode('utf-8')}")
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._stream.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionResetError("Redis connection closed mid-reply")
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected Redis reply: {line!r}")
+
+    def pipeline(self, commands):
+        """
+        Send every command in one write and read the replies in order. Error replies come back
+        as RedisError instances in the list rather than raising.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+        wire = b"".join(self._encode(args) for args in commands)
+        with self._lock:
+            for attempt in (0, 1):
+                fresh = self._sock is None
+                try:
+                    if fresh:
+                        self._connect()
+                    self._sock.sendall(wire)
+                    replies = [self._read_reply() for _ in commands]
+                except OSError:
+                    self._drop()
+                    if attempt or fresh:
+                        raise
+                    continue
+                except BaseException:
+                    # Reply stream is out of step with the commands; never reuse it.
+                    self._drop()
+                    raise
+                self.round_trips += 1
+                self.commands += len(commands)
+                return replies
+
+    def execute(self, *args):
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def get(self, key: str):
+        return self.execute("GET", key)
+
+    def mget(self, keys):
+        keys = list(keys)
+        if not keys:
+            return []
+        return self.execute("MGET", *keys)
+
+    def lobby_snapshots(self, lobby_ids):
+        """
+        One MGET for `lobby:{id}:state` + `lobby:{id}:seq` of every lobby.
+        Returns {lobby_id: (state_json_or_None, seq_or_None)}.
+        """
+        lobby_ids = list(lobby_ids)
+        keys = []
+        for lobby_id in lobby_ids:
+            keys.append(f"lobby:{lobby_id}:state")
+            keys.append(f"lobby:{lobby_id}:seq")
+        values = self.mget(keys)
+        out = {}
+        for i, lobby_id in enumerate(lobby_ids):
+            raw_seq = values[2 * i + 1]
+            out[lobby_id] = (values[2 * i], int(raw_seq) if raw_seq not in (None, "") else None)
+        return out
+
+    def stats(self) -> dict:
+        return {"connects": self.connects, "round_trips": self.round_trips, "commands": self.commands}
+
+    def close(self):
+        with self._lock:
+            self._drop()
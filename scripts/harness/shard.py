@@ -0,0 +1,121 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+
+def split_evenly(total: int, parts: int):
+    """`total` split into `parts` shares differing by at most one; the first shares take the remainder."""
+    parts = max(1, parts)
+    base, extra = divmod(max(0, total), parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+class WorkerProcess:
+    """
+    One scale worker: the harness re-run as a child process with its own env. Output lines are
+    relayed through `emit` with a `[wN]` prefix; the worker's final metrics arrive as one JSON line
+    on a dedicated pipe (fd number in E2E_SCALE_METRICS_FD), read on a thread so a large report
+    can't block the child on exit.
+    """
+
+    def __init__(self, index: int, argv, env, emit):
+        self.index = index
+        self.report = None
+        self.returncode = None
+        read_fd, write_fd = os.pipe()
+        env = dict(env)
+        env["E2E_SCALE_METRICS_FD"] = str(write_fd)
+        try:
+            self._proc = subprocess.Popen(
+                [sys.executable, "-u", *argv],
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                pass_fds=(write_fd,),
+            )
+        finally:
+            os.close(write_fd)
+        self._metrics = os.fdopen(read_fd, "r", encoding="utf-8")
+        prefix = f"[w{index}] "
+        self._relay = threading.Thread(
+            target=self._relay_output, args=(emit, prefix), name=f"scale-worker-{index}-out", daemon=True
+        )
+        self._reader = threading.Thread(target=self._read_metrics, name=f"scale-worker-{index}-metrics", daemon=True)
+        self._relay.start()
+        self._reader.start()
+
+    def _relay_output(self, emit, prefix: str):
+        for raw in self._proc.stdout:
+            emit(prefix + raw.decode("utf-8", "replace").rstrip("\n"))
+
+    def _read_metrics(self):
+        with self._metrics:
+            for line in self._metrics:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self.report = json.loads(line)
+                except ValueError:
+                    continue
+
+    def wait(self):
+        self.returncode = self._proc.wait()
+        self._relay.join()
+        self._reader.join()
+        return self.returncode
+
+    def terminate(self):
+        if self._proc.poll() is None:
+            self._proc.terminate()
+
+
+def write_report(fd: int, report: dict):
+    """Send a worker's metrics to its coordinator (called once, right before the worker exits)."""
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(report, sort_keys=True) + "\n")
+
+
+def _add_counts(into: dict, counts: dict):
+    for name, value in (counts or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            into[name] = into.get(name, 0) + value
+
+
+def merge_reports(reports):
+    """
+    Combine worker reports into one. Counters are summed; lobbies are merged by id, since workers
+    joining the same game mode can land agents in the same lobby (`joined` adds up, `finished` and
+    `coins` come from whichever worker saw them).
+    """
+    merged = {
+        "workers": len(reports),
+        "agents": 0,
+        "players_per_lobby": 0,
+        "elapsed_sec": 0.0,
+        "lobbies": {},
+        "tick_sync": {},
+        "planner": {},
+        "state_cache": {},
+        "async": {},
+        "credentials": {},
+        "http": {},
+    }
+    for report in reports:
+        merged["agents"] += int(report.get("agents", 0) or 0)
+        merged["players_per_lobby"] = max(merged["players_per_lobby"], int(report.get("players_per_lobby", 0) or 0))
+        merged["elapsed_sec"] = max(merged["elapsed_sec"], float(report.get("elapsed_sec", 0.0) or 0.0))
+        for name in ("tick_sync", "planner", "state_cache", "async", "credentials", "http"):
+            _add_counts(merged[name], report.get(name))
+        for lobby_id, row in (report.get("lobbies") or {}).items():
+            lobby = merged["lobbies"].setdefault(
+                lobby_id, {"label": row.get("label") or lobby_id, "joined": 0, "workers": 0, "finished": False, "coins": None}
+            )
+            lobby["joined"] += int(row.get("joined", 0) or 0)
+            lobby["workers"] += 1
+            lobby["finished"] = lobby["finished"] or bool(row.get("finished"))
+            if row.get("coins") is not None:
+                lobby["coins"] = int(row["coins"])
+    return merged
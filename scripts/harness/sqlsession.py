@@ -0,0 +1,182 @@
+import collections
+import json
+import re
+import subprocess
+import threading
+import time
+
+NODE_PG_WORKER_JS = r"""
+const { Client } = require('./apps/api/node_modules/pg');
+const readline = require('readline');
+(async () => {
+  const client = new Client({ connectionString: process.env.DATABASE_URL });
+  await client.connect();
+  const rl = readline.createInterface({ input: process.stdin });
+  for await (const line of rl) {
+    if (!line.trim()) continue;
+    const req = JSON.parse(line);
+    let reply;
+    try {
+      let res = await client.query(req.sql);
+      if (Array.isArray(res)) res = res[res.length - 1] || {};
+      const lines = [];
+      for (const row of res.rows || []) {
+        const values = Object.values(row).map((v) => (v == null ? '' : String(v)));
+        lines.push(values.join('|'));
+      }
+      reply = { id: req.id, ok: true, output: lines.join('\n') };
+    } catch (err) {
+      reply = { id: req.id, ok: false, error: err?.message || String(err) };
+    }
+    process.stdout.write(JSON.stringify(reply) + '\n');
+  }
+  await client.end();
+})().catch((err) => {
+  console.error(err?.stack || String(err));
+  process.exit(1);
+});
+"""
+
+# psql reading a script from stdin reports failures as `psql:<stdin>:N: ERROR:  ...`.
+_PSQL_ERROR_RE = re.compile(r"^psql:.*?:\d+: (ERROR|FATAL|PANIC):")
+
+
+def psql_roundtrip(proc, sql: str, seq: int) -> str:
+    """psql fed a script over stdin; each query is followed by an \\echo marker that ends its output."""
+    marker = f"__e2e_sql_done_{seq}__"
+    statement = sql.strip().rstrip(";").strip()
+    proc.stdin.write(f"{statement};\n\\echo {marker}\n")
+    proc.stdin.flush()
+    lines = []
+    errors = []
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise EOFError(f"psql closed its output (exit={proc.poll()})")
+        line = line.rstrip("\n")
+        if line == marker:
+            break
+        if _PSQL_ERROR_RE.match(line):
+            errors.append(line)
+        elif errors and line.startswith(("LINE ", "DETAIL:", "HINT:", " ")):
+            errors.append(line)
+        else:
+            lines.append(line)
+    if errors:
+        raise RuntimeError("SQL failed: " + "\n".join(errors))
+    return "\n".join(lines).strip()
+
+
+def node_pg_roundtrip(proc, sql: str, seq: int) -> str:
+    """Line-delimited JSON request/reply with NODE_PG_WORKER_JS."""
+    proc.stdin.write(json.dumps({"id": seq, "sql": sql}) + "\n")
+    proc.stdin.flush()
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise EOFError(f"node pg worker closed its output (exit={proc.poll()})")
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            continue
+        if reply.get("id") != seq:
+            continue
+        if not reply.get("ok"):
+            raise RuntimeError(f"Node SQL helper failed: {reply.get('error')}")
+        return str(reply.get("output") or "").strip()
+
+
+class SqlSession:
+    """
+    One long-lived SQL helper process that answers queries over its stdin/stdout, so a query costs
+    a round trip instead of a process spawn plus connection handshake. `roundtrip(proc, sql, seq)`
+    sends one query and reads its reply; `query` returns psql -tA style text (columns joined with
+    '|', one row per line). Calls are serialized. stderr is drained on a thread (last lines kept
+    for error messages) so a chatty helper can never block on a full pipe.
+    """
+
+    name = "sql"
+
+    def __init__(self, args, roundtrip, env=None, merge_stderr: bool = False):
+        self.args = list(args)
+        self.roundtrip = roundtrip
+        self.env = env
+        self.merge_stderr = merge_stderr
+        self._lock = threading.Lock()
+        self._proc = None
+        self._seq = 0
+        self._stderr_tail = collections.deque(maxlen=20)
+        self.spawns = 0
+        self.queries = 0
+        self.total_sec = 0.0
+
+    def _spawn(self):
+        self._proc = subprocess.Popen(
+            self.args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT if self.merge_stderr else subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=self.env,
+        )
+        if not self.merge_stderr:
+            threading.Thread(
+                target=self._drain_stderr, args=(self._proc.stderr,), name=f"{self.name}-stderr", daemon=True
+            ).start()
+        self.spawns += 1
+
+    def _drain_stderr(self, stream):
+        for line in stream:
+            self._stderr_tail.append(line.rstrip("\n"))
+
+    def query(self, sql: str) -> str:
+        with self._lock:
+            started = time.time()
+            if self._proc is None or self._proc.poll() is not None:
+                self._spawn()
+            self._seq += 1
+            try:
+                return self.roundtrip(self._proc, sql, self._seq)
+            except (BrokenPipeError, EOFError) as exc:
+                self.close_locked()
+                tail = "\n".join(self._stderr_tail)
+                raise RuntimeError(f"{self.name} session exited: {exc}" + (f"\n{tail}" if tail else "")) from exc
+            finally:
+                self.queries += 1
+                self.total_sec += time.time() - started
+
+    def close_locked(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    def close(self):
+        with self._lock:
+            self.close_locked()
+
+
+class PsqlSession(SqlSession):
+    name = "psql"
+
+    def __init__(self, args, env=None):
+        # ON_ERROR_STOP=0 keeps the session alive across a failed statement; errors are detected
+        # from psql's own message prefix (stderr is folded into stdout to keep ordering).
+        super().__init__(list(args) + ["-v", "ON_ERROR_STOP=0"], psql_roundtrip, env=env, merge_stderr=True)
+
+
+class NodePgSession(SqlSession):
+    """Persistent node + pg worker (needs apps/api/node_modules/pg)."""
+
+    name = "node-pg"
+
+    def __init__(self, env=None):
+        super().__init__(["node", "-e", NODE_PG_WORKER_JS], node_pg_roundtrip, env=env)
@@ -0,0 +1,93 @@
+from harness.assign import assign_points
+
+
+class LobbyView:
+    """
+    Parsed copy of one lobby's state, kept in step with the raw state dicts one tick at a time.
+    `update` returns False when the tick hasn't advanced (nothing to re-plan); otherwise it applies
+    only what changed: moved/joined/left players and spawned/collected coins. Coin assignments are
+    memoized for the current tick.
+    """
+
+    __slots__ = (
+        "tick", "width", "height", "positions", "occupied", "coins",
+        "_raw", "_assign_key", "_assignments", "diffs", "skips", "moved", "coin_changes",
+    )
+
+    def __init__(self):
+        self.tick = None
+        self.width = 1
+        self.height = 1
+        self.positions = {}  # agent_id -> (x, y)
+        self.occupied = set()
+        self.coins = {}  # coin_id -> (x, y), spawn order
+        self._raw = None
+        self._assign_key = None
+        self._assignments = None
+        self.diffs = 0
+        self.skips = 0
+        self.moved = 0
+        self.coin_changes = 0
+
+    def update(self, state) -> bool:
+        tick = int(state.get("tick", 0) or 0)
+        if state is self._raw or (tick == self.tick and self._raw is not None):
+            self.skips += 1
+            return False
+        self._raw = state
+        self.tick = tick
+        self.width = int(state.get("width", 1) or 1)
+        self.height = int(state.get("height", 1) or 1)
+        self.diffs += 1
+
+        positions = self.positions
+        occupied = self.occupied
+        players = state.get("players") or {}
+        for agent_id in [aid for aid in positions if aid not in players]:
+            occupied.discard(positions.pop(agent_id))
+            self.moved += 1
+        for agent_id, p in players.items():
+            try:
+                pos = (int(p["x"]), int(p["y"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            old = positions.get(agent_id)
+            if old == pos:
+                continue
+            if old is not None:
+                occupied.discard(old)
+            positions[agent_id] = pos
+            occupied.add(pos)
+            self.moved += 1
+
+        coins = self.coins
+        seen = set()
+        for coin in state.get("coins") or []:
+            try:
+                cid = int(coin["id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            seen.add(cid)
+            if cid not in coins:
+                try:
+                    coins[cid] = (int(coin["x"]), int(coin["y"]))
+                except (KeyError, TypeError, ValueError):
+                    seen.discard(cid)
+                    continue
+                self.coin_changes += 1
+        if len(seen) != len(coins):
+            for cid in [cid for cid in coins if cid not in seen]:
+                del coins[cid]
+                self.coin_changes += 1
+        return True
+
+    def assignments(self, agent_ids, method: str):
+        """assign_points for `agent_ids` on this tick's board, computed once per tick."""
+        key = (self.tick, tuple(agent_ids), method)
+        if key != self._assign_key:
+            positions = self.positions
+            agents = [(aid, *positions[aid]) for aid in agent_ids if aid in positions]
+            coins = [(cid, x, y) for cid, (x, y) in self.coins.items()]
+            self._assignments = assign_points(agents, coins, method)
+            self._assign_key = key
+        return self._assignments
@@ -0,0 +1,229 @@
+import calendar
+import threading
+import time
+from collections import deque
+
+# How many recent observations feed the clock-offset estimate.
+OFFSET_WINDOW = 64
+
+
+def parse_iso_epoch(value) -> float:
+    """`2025-01-01T00:00:00.123Z` -> epoch seconds (None when missing/unparseable)."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        whole = calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S"))
+    except ValueError:
+        return None
+    frac = 0.0
+    if len(value) > 20 and value[19] == ".":
+        digits = ""
+        for ch in value[20:]:
+            if not ch.isdigit():
+                break
+            digits += ch
+        if digits:
+            frac = int(digits) / (10 ** len(digits))
+    return whole + frac
+
+
+class TickClock:
+    """
+    Local-time model of one lobby's tick schedule.
+    The game server stamps `updated_at` when a tick starts draining inputs, so an input that reaches
+    Redis before tick n's stamp is applied on tick n. Server stamps are mapped onto the local clock
+    with the smallest (received_at - updated_at) seen recently, which absorbs clock skew plus the
+    fastest delivery path; states without `updated_at` fall back to tick * period.
+    """
+
+    def __init__(self):
+        self.tick_rate = None
+        self.period = None
+        self._anchor_tick = None
+        self._anchor_server = None
+        self._offsets = deque(maxlen=OFFSET_WINDOW)
+        self._offset = None
+
+    def observe(self, state, received_at: float = None):
+        if not state:
+            return
+        received_at = time.time() if received_at is None else received_at
+        tick = int(state.get("tick", 0) or 0)
+        tick_rate = float(state.get("tick_rate") or 0)
+        if tick_rate <= 0 or tick <= 0:
+            # Tick 0 is the pre-loop snapshot; its stamp says nothing about the tick phase.
+            return
+        if tick_rate != self.tick_rate:
+            self.tick_rate = tick_rate
+            self.period = 1.0 / tick_rate
+            self._offsets.clear()
+            self._anchor_tick = None
+        server_ts = parse_iso_epoch(state.get("updated_at"))
+        if server_ts is None:
+            server_ts = tick * self.period
+        if self._anchor_tick is None or tick >= self._anchor_tick:
+            self._anchor_tick = tick
+            self._anchor_server = server_ts
+        self._offsets.append(received_at - server_ts)
+        self._offset = min(self._offsets)
+
+    def ready(self) -> bool:
+        return self._anchor_tick is not None
+
+    def tick_at(self, tick: int) -> float:
+        """Predicted local time at which the server starts tick `tick`."""
+        return self._anchor_server + self._offset + (tick - self._anchor_tick) * self.period
+
+    def tick_for(self, at: float) -> int:
+        """The tick that applies an input reaching the server at local time `at`."""
+        elapsed = (at - self.tick_at(self._anchor_tick)) / self.period
+        whole = int(elapsed)
+        if whole < elapsed:
+            whole += 1
+        return self._anchor_tick + max(0, whole)
+
+
+class InputScheduler:
+    """
+    Tick-aligned input timing plus on-time/late/duplicate accounting, shared by every lobby.
+    `plan` picks the tick an input can still make and when to fire it (one lead before that tick);
+    `claim` keeps one input per runner per tick; `record` classifies each sent input by the tick its
+    request most likely landed on.
+    """
+
+    def __init__(self, lead_sec: float = 0.0, settle_sec: float = 0.01, enabled: bool = True):
+        self.enabled = enabled
+        self.lead_sec = lead_sec
+        self.settle_sec = settle_sec
+        self._lock = threading.Lock()
+        self._clocks = {}
+        self._claimed = {}  # (lobby_id, agent_id) -> last target tick
+        self._landed = {}  # (lobby_id, agent_id) -> last landed tick
+        self._stats = {}
+        self._latency = None
+        self._min_rtt = None
+        self._backoff = 0.0  # extra lead as a fraction of the tick, adapted from late inputs
+
+    def clock(self, lobby_id: str) -> TickClock:
+        with self._lock:
+            clock = self._clocks.get(lobby_id)
+            if clock is None:
+                clock = self._clocks[lobby_id] = TickClock()
+            return clock
+
+    def observe(self, lobby_id: str, state, received_at: float = None):
+        clock = self.clock(lobby_id)
+        with self._lock:
+            clock.observe(state, received_at)
+
+    def _stats_for(self, lobby_id: str) -> dict:
+        stats = self._stats.get(lobby_id)
+        if stats is None:
+            stats = self._stats[lobby_id] = {"sent": 0, "on_time": 0, "late": 0, "duplicate": 0, "suppressed": 0}
+        return stats
+
+    def lead(self, period: float) -> float:
+        if self.lead_sec > 0:
+            return self.lead_sec
+        if self._latency is None:
+            return 0.3 * period
+        # Full round trip is a generous bound on request->Redis; keep a tenth of the tick for sleep
+        # and scheduling jitter, widen while inputs come in late, and never eat most of the tick.
+        base = max(0.1 * period, 1.5 * self._latency + 0.005)
+        return min(0.8 * period, base + self._backoff * period)
+
+    def plan(self, lobby_id: str, observed_tick: int, now: float = None):
+        """
+        Returns (target_tick, fire_at) for inputs planned from `observed_tick`.
+        Without scheduling (or before the clock has a sample) the input fires immediately at tick+1.
+        """
+        now = time.time() if now is None else now
+        clock = self.clock(lobby_id)
+        with self._lock:
+            if not self.enabled or not clock.ready():
+                return observed_tick + 1, now
+            lead = self.lead(clock.period)
+            target = observed_tick + 1
+            while clock.tick_at(target) - lead < now:
+                target += 1
+            return target, clock.tick_at(target) - lead
+
+    def stagger(self, fire_times):
+        """
+        For a sender that fires one request at a time: given ascending fire times, pull earlier
+        entries forward so each leaves at least one measured request latency before the next.
+        """
+        with self._lock:
+            gap = self._latency if self.enabled else None
+        out = list(fire_times)
+        if not gap:
+            return out
+        for i in range(len(out) - 2, -1, -1):
+            out[i] = min(out[i], out[i + 1] - gap)
+        return out
+
+    def claim(self, lobby_id: str, agent_id: str, target_tick: int) -> bool:
+        """False (and counted as suppressed) when the runner already has an input for that tick."""
+        key = (lobby_id, agent_id)
+        with self._lock:
+            if self.enabled and self._claimed.get(key, -1) >= target_tick:
+                self._stats_for(lobby_id)["suppressed"] += 1
+                return False
+            self._claimed[key] = max(target_tick, self._claimed.get(key, -1))
+            return True
+
+    def record(self, lobby_id: str, agent_id: str, target_tick: int, started: float, finished: float):
+        """
+        Classify one successful POST /input by the tick it most likely landed on. The input is queued
+        just before the response goes out, so use the response time minus half the fastest round trip
+        seen (a request stalled server-side lands late even if it left early).
+        """
+        clock = self.clock(lobby_id)
+        key = (lobby_id, agent_id)
+        with self._lock:
+            rtt = max(0.0, finished - started)
+            self._latency = rtt if self._latency is None else 0.9 * self._latency + 0.1 * rtt
+            self._min_rtt = rtt if self._min_rtt is None else min(self._min_rtt, rtt)
+            stats = self._stats_for(lobby_id)
+            stats["sent"] += 1
+            if not clock.ready():
+                return
+            landed = clock.tick_for(finished - self._min_rtt / 2)
+            if self._landed.get(key) == landed:
+                stats["duplicate"] += 1
+            elif landed <= target_tick:
+                stats["on_time"] += 1
+                self._backoff *= 0.98
+            else:
+                stats["late"] += 1
+                self._backoff = min(0.7, self._backoff + 0.1)
+                # That tick is now taken; a follow-up input aimed at it would be dropped by the engine.
+                self._claimed[key] = max(landed, self._claimed.get(key, -1))
+            self._landed[key] = max(landed, self._landed.get(key, landed))
+
+    def next_wake(self, lobby_ids=None, now: float = None):
+        """Local time just after the next predicted tick of any given lobby (None if none is known)."""
+        now = time.time() if now is None else now
+        best = None
+        with self._lock:
+            clocks = self._clocks if lobby_ids is None else {lid: self._clocks.get(lid) for lid in lobby_ids}
+            for clock in clocks.values():
+                if clock is None or not clock.ready():
+                    continue
+                wake = clock.tick_at(clock.tick_for(now)) + self.settle_sec
+                if wake <= now:
+                    wake += clock.period
+                best = wake if best is None else min(best, wake)
+        return best
+
+    def report(self) -> dict:
+        """lobby_id -> counts plus on_time/late/duplicate ratios over classified inputs."""
+        out = {}
+        with self._lock:
+            for lobby_id, stats in self._stats.items():
+                row = dict(stats)
+                classified = stats["on_time"] + stats["late"] + stats["duplicate"]
+                for name in ("on_time", "late", "duplicate"):
+                    row[f"{name}_ratio"] = (stats[name] / classified) if classified else 0.0
+                out[lobby_id] = row
+        return out
@@ -0,0 +1,330 @@
+import base64
+import hashlib
+import json
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+RECONNECT_DELAY_SEC = 0.5
+
+
+class LobbyStateFeed:
+    """
+    Live LobbyState cache fed by the game-server WebSocket (`/ws/lobbies/:lobbyId`).
+    One socket per subscribed lobby, all read by a single selector thread. Readers either take
+    the cached state (`latest`) or block until the server pushes a newer tick (`wait_for_tick`).
+    """
+
+    def __init__(self, ws_url: str, connect_timeout: float = 5.0):
+        parts = urllib.parse.urlsplit(ws_url.rstrip("/"))
+        if parts.scheme not in ("ws", ""):
+            raise RuntimeError(f"Unsupported game WebSocket URL (only ws:// is supported): {ws_url}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.base_path = parts.path
+        self.connect_timeout = connect_timeout
+        self._cond = threading.Condition()
+        self._latest = {}
+        self._socks = {}  # lobby_id -> socket
+        self._lobby_by_fd = {}
+        self._buffers = {}
+        self._fragments = {}
+        self._listeners = {}  # lobby_id -> [callback(lobby_id, state)]
+        self._retry_at = {}  # lobby_id -> reconnect time
+        self._pending = set()  # lobby_ids with a subscribe handshake in flight
+        self._version = 0
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._closed = False
+        self.messages = 0
+        self.reconnects = 0
+        self._thread = threading.Thread(target=self._run, name="lobby-ws-feed", daemon=True)
+        self._thread.start()
+
+    # -- connection management -------------------------------------------------
+
+    def _handshake(self, lobby_id: str):
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        request = (
+            f"GET {self.base_path}/ws/lobbies/{lobby_id} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        sock.sendall(request.encode("ascii"))
+        raw = b""
+        while b"\r\n\r\n" not in raw:
+            chunk = sock.recv(4096)
+            if not chunk:
+                sock.close()
+                raise RuntimeError(f"WebSocket handshake for lobby {lobby_id} closed early")
+            raw += chunk
+        head, _, rest = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        if " 101 " not in f"{lines[0]} ":
+            sock.close()
+            raise RuntimeError(f"WebSocket handshake for lobby {lobby_id} failed: {lines[0]}")
+        expected = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+        accept = ""
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-accept":
+                accept = value.strip()
+        if accept != expected:
+            sock.close()
+            raise RuntimeError(f"WebSocket handshake for lobby {lobby_id} returned a bad accept key")
+        sock.setblocking(False)
+        return sock, bytearray(rest)
+
+    def subscribe(self, lobby_id: str, wait_sec: float = 0.0):
+        """Open the lobby socket if needed; optionally wait briefly for the initial snapshot."""
+        with self._cond:
+            # Claim the lobby before handshaking so concurrent subscribers don't open a second socket.
+            known = lobby_id in self._socks or lobby_id in self._retry_at or lobby_id in self._pending
+            if not known:
+                self._pending.add(lobby_id)
+        if not known:
+            try:
+                sock, rest = self._handshake(lobby_id)
+            except BaseException:
+                with self._cond:
+                    self._pending.discard(lobby_id)
+                raise
+            with self._cond:
+                if lobby_id in self._pending:
+                    self._pending.discard(lobby_id)
+                    self._attach(lobby_id, sock, rest)
+                else:
+                    sock.close()  # unsubscribed while connecting
+            self._wake()
+        if wait_sec > 0:
+            with self._cond:
+                self._cond.wait_for(lambda: lobby_id in self._latest, timeout=wait_sec)
+
+    def _attach(self, lobby_id: str, sock, rest: bytearray):
+        self._socks[lobby_id] = sock
+        self._lobby_by_fd[sock.fileno()] = lobby_id
+        self._buffers[lobby_id] = rest
+        self._fragments[lobby_id] = bytearray()
+        self._retry_at.pop(lobby_id, None)
+        self._sel.register(sock, selectors.EVENT_READ, lobby_id)
+
+    def _detach(self, lobby_id: str):
+        sock = self._socks.pop(lobby_id, None)
+        self._buffers.pop(lobby_id, None)
+        self._fragments.pop(lobby_id, None)
+        if sock is None:
+            return
+        self._lobby_by_fd.pop(sock.fileno(), None)
+        try:
+            self._sel.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    def unsubscribe(self, lobby_id: str):
+        with self._cond:
+            self._retry_at.pop(lobby_id, None)
+            self._pending.discard(lobby_id)
+            self._detach(lobby_id)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    # -- frame handling --------------------------------------------------------
+
+    def _send_frame(self, sock, opcode: int, payload: bytes = b""):
+        mask = os.urandom(4)
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 65536:
+            header += bytes([0x80 | 126]) + struct.pack(">H", length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack(">Q", length)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        try:
+            sock.sendall(header + mask + masked)
+        except OSError:
+            pass
+
+    def _drain_frames(self, lobby_id: str):
+        """Parse every complete frame in the lobby buffer. Returns False when the socket should close."""
+        buf = self._buffers[lobby_id]
+        while len(buf) >= 2:
+            b0, b1 = buf[0], buf[1]
+            opcode = b0 & 0x0F
+            length = b1 & 0x7F
+            offset = 2
+            if length == 126:
+                if len(buf) < 4:
+                    return True
+                length = struct.unpack_from(">H", buf, 2)[0]
+                offset = 4
+            elif length == 127:
+                if len(buf) < 10:
+                    return True
+                length = struct.unpack_from(">Q", buf, 2)[0]
+                offset = 10
+            mask = None
+            if b1 & 0x80:
+                mask = bytes(buf[offset:offset + 4])
+                offset += 4
+            if len(buf) < offset + length:
+                return True
+            payload = bytes(buf[offset:offset + length])
+            del buf[:offset + length]
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+            if opcode == 0x8:
+                return False
+            if opcode == 0x9:
+                self._send_frame(self._socks[lobby_id], 0xA, payload)
+                continue
+            if opcode in (0x1, 0x2, 0x0):
+                fragments = self._fragments[lobby_id]
+                fragments.extend(payload)
+                if not b0 & 0x80:
+                    continue
+                message = bytes(fragments)
+                fragments.clear()
+                self._on_message(lobby_id, message)
+                if lobby_id not in self._socks:
+                    return True
+        return True
+
+    def _on_message(self, lobby_id: str, message: bytes):
+        try:
+            state = json.loads(message.decode("utf-8"))
+        except ValueError:
+            return
+        if not isinstance(state, dict):
+            return
+        self.messages += 1
+        self._latest[lobby_id] = state
+        self._version += 1
+        self._cond.notify_all()
+        for callback in list(self._listeners.get(lobby_id, ())):
+            try:
+                callback(lobby_id, state)
+            except Exception:
+                pass
+        if state.get("status") == "FINISHED":
+            # The game server stops broadcasting after FINISHED; keep the cached state, drop the socket.
+            self._detach(lobby_id)
+
+    def _run(self):
+        while not self._closed:
+            events = self._sel.select(timeout=0.25)
+            with self._cond:
+                for key, _mask in events:
+                    if key.data is None:
+                        try:
+                            self._wake_r.recv(4096)
+                        except OSError:
+                            pass
+                        continue
+                    lobby_id = key.data
+                    sock = self._socks.get(lobby_id)
+                    if sock is None:
+                        continue
+                    try:
+                        chunk = sock.recv(65536)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        chunk = b""
+                    if chunk:
+                        self._buffers[lobby_id].extend(chunk)
+                        if self._drain_frames(lobby_id):
+                            continue
+                    self._detach(lobby_id)
+                    state = self._latest.get(lobby_id) or {}
+                    if state.get("status") != "FINISHED":
+                        self._retry_at[lobby_id] = time.time() + RECONNECT_DELAY_SEC
+                due = [lid for lid, at in self._retry_at.items() if at <= time.time()]
+            for lobby_id in due:
+                try:
+                    sock, rest = self._handshake(lobby_id)
+                except (OSError, RuntimeError):
+                    with self._cond:
+                        if lobby_id in self._retry_at:
+                            self._retry_at[lobby_id] = time.time() + RECONNECT_DELAY_SEC
+                    continue
+                with self._cond:
+                    if lobby_id in self._retry_at:
+                        self.reconnects += 1
+                        self._attach(lobby_id, sock, rest)
+                    else:
+                        sock.close()
+
+    # -- readers ---------------------------------------------------------------
+
+    def latest(self, lobby_id: str):
+        with self._cond:
+            return self._latest.get(lobby_id)
+
+    def current_tick(self, lobby_id: str) -> int:
+        state = self.latest(lobby_id) or {}
+        return int(state.get("tick", -1) or 0) if state else -1
+
+    def wait_for_tick(self, lobby_id: str, after_tick: int, timeout: float):
+        """Block until the cached tick is > after_tick (or the lobby finished); returns latest state."""
+
+        def advanced():
+            state = self._latest.get(lobby_id)
+            if not state:
+                return False
+            return int(state.get("tick", 0) or 0) > after_tick or state.get("status") == "FINISHED"
+
+        with self._cond:
+            self._cond.wait_for(advanced, timeout=max(0.0, timeout))
+            return self._latest.get(lobby_id)
+
+    def wait_for_any(self, timeout: float):
+        """Block until any subscribed lobby receives a message."""
+        with self._cond:
+            version = self._version
+            self._cond.wait_for(lambda: self._version != version, timeout=max(0.0, timeout))
+
+    def add_listener(self, lobby_id: str, callback):
+        """callback(lobby_id, state) runs on the feed thread; returns a function that removes it."""
+        with self._cond:
+            self._listeners.setdefault(lobby_id, []).append(callback)
+
+        def remove():
+            with self._cond:
+                callbacks = self._listeners.get(lobby_id) or []
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+        return remove
+
+    def close(self):
+        self._closed = True
+        self._wake()
+        self._thread.join(timeout=2)
+        with self._cond:
+            for lobby_id in list(self._socks):
+                self._detach(lobby_id)
+            self._retry_at.clear()
+            self._pending.clear()
+        self._sel.close()
+        self._wake_r.close()
+        self._wake_w.close()
@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import hashlib
 import json
 import os
 import subprocess
@@ -7,11 +6,15 @@ import sys
 import time
 import urllib.request
 
+from harness.pow import solve_pow
+from harness.redisclient import RedisClient
+
 API_URL = os.getenv("API_URL", "http://localhost:3001").rstrip("/")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "qlympics")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "qlympics")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "qlympics")
-POW_MAX_ITERS = int(os.getenv("POW_MAX_ITERS", "500000"))
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 
 
 def http_json(method: str, path: str, body=None, headers=None):
@@ -32,16 +35,6 @@ def http_json(method: str, path: str, body=None, headers=None):
         raise RuntimeError(f"HTTP {exc.code} {url}: {payload}") from exc
 
 
-def solve_pow(nonce: str, difficulty: int):
-    target = "0" * difficulty
-    for i in range(POW_MAX_ITERS):
-        solution = f"sol-{i}"
-        digest = hashlib.sha256(f"{nonce}:{solution}".encode("utf-8")).hexdigest()
-        if digest.startswith(target):
-            return solution, i + 1
-    raise RuntimeError(f"Failed to solve PoW in {POW_MAX_ITERS} iterations. Increase POW_MAX_ITERS or reduce difficulty.")
-
-
 def run_cmd(args):
     result = subprocess.run(args, capture_output=True, text=True)
     if result.returncode != 0:
@@ -77,20 +70,6 @@ def create_game_mode():
     return game_mode_id
 
 
-def redis_get(key: str):
-    output = run_cmd([
-        "docker",
-        "compose",
-        "exec",
-        "-T",
-        "redis",
-        "redis-cli",
-        "GET",
-        key,
-    ])
-    return output
-
-
 def main():
     print("Checking API health...")
     status, health = http_json("GET", "/health")
@@ -150,16 +129,17 @@ def main():
     print("Input response:", input_resp)
 
     print("Waiting for game server to process...")
+    redis = RedisClient(REDIS_HOST, REDIS_PORT)
     for _ in range(10):
-        state_raw = redis_get(f"lobby:{lobby_id}:state")
-        seq_raw = redis_get(f"lobby:{lobby_id}:seq")
-        if state_raw and state_raw != "(nil)":
+        state_raw, seq = redis.lobby_snapshots([lobby_id])[lobby_id]
+        if state_raw:
             print("State:", json.loads(state_raw))
-            print("Seq:", seq_raw)
+            print("Seq:", seq)
             break
         time.sleep(0.5)
     else:
         raise RuntimeError("Lobby state not found in Redis. Is the game server running?")
+    redis.close()
 
     print("Smoke test complete.")
 
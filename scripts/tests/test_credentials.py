@@ -0,0 +1,80 @@
+"""
+CredentialCache persistence: what a run killed before flush() leaves for the next one.
+"""
+import os
+import stat
+import tempfile
+import unittest
+
+from harness.credentials import CredentialCache
+
+API = "http://api.test"
+PAYOUT = "0xAbC"
+
+
+class CredentialCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "creds.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def cache(self, save_every=500):
+        return CredentialCache(self.path, API, save_every=save_every)
+
+    def test_entries_and_joins_survive_a_kill(self):
+        cache = self.cache()
+        cache.store("S001", PAYOUT, "key-1", "agent-1")
+        cache.store("S002", PAYOUT, "key-2", "agent-2")
+        cache.note_lobby("key-1", "lobby-a")
+        self.assertFalse(os.path.exists(self.path))
+
+        reloaded = self.cache()
+        self.assertEqual(reloaded.lookup("S002", PAYOUT)["agent_id"], "agent-2")
+        self.assertEqual(reloaded.joined_lobbies(), {"key-1": "lobby-a"})
+        self.assertEqual(stat.S_IMODE(os.stat(cache.journal_path).st_mode), 0o600)
+
+    def test_flush_folds_the_journal_into_the_file(self):
+        cache = self.cache()
+        cache.store("S001", PAYOUT, "key-1", "agent-1")
+        cache.note_lobby("key-1", "lobby-a")
+        cache.flush()
+        self.assertFalse(os.path.exists(cache.journal_path))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(self.cache().joined_lobbies(), {"key-1": "lobby-a"})
+
+    def test_main_file_is_rewritten_every_save_every_changes(self):
+        cache = self.cache(save_every=3)
+        for idx in range(5):
+            cache.store(f"S{idx:03d}", PAYOUT, f"key-{idx}", f"agent-{idx}")
+        with open(cache.journal_path, encoding="utf-8") as fh:
+            self.assertEqual(len(fh.readlines()), 2)
+        self.assertEqual(len(self.cache().agents()), 5)
+
+    def test_torn_journal_line_is_ignored(self):
+        cache = self.cache()
+        cache.store("S001", PAYOUT, "key-1", "agent-1")
+        with open(cache.journal_path, "a", encoding="utf-8") as fh:
+            fh.write('["http://api.test|S002')
+        self.assertEqual(self.cache().agents(), {"agent-1": "key-1"})
+
+    def test_release_clears_joins_and_drops_agents_that_cannot_leave(self):
+        cache = self.cache()
+        cache.store("S001", PAYOUT, "key-1", "agent-1")
+        cache.store("S002", PAYOUT, "key-2", "agent-2")
+        cache.note_lobby("key-1", "lobby-a")
+        cache.note_lobby("key-2", "lobby-b")
+
+        def leave(api_key, _lobby_id):
+            if api_key == "key-2":
+                raise RuntimeError("HTTP 503")
+
+        self.assertEqual(cache.release(list(cache.joined_lobbies().items()), leave), (1, 1))
+        reloaded = self.cache()
+        self.assertEqual(reloaded.agents(), {"agent-1": "key-1"})
+        self.assertEqual(reloaded.joined_lobbies(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
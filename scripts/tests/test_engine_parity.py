@@ -0,0 +1,57 @@
+"""
+harness.engine against a match recorded from the TypeScript engine
+(apps/game-server/test/fixtures/engine-recording.jsonl: a config line, then one state per tick
+carrying the `inputs` applied to reach it). engine.test.ts replays the same file through
+stepLobbyState, so the fixture stays pinned to the server.
+"""
+import json
+import os
+import unittest
+
+from harness.engine import LobbySim, _PARITY_FIELDS, check_parity
+from harness.ticks import parse_iso_epoch
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "apps", "game-server", "test", "fixtures", "engine-recording.jsonl",
+)
+
+
+def load_recording():
+    with open(FIXTURE, encoding="utf-8") as handle:
+        rows = [json.loads(line) for line in handle if line.strip()]
+    return rows[0]["config"], rows[1:]
+
+
+class EngineParityTest(unittest.TestCase):
+    def setUp(self):
+        self.config, self.states = load_recording()
+
+    def test_start_matches_init_state(self):
+        got = LobbySim.start(self.config, list(self.states[0]["players"])).to_state()
+        for field in _PARITY_FIELDS:
+            self.assertEqual(got[field], self.states[0][field], field)
+
+    def test_recorded_inputs_replay_every_tick(self):
+        sim = LobbySim.start(self.config, list(self.states[0]["players"]))
+        for state in self.states[1:]:
+            sim.step([tuple(event) for event in state["inputs"]], parse_iso_epoch(state["updated_at"]))
+            got = sim.to_state()
+            for field in _PARITY_FIELDS:
+                self.assertEqual(got[field], state[field], f"tick {state['tick']}: {field}")
+        self.assertEqual(sim.status, "FINISHED")
+
+    def test_check_parity_with_inferred_inputs(self):
+        checked, mismatches = check_parity(self.config, self.states)
+        self.assertEqual(checked, len(self.states) - 1)
+        self.assertEqual(mismatches, [])
+
+    def test_check_parity_reports_drift(self):
+        drifted = [dict(state) for state in self.states]
+        drifted[10]["rng_state"] = (drifted[10]["rng_state"] + 1) & 0xFFFFFFFF
+        _checked, mismatches = check_parity(self.config, drifted)
+        self.assertTrue(any(m.startswith("tick 10: rng_state") for m in mismatches))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+HttpPool stale keep-alive handling against a local server that can drop a connection mid-request.
+"""
+import http.client
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from harness.httpclient import HttpPool
+
+
+class DroppingServer:
+    """
+    Answers every request with a keep-alive 200 "ok". The next `drop_next` requests are read and then
+    abandoned; with `close_after` set the server closes the socket right after its reply.
+    """
+
+    def __init__(self):
+        self.drop_next = 0
+        self.close_after = False
+        self.seen = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_args):
+                pass
+
+            def handle_any(self):
+                length = int(self.headers.get("content-length") or 0)
+                if length:
+                    self.rfile.read(length)
+                server.seen.append((self.command, self.path))
+                if server.drop_next:
+                    server.drop_next -= 1
+                    self.close_connection = True
+                    return
+                close = server.close_after
+                self.send_response(200)
+                self.send_header("content-length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+                self.close_connection = close
+
+            do_GET = do_POST = handle_any
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HttpPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = DroppingServer()
+        self.pool = HttpPool(timeout=5)
+        self.assertEqual(self.pool.request("GET", f"{self.server.url}/warm")[0], 200)
+        self.server.seen.clear()
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.close()
+
+    def test_connection_is_reused(self):
+        self.assertEqual(self.pool.request("POST", f"{self.server.url}/a", body=b"{}"), (200, b"ok"))
+        self.assertEqual(self.pool.stats()["opened"], 1)
+        self.assertEqual(self.pool.stats()["reused"], 1)
+
+    def test_get_is_replayed_after_a_drop(self):
+        self.server.drop_next = 1
+        self.assertEqual(self.pool.request("GET", f"{self.server.url}/state"), (200, b"ok"))
+        self.assertEqual(self.server.seen, [("GET", "/state"), ("GET", "/state")])
+
+    def test_post_is_not_replayed_once_sent(self):
+        self.server.drop_next = 1
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.pool.request("POST", f"{self.server.url}/agents/verify", body=b"{}")
+        self.assertEqual(self.server.seen, [("POST", "/agents/verify")])
+
+    def test_idle_socket_closed_by_server_is_skipped(self):
+        self.server.close_after = True
+        self.pool.request("GET", f"{self.server.url}/state")
+        self.server.close_after = False
+        self.server.seen.clear()
+        time.sleep(0.1)
+        self.assertEqual(self.pool.request("POST", f"{self.server.url}/input", body=b"{}"), (200, b"ok"))
+        self.assertEqual(self.server.seen, [("POST", "/input")])
+        self.assertEqual(self.pool.stats()["stale"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
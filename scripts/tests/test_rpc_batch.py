@@ -0,0 +1,152 @@
+"""
+JSON-RPC batching in e2e-chain.py against a local stub node.
+Run with `make test-harness` (or `cd scripts && python3 -m unittest discover -s tests`).
+"""
+import importlib.util
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_chain():
+    os.environ.setdefault("E2E_RPC_POLL_MIN_SEC", "0.01")
+    os.environ.setdefault("E2E_RPC_POLL_MAX_SEC", "0.02")
+    spec = importlib.util.spec_from_file_location("e2e_chain", os.path.join(SCRIPTS, "e2e-chain.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.log = lambda _msg: None
+    return module
+
+
+class StubNode:
+    """
+    Minimal JSON-RPC node answering every call with its `params[0]`, except methods listed in
+    `errors`. `batches` is "ok", "reject" (single error object for a list body) or "http400".
+    `fail_next` answers that many POSTs with HTTP 503 (or garbage when `garbage` is set).
+    """
+
+    def __init__(self):
+        self.batches = "ok"
+        self.errors = set()
+        self.fail_next = 0
+        self.garbage = False
+        self.posts = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                stub.posts.append(body)
+                if stub.fail_next:
+                    stub.fail_next -= 1
+                    if stub.garbage:
+                        return self.reply(200, b"<html>gateway</html>")
+                    return self.reply(503, b'{"error":"upstream unavailable"}')
+                if isinstance(body, list):
+                    if stub.batches == "reject":
+                        return self.send_json({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests are not supported"}})
+                    if stub.batches == "http400":
+                        return self.reply(400, b'{"error":"bad request"}')
+                    return self.send_json([stub.answer(call) for call in reversed(body)])
+                return self.send_json(stub.answer(body))
+
+            def send_json(self, payload):
+                self.reply(200, json.dumps(payload).encode("utf-8"))
+
+            def reply(self, status, raw):
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, call):
+        if call["method"] in self.errors:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": f"{call['method']} failed"}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": call["params"][0]}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RpcBatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chain = load_chain()
+
+    def setUp(self):
+        self.node = StubNode()
+        self.chain.QUAI_RPC_URL = self.node.url
+        self.chain._rpc_batch_supported = True
+
+    def tearDown(self):
+        self.node.close()
+
+    def calls(self, n=3):
+        return [("quai_getBalance", [f"0x{i}", "latest"]) for i in range(n)]
+
+    def test_batch_results_in_call_order(self):
+        self.assertEqual(self.chain.rpc_batch(self.calls()), ["0x0", "0x1", "0x2"])
+        self.assertEqual(len(self.node.posts), 1)
+
+    def test_partial_errors_come_back_per_call(self):
+        self.node.errors = {"quai_getTransactionReceipt"}
+        results = self.chain.rpc_batch([("quai_getBalance", ["0xa"]), ("quai_getTransactionReceipt", ["0xb"])])
+        self.assertEqual(results[0], "0xa")
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertTrue(self.chain._rpc_batch_supported)
+
+    def test_node_rejecting_batches_falls_back_for_good(self):
+        self.node.batches = "reject"
+        self.assertEqual(self.chain.rpc_batch(self.calls()), ["0x0", "0x1", "0x2"])
+        self.assertFalse(self.chain._rpc_batch_supported)
+        self.node.posts.clear()
+        self.assertEqual(self.chain.rpc_batch(self.calls(2)), ["0x0", "0x1"])
+        self.assertTrue(all(isinstance(post, dict) for post in self.node.posts))
+
+    def test_transient_failures_are_retried_without_disabling_batches(self):
+        for keepalive, garbage in ((True, False), (False, False), (True, True)):
+            with self.subTest(keepalive=keepalive, garbage=garbage):
+                self.chain.HTTP_KEEPALIVE = keepalive
+                self.node.posts.clear()
+                self.node.fail_next, self.node.garbage = 2, garbage
+                self.assertEqual(self.chain.rpc_batch(self.calls()), ["0x0", "0x1", "0x2"])
+                self.assertEqual(len(self.node.posts), 3)
+                self.assertTrue(self.chain._rpc_batch_supported)
+        self.chain.HTTP_KEEPALIVE = True
+
+    def test_exhausted_retries_report_every_call(self):
+        self.node.fail_next = self.chain.RPC_RETRIES + 1
+        results = self.chain.rpc_batch(self.calls())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertTrue(self.chain._rpc_batch_supported)
+
+    def test_other_client_errors_fall_back_once(self):
+        self.node.batches = "http400"
+        self.assertEqual(self.chain.rpc_batch(self.calls()), ["0x0", "0x1", "0x2"])
+        self.assertTrue(self.chain._rpc_batch_supported)
+
+    def test_unreachable_node_is_an_error_per_call(self):
+        self.chain.QUAI_RPC_URL = "http://127.0.0.1:9"
+        for keepalive in (True, False):
+            with self.subTest(keepalive=keepalive):
+                self.chain.HTTP_KEEPALIVE = keepalive
+                results = self.chain.rpc_batch(self.calls(2))
+                self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.chain.HTTP_KEEPALIVE = True
+
+
+if __name__ == "__main__":
+    unittest.main()